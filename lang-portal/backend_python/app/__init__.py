@@ -11,7 +11,39 @@ def create_app(test_config=None):
     # Default configuration
     app.config.from_mapping(
         DATABASE=os.path.join(app.instance_path, 'lang_portal.db'),
-        SECRET_KEY='dev'
+        SECRET_KEY='dev',
+        DB_POOL_SIZE=5,
+        DB_POOL_TIMEOUT=5.0,
+        DB_MMAP_SIZE=268435456,
+        DB_CACHE_SIZE=-20000,
+        DB_WRITE_MODE='sync',
+        DB_WRITE_QUEUE_SIZE=1000,
+        DB_GROUP_COMMIT_MS=2.0,
+        DB_GROUP_COMMIT_MAX=64,
+        ENTITY_CACHE_SIZE=10000,
+        ENTITY_CACHE_POLL_MS=100.0,
+        EMBEDDING_URL=None,
+        EMBEDDING_MODEL=None,
+        EMBEDDING_DIM=256,
+        EMBEDDING_BATCH_SIZE=64,
+        EMBEDDING_DIR=None,
+        EMBEDDING_REFRESH_TIMEOUT=2.0,
+        SNAPSHOT_DIR=None,
+        SNAPSHOT_KEEP=2,
+        SNAPSHOT_BUILD_TIMEOUT=2.0,
+        SNAPSHOT_WATCH_INTERVAL=1.0,
+        IMPORT_CHUNK_SIZE=1000,
+        STREAM_CHUNK_SIZE=500,
+        METRICS_ENABLED=True,
+        SLOW_QUERY_MS=None,
+        JSON_ENCODER='auto',
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_LEVEL=6,
+        COMPRESS_BROTLI_QUALITY=4,
+        CHANGE_LOG_RETENTION_DAYS=30,
+        CHANGES_POLL_MS=500.0,
+        CHANGES_STREAM_SECONDS=300.0,
+        CHANGES_KEEPALIVE_SECONDS=15.0
     )
     
     if test_config is None:
@@ -27,13 +59,46 @@ def create_app(test_config=None):
     except OSError:
         pass
     
+    # Shared SQLite connection pool used by every DAO
+    from . import db
+    db.init_app(app)
+    
+    # Single writer thread with group commit for the hot write paths
+    from . import writer
+    writer.init_app(app)
+    
+    # In-process LRU of words, groups and activities by id
+    from . import cache
+    cache.init_app(app)
+    
+    # Vocabulary snapshot, rebuilt in the background when words or groups change
+    from . import snapshot
+    snapshot.init_app(app)
+    
+    # Per-request SQL and latency metrics served at /api/metrics
+    from . import metrics
+    metrics.init_app(app)
+    
+    # orjson-backed JSON provider and gzip/brotli response compression
+    from . import serialization, compression
+    serialization.init_app(app)
+    compression.init_app(app)
+    
+    # Maintenance CLI commands (flask --app run <command>)
+    from . import commands
+    commands.init_app(app)
+    
     # Register blueprints
-    from .routes import words,groups,study_activities, study_sessions,dashboard
+    from .routes import words,groups,study_activities, study_sessions,dashboard,snapshot,changes
+    from .routes import metrics as metrics_routes
     app.register_blueprint(words.bp)
     app.register_blueprint(groups.bp)
     app.register_blueprint(study_activities.bp)
     app.register_blueprint(study_sessions.bp)
     app.register_blueprint(dashboard.bp)
+    app.register_blueprint(snapshot.bp)
+    app.register_blueprint(changes.bp)
+    app.register_blueprint(metrics_routes.bp)
     
     # Register Swagger UI blueprint
     SWAGGER_URL = '/api/docs'
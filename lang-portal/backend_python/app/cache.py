@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Sequence
+
+# Tables whose rows are cached by id; each has a table_versions counter
+CACHED_TABLES = ('words', 'groups', 'study_activities')
+
+class EntityCache:
+    """Size-bounded LRU of entity dicts keyed by (table, id)
+
+    Writes made through the DAOs drop exactly the rows they touched once
+    they commit. Writes made anywhere else, including other processes, show
+    up as table_versions counters moving by more than this process accounted
+    for; at most every ``poll_interval`` seconds a lookup reads the counters
+    and drops every cached row of a table that changed that way.
+
+    A load that started before an invalidation of its table is not stored,
+    so a slow reader cannot put back a row a concurrent write replaced.
+    """
+
+    def __init__(self, read_versions: Callable[[Sequence[str]], Dict[str, int]], maxsize: int = 10000,
+                 poll_interval: float = 0.1, tables: Sequence[str] = CACHED_TABLES):
+        self.read_versions = read_versions
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self.tables = tuple(tables)
+        self._entries: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._generations = dict.fromkeys(self.tables, 0)
+        self._polled_at: Optional[float] = None
+        self._hits = dict.fromkeys(self.tables, 0)
+        self._misses = dict.fromkeys(self.tables, 0)
+        self._stats = {'evictions': 0, 'invalidations': 0, 'flushes': 0}
+
+    def get(self, table: str, key: Hashable, load: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """Return a copy of the cached row, calling ``load`` on a miss
+
+        ``load`` returns the row as a dict, or None if it does not exist
+        (which is not cached).
+        """
+        self._poll()
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is not None:
+                self._entries.move_to_end((table, key))
+                self._hits[table] += 1
+                return dict(entry)
+            self._misses[table] += 1
+            generation = self._generations[table]
+
+        value = load()
+        if value is None:
+            return None
+        with self._lock:
+            if self._generations[table] == generation:
+                self._entries[(table, key)] = dict(value)
+                self._entries.move_to_end((table, key))
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, table: str, keys: Optional[Iterable[Hashable]] = None,
+                   version: Optional[int] = None, changes: int = 0) -> None:
+        """Drop the given rows of a table (every row with ``keys=None``) after a write commits
+
+        ``version`` is the table's counter as read inside the committed
+        transaction and ``changes`` the number of rows it wrote there. When
+        the counter moved by exactly that much since the last poll, the write
+        is accounted for and the next poll keeps the table's other rows.
+        """
+        with self._lock:
+            self._generations[table] += 1
+            if keys is None:
+                self._drop_table(table)
+            else:
+                for key in keys:
+                    if self._entries.pop((table, key), None) is not None:
+                        self._stats['invalidations'] += 1
+            if version is not None and self._versions.get(table) == version - changes:
+                self._versions[table] = version
+
+    def clear(self) -> None:
+        """Drop every cached row"""
+        with self._lock:
+            for table in self.tables:
+                self._generations[table] += 1
+            self._entries.clear()
+
+    def _drop_table(self, table: str) -> None:
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == table]:
+            del self._entries[entry_key]
+            self._stats['invalidations'] += 1
+
+    def _poll(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._polled_at is not None and now - self._polled_at < self.poll_interval:
+                return
+            self._polled_at = now
+            generations = dict(self._generations)
+
+        versions = self.read_versions(self.tables)
+        with self._lock:
+            for table, version in versions.items():
+                known = self._versions.get(table)
+                if known == version:
+                    continue
+                if known is not None or self._generations[table] != generations[table]:
+                    # Changed by a write this process did not account for
+                    self._generations[table] += 1
+                    self._drop_table(table)
+                    self._stats['flushes'] += 1
+                self._versions[table] = version
+
+    def stats(self) -> Dict:
+        """Return hits and misses per table, the hit rate and eviction counts"""
+        with self._lock:
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+                hits=hits,
+                misses=misses,
+                hit_rate=round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                tables={table: {'hits': self._hits[table], 'misses': self._misses[table]} for table in self.tables},
+            )
+
+_caches: Dict[str, EntityCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(db_path: str) -> Optional[EntityCache]:
+    """Return the entity cache registered for ``db_path``; None means DAOs always query"""
+    return _caches.get(db_path)
+
+def register_cache(db_path: str, cache: Optional[EntityCache]) -> Optional[EntityCache]:
+    """Install (or with None, remove) the entity cache for ``db_path``"""
+    with _caches_lock:
+        _caches.pop(db_path, None)
+        if cache is not None:
+            _caches[db_path] = cache
+    return cache
+
+def init_app(app) -> Optional[EntityCache]:
+    """Cache words, groups and activities by id unless ENTITY_CACHE_SIZE is 0"""
+    from .dao.version_dao import VersionDAO
+
+    db_path = app.config['DATABASE']
+    cache = None
+    if app.config['ENTITY_CACHE_SIZE'] > 0:
+        versions = VersionDAO(db_path)
+        cache = EntityCache(
+            versions.get_versions,
+            maxsize=app.config['ENTITY_CACHE_SIZE'],
+            poll_interval=app.config['ENTITY_CACHE_POLL_MS'] / 1000
+        )
+        app.extensions['entity_cache'] = cache
+    register_cache(db_path, cache)
+    return cache
@@ -0,0 +1,148 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from .dao.dashboard_dao import DashboardDAO
+from .embeddings import get_index
+from .services.change_service import ChangeService
+from .services.dashboard_service import DashboardService
+from .services.group_service import GroupService
+from .services.word_service import WordService
+from .services.import_service import CONFLICT_POLICIES, WORD_FIELDS, ImportService
+from .utils.importers import FORMATS, detect_format, read_records
+
+@click.command('rebuild-stats')
+@click.option('--verify-only', is_flag=True, help='Only compare the stored stats with a full recomputation.')
+@with_appcontext
+def rebuild_stats_command(verify_only):
+    """Recompute the dashboard_stats table from the base tables"""
+    dao = DashboardDAO(current_app.config['DATABASE'])
+    mismatches = dao.verify_stats()
+    for column, (stored, expected) in mismatches.items():
+        click.echo(f"{column}: stored={stored} expected={expected}")
+    if verify_only:
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} dashboard stats out of date")
+        click.echo("Dashboard stats are consistent.")
+        return
+
+    dao.rebuild_stats()
+    if dao.verify_stats():
+        raise click.ClickException("Dashboard stats still inconsistent after rebuild")
+    click.echo("Dashboard stats rebuilt.")
+
+@click.command('rebuild-rollups')
+@click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), help='First day to backfill (YYYY-MM-DD, default: the beginning).')
+@click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), help='Last day to backfill (YYYY-MM-DD, default: the end).')
+@click.option('--verify-only', is_flag=True, help='Only compare the stored rollups with a full recomputation.')
+@with_appcontext
+def rebuild_rollups_command(start, end, verify_only):
+    """Backfill the daily_rollups table from the base tables"""
+    service = DashboardService(current_app.config['DATABASE'])
+    start, end = (day.date().isoformat() if day else None for day in (start, end))
+    mismatches = service.verify_rollups(start, end)
+    for mismatch in mismatches:
+        click.echo(f"{mismatch['day']} group={mismatch['group_id']} activity={mismatch['study_activity_id']}: "
+                   f"stored={mismatch['stored']} expected={mismatch['expected']}")
+    if verify_only:
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} daily rollups out of date")
+        click.echo("Daily rollups are consistent.")
+        return
+
+    rows = service.rebuild_rollups(start, end)
+    if service.verify_rollups(start, end):
+        raise click.ClickException("Daily rollups still inconsistent after rebuild")
+    click.echo(f"Daily rollups rebuilt ({rows} rows).")
+
+@click.command('rebuild-word-stats')
+@click.option('--verify-only', is_flag=True, help='Only compare the stored word stats with a full recomputation.')
+@with_appcontext
+def rebuild_word_stats_command(verify_only):
+    """Recompute the word_stats table from the study reviews"""
+    service = WordService(current_app.config['DATABASE'])
+    mismatches = service.verify_word_stats()
+    for mismatch in mismatches:
+        click.echo(f"word {mismatch['word_id']}: stored={mismatch['stored']} expected={mismatch['expected']}")
+    if verify_only:
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} word stats out of date")
+        click.echo("Word stats are consistent.")
+        return
+
+    rows = service.rebuild_word_stats()
+    if service.verify_word_stats():
+        raise click.ClickException("Word stats still inconsistent after rebuild")
+    click.echo(f"Word stats rebuilt ({rows} words).")
+
+@click.command('embed-words')
+@click.option('--batch-size', type=int, help='Words per embedding request (default EMBEDDING_BATCH_SIZE).')
+@with_appcontext
+def embed_words_command(batch_size):
+    """Embed new and changed words for semantic search"""
+    index = get_index(current_app)
+    if batch_size:
+        index.batch_size = batch_size
+    result = WordService(current_app.config['DATABASE']).refresh_embeddings(index)
+    click.echo(f"Embedded {result['embedded']} words, reused {result['reused']}, removed {result['removed']}.")
+
+@click.command('import-words')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Input format (default: from the file extension).')
+@click.option('--on-conflict', type=click.Choice(CONFLICT_POLICIES), default='skip', show_default=True,
+              help='What to do with a (kanji, romaji) that already exists.')
+@click.option('--group', help='Add every imported word to this group.')
+@click.option('--no-create-groups', is_flag=True, help='Reject rows naming groups that do not exist.')
+@click.option('--chunk-size', type=int, help='Rows per transaction (default IMPORT_CHUNK_SIZE).')
+@with_appcontext
+def import_words_command(path, fmt, on_conflict, group, no_create_groups, chunk_size):
+    """Bulk import words from a CSV or JSONL file"""
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        raise click.UsageError("Cannot tell the format from the file name; pass --format")
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        try:
+            report = ImportService(current_app.config['DATABASE']).import_words(
+                read_records(f, fmt, WORD_FIELDS),
+                on_conflict=on_conflict,
+                group=group,
+                create_groups=not no_create_groups,
+                chunk_size=chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {'; '.join(error['errors'])}", err=True)
+    click.echo(f"{report['rows']} rows in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s): "
+               f"{report['inserted']} inserted, {report['updated']} updated, {report['unchanged']} unchanged, "
+               f"{report['duplicates']} duplicates, {report['failed']} failed, {report['group_links']} group links")
+
+@click.command('rebuild-schedules')
+@with_appcontext
+def rebuild_schedules_command():
+    """Recompute the spaced-repetition schedules by replaying all reviews"""
+    result = GroupService(current_app.config['DATABASE']).rebuild_schedules()
+    click.echo(f"Rebuilt {result['schedules']} schedules from {result['reviews_replayed']} reviews "
+               f"({result['schedules_reviewed']} words reviewed).")
+
+@click.command('compact-changes')
+@click.option('--retention-days', type=float, help='Keep tombstones this many days (default CHANGE_LOG_RETENTION_DAYS).')
+@with_appcontext
+def compact_changes_command(retention_days):
+    """Drop superseded change log entries and expired tombstones"""
+    if retention_days is None:
+        retention_days = current_app.config['CHANGE_LOG_RETENTION_DAYS']
+    if retention_days < 0:
+        raise click.ClickException("--retention-days must not be negative")
+    result = ChangeService(current_app.config['DATABASE']).compact(retention_days)
+    click.echo(f"Dropped {result['superseded']} superseded entries and {result['expired']} tombstones; "
+               f"{result['remaining']} entries remain, clients behind seq {result['compacted_through']} must resync.")
+
+def init_app(app):
+    """Register the maintenance CLI commands"""
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(rebuild_word_stats_command)
+    app.cli.add_command(embed_words_command)
+    app.cli.add_command(import_words_command)
+    app.cli.add_command(rebuild_schedules_command)
+    app.cli.add_command(compact_changes_command)
@@ -0,0 +1,105 @@
+import zlib
+from typing import Iterable, Iterator, Optional, Sequence
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+# Response types worth compressing; anything else is sent as it is
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/csv')
+
+def available_encodings() -> tuple:
+    """Content codings this process can produce, most preferred first"""
+    return ('br', 'gzip', 'identity') if brotli is not None else ('gzip', 'identity')
+
+def negotiate_encoding(accept_encodings, encodings: Sequence[str]) -> str:
+    """Most preferred of ``encodings`` that the client's Accept-Encoding allows, else identity
+
+    A coding the client does not mention is not used, so clients that send
+    no Accept-Encoding get plain bodies.
+    """
+    for encoding in encodings:
+        if encoding == 'identity' or accept_encodings[encoding] > 0:
+            return encoding
+    return 'identity'
+
+class ResponseCompressor:
+    """``after_request`` hook that compresses bodies in the coding the client prefers
+
+    Buffered bodies are compressed when they are at least ``min_size``
+    bytes. Streamed lists have no size up front and are always compressed,
+    chunk by chunk with a flush after each one, so clients still receive
+    rows as they are fetched. Responses that already have a Content-Encoding
+    or are passed straight through (files, snapshots) are left alone. A
+    strong ETag becomes weak on a compressed response, since its bytes
+    differ from the uncompressed ones; conditional requests still match it.
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def __call__(self, response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_TYPES
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(request.accept_encodings, available_encodings())
+        if encoding == 'identity':
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            response.set_data(self.compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def _compress_stream(self, chunks: Iterable, encoding: str) -> Iterator[bytes]:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            process, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        try:
+            for chunk in chunks:
+                data = process(chunk.encode('utf-8') if isinstance(chunk, str) else chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+def init_app(app) -> Optional[ResponseCompressor]:
+    """Compress responses unless COMPRESS_MIN_SIZE is None"""
+    if app.config['COMPRESS_MIN_SIZE'] is None:
+        return None
+    compressor = ResponseCompressor(
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        gzip_level=app.config['COMPRESS_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+    )
+    app.after_request(compressor)
+    return compressor
@@ -0,0 +1,125 @@
+from contextlib import AbstractContextManager
+import sqlite3
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+from ..cache import get_cache
+from ..db import get_pool, get_read_pool
+from ..writer import get_writer
+
+T = TypeVar('T')
+
+class DictRowFactory:
+    """Row factory returning JSON-ready dicts keyed by column name
+
+    Column names are worked out once per statement rather than once per row.
+    """
+    __slots__ = ('description', 'names')
+
+    def __init__(self):
+        self.description = None
+        self.names = ()
+
+    def __call__(self, cursor: sqlite3.Cursor, row: tuple) -> dict:
+        description = cursor.description
+        if description is not self.description:
+            self.description = description
+            self.names = tuple(column[0] for column in description)
+        return dict(zip(self.names, row))
+
+def iso_timestamp(column: str, table: Optional[str] = None) -> str:
+    """SQL expression rendering a stored timestamp the way datetime.isoformat() would"""
+    source = f'{table}.{column}' if table else column
+    return f"replace({source}, ' ', 'T') AS {column}"
+
+class BaseDAO:
+    """Base DAO that borrows connections from the shared pool for its database"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.read_pool = get_read_pool(db_path)
+
+    def _get_connection(self) -> AbstractContextManager[sqlite3.Connection]:
+        return self.pool.connection()
+
+    def _get_read_connection(self) -> AbstractContextManager[sqlite3.Connection]:
+        """Borrow a read-only connection, or the read-write one this thread is already
+        using so reads made during a write see its uncommitted changes"""
+        if self.pool.holding():
+            return self.pool.connection()
+        return self.read_pool.connection()
+
+    def _write(self, fn: Callable[[sqlite3.Connection], T], deferrable: bool = False) -> Optional[T]:
+        """Run ``fn(conn)`` in a committed write transaction and return its result
+
+        Goes through the writer thread when there is one (see app.writer), so
+        ``fn`` must not commit. A ``deferrable`` write returns None without
+        waiting for the commit when the writer acknowledges asynchronously.
+        """
+        if self.pool.holding():
+            # Nested in another write (or running on the writer thread): join its transaction
+            with self._get_connection() as conn:
+                return fn(conn)
+        writer = get_writer(self.db_path)
+        if writer is not None:
+            return writer.execute(fn, deferrable)
+        with self._get_connection() as conn:
+            # Take the write lock before ``fn`` reads, as the writer thread does, so
+            # a check-then-insert cannot interleave with another process's
+            conn.execute('BEGIN IMMEDIATE')
+            result = fn(conn)
+            conn.commit()
+            return result
+
+    def _cached(self, table: str, key: Hashable, load: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """Look a row up in the entity cache (see app.cache), calling ``load`` on a miss
+
+        Reads inside a write transaction bypass the cache since they can see
+        changes that are not committed yet.
+        """
+        cache = get_cache(self.db_path)
+        if cache is None or self.pool.holding():
+            return load()
+        return cache.get(table, key, load)
+
+    def _table_version(self, conn: sqlite3.Connection, table: str) -> Optional[int]:
+        """A cached table's change counter, read inside the write transaction that just changed it"""
+        if get_cache(self.db_path) is None:
+            return None
+        row = conn.execute('SELECT version FROM table_versions WHERE table_name = ?', (table,)).fetchone()
+        return row[0] if row else None
+
+    def _invalidate(self, table: str, keys: Optional[Iterable[Hashable]] = None,
+                    version: Optional[int] = None, changes: int = 0) -> None:
+        """Drop committed-over rows from the entity cache; see EntityCache.invalidate"""
+        cache = get_cache(self.db_path)
+        if cache is not None:
+            cache.invalidate(table, keys, version, changes)
+
+    @staticmethod
+    def _dict_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        """Cursor whose rows come back as JSON-ready dicts, skipping model objects"""
+        cursor = conn.cursor()
+        cursor.row_factory = DictRowFactory()
+        return cursor
+
+    @staticmethod
+    def _keyset_clause(sort_column: str, after: Optional[Tuple]) -> Tuple[str, tuple]:
+        """Build the WHERE clause that seeks past a (sort_key, id) cursor key"""
+        if after is None:
+            return '', ()
+        if sort_column == 'id':
+            return 'WHERE id > ?', (after[1],)
+        return f'WHERE ({sort_column}, id) > (?, ?)', (after[0], after[1])
+
+    @staticmethod
+    def _split_page(rows: Sequence, per_page: int, sort_key=0, id_key=0) -> Tuple[List, Optional[Tuple]]:
+        """Drop the look-ahead row and return (rows, next cursor key)
+
+        ``sort_key`` and ``id_key`` index tuple rows or name dict columns.
+        """
+        rows = list(rows)
+        if len(rows) <= per_page:
+            return rows, None
+        rows = rows[:per_page]
+        last = rows[-1]
+        return rows, (last[sort_key], last[id_key])
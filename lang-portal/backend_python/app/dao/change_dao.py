@@ -0,0 +1,144 @@
+from typing import Dict, List, Tuple
+from .base_dao import BaseDAO
+from .group_dao import GroupDAO
+from .study_session_dao import StudySessionDAO
+from .word_dao import WordDAO
+
+# Tables the change log follows, with the columns an upsert carries as its
+# data (the same shape the table's own endpoints return). group_words rows
+# have no columns beyond their key.
+CHANGE_TABLES = {
+    'words': WordDAO.WORD_COLUMNS,
+    'groups': GroupDAO.GROUP_COLUMNS,
+    'group_words': None,
+    'study_sessions': StudySessionDAO.SESSION_COLUMNS,
+}
+
+# An entry is superseded once the same row has a later one; idx_change_log_row
+# answers this with one index probe per entry
+SUPERSEDED = '''EXISTS (
+    SELECT 1 FROM change_log later
+    WHERE later.table_name = change_log.table_name AND later.row_id = change_log.row_id
+      AND later.related_id = change_log.related_id AND later.seq > change_log.seq
+)'''
+
+# Upserts for live rows the log has no entry for, as after a load that ran
+# with triggers suspended (see benchmarks.datasets)
+BACKFILL_SQL = {
+    'words': 'SELECT id AS row_id, 0 AS related_id FROM words',
+    'groups': 'SELECT id AS row_id, 0 AS related_id FROM groups',
+    'group_words': 'SELECT group_id AS row_id, word_id AS related_id FROM group_words',
+    'study_sessions': 'SELECT id AS row_id, 0 AS related_id FROM study_sessions',
+}
+
+class ChangeDAO(BaseDAO):
+    def get_changes(self, since: int, limit: int) -> Tuple[List[Dict], bool, int, int]:
+        """Get the latest change of every row changed after ``since``, in sequence order
+
+        Returns (changes, has_more, latest sequence number, compaction
+        floor). Entries superseded by a later change of the same row are
+        skipped, so a row appears at most once however often it changed.
+        Upserts carry the row as it is now; all reads share one transaction,
+        so the rows agree with the entries and with the latest sequence.
+        """
+        with self._get_read_connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                rows = conn.execute(f'''
+                    SELECT seq, table_name, row_id, related_id, op, changed_at
+                    FROM change_log
+                    WHERE seq > ? AND NOT {SUPERSEDED}
+                    ORDER BY seq
+                    LIMIT ?
+                ''', (since, limit + 1)).fetchall()
+                has_more = len(rows) > limit
+                changes = [self._change_from_row(row) for row in rows[:limit]]
+                self._attach_rows(conn, changes)
+                latest = self._latest_seq(conn)
+                floor = self._floor(conn)
+            finally:
+                conn.rollback()
+        return changes, has_more, latest, floor
+
+    def get_positions(self) -> Tuple[int, int]:
+        """Get (latest sequence number, compaction floor)"""
+        with self._get_read_connection() as conn:
+            return self._latest_seq(conn), self._floor(conn)
+
+    @staticmethod
+    def _latest_seq(conn) -> int:
+        # sqlite_sequence keeps the highest seq ever handed out, even if compaction removed it
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _floor(conn) -> int:
+        return conn.execute('SELECT compacted_through FROM change_log_state WHERE id = 1').fetchone()[0]
+
+    @staticmethod
+    def _change_from_row(row: tuple) -> Dict:
+        seq, table, row_id, related_id, op, changed_at = row
+        key = {'group_id': row_id, 'word_id': related_id} if table == 'group_words' else {'id': row_id}
+        return {'seq': seq, 'table': table, 'op': op, 'key': key, 'changed_at': changed_at, 'data': None}
+
+    def _attach_rows(self, conn, changes: List[Dict]) -> None:
+        """Fill in the current row of every upsert, one query per table"""
+        upserts: Dict[str, Dict[int, Dict]] = {}
+        for change in changes:
+            if change['op'] != 'upsert':
+                continue
+            if change['table'] == 'group_words':
+                change['data'] = dict(change['key'])
+            else:
+                upserts.setdefault(change['table'], {})[change['key']['id']] = change
+        cursor = self._dict_cursor(conn)
+        for table, by_id in upserts.items():
+            placeholders = ', '.join('?' for _ in by_id)
+            cursor.execute(f'SELECT {CHANGE_TABLES[table]} FROM {table} WHERE id IN ({placeholders})',
+                           tuple(by_id))
+            for row in cursor.fetchall():
+                by_id[row['id']]['data'] = row
+
+    def backfill(self) -> int:
+        """Log an upsert for every row that has no change entry yet; returns how many were added"""
+        with self._get_connection() as conn:
+            added = 0
+            for table, select in BACKFILL_SQL.items():
+                added += conn.execute(f'''
+                    INSERT INTO change_log (table_name, row_id, related_id, op)
+                    SELECT ?, t.row_id, t.related_id, 'upsert' FROM ({select}) t
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM change_log c
+                        WHERE c.table_name = ? AND c.row_id = t.row_id AND c.related_id = t.related_id
+                    )
+                    ORDER BY t.row_id, t.related_id
+                ''', (table, table)).rowcount
+            conn.commit()
+            return added
+
+    def compact(self, retention_days: float) -> Dict:
+        """Drop superseded entries and tombstones older than ``retention_days``
+
+        Dropping a superseded entry changes nothing a client can observe.
+        Dropping tombstones does: the floor moves up to the newest one
+        dropped, and clients whose position is below it must sync from 0.
+        """
+        cutoff = f'-{float(retention_days)} days'
+        with self._get_connection() as conn:
+            superseded = conn.execute(f'DELETE FROM change_log WHERE {SUPERSEDED}').rowcount
+            expired_through = conn.execute('''
+                SELECT MAX(seq) FROM change_log
+                WHERE op = 'delete' AND changed_at < strftime('%Y-%m-%dT%H:%M:%f', 'now', ?)
+            ''', (cutoff,)).fetchone()[0]
+            expired = 0
+            if expired_through is not None:
+                expired = conn.execute(
+                    "DELETE FROM change_log WHERE op = 'delete' AND seq <= ?", (expired_through,)
+                ).rowcount
+                conn.execute('''
+                    UPDATE change_log_state SET compacted_through = MAX(compacted_through, ?) WHERE id = 1
+                ''', (expired_through,))
+            floor = self._floor(conn)
+            conn.commit()
+            return {'superseded': superseded, 'expired': expired, 'compacted_through': floor,
+                    'remaining': conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0]}
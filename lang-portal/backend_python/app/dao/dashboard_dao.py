@@ -1,27 +1,92 @@
 # /Users/mohitgarg/Desktop/Projects/free-genai-bootcamp-2025/lang-portal/backend_python/app/dao/dashboard_dao.py
 
-import sqlite3
-from typing import Dict
+from typing import Dict, List, Optional
+from .base_dao import BaseDAO
+
+STATS_COLUMNS = (
+    'total_words', 'total_groups', 'total_sessions', 'active_groups',
+    'total_reviews', 'correct_reviews', 'studied_words',
+    'last_session_id', 'last_session_correct', 'last_session_incorrect'
+)
+
+# Recomputes every dashboard aggregate from the base tables
+RECOMPUTE_STATS_SQL = '''
+    SELECT
+        (SELECT COUNT(*) FROM words),
+        (SELECT COUNT(*) FROM groups),
+        (SELECT COUNT(*) FROM study_sessions),
+        (SELECT COUNT(DISTINCT group_id) FROM study_sessions),
+        (SELECT COUNT(*) FROM study_reviews),
+        (SELECT COUNT(*) FROM study_reviews WHERE correct),
+        (SELECT COUNT(DISTINCT word_id) FROM study_reviews),
+        last.id,
+        (SELECT COUNT(*) FROM study_reviews WHERE study_session_id = last.id AND correct),
+        (SELECT COUNT(*) FROM study_reviews WHERE study_session_id = last.id AND NOT correct)
+    FROM (SELECT NULL AS unused) LEFT JOIN (
+        SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1
+    ) AS last
+'''
+
+ROLLUP_COLUMNS = ('reviews', 'correct', 'words', 'sessions', 'session_seconds')
+
+# Recomputes daily_rollups rows from the base tables, optionally for a day range
+RECOMPUTE_ROLLUPS_SQL = '''
+    WITH review_days AS (
+        SELECT date(r.created_at) AS day, s.group_id, s.study_activity_id,
+               COUNT(*) AS reviews, SUM(r.correct != 0) AS correct, COUNT(DISTINCT r.word_id) AS words
+        FROM study_reviews r JOIN study_sessions s ON s.id = r.study_session_id
+        WHERE date(r.created_at) BETWEEN :start AND :end
+        GROUP BY 1, 2, 3
+    ), session_days AS (
+        SELECT date(start_time) AS day, group_id, study_activity_id, COUNT(*) AS sessions,
+               SUM(COALESCE(MAX(0, CAST(round((julianday(end_time) - julianday(start_time)) * 86400) AS INTEGER)), 0))
+                   AS session_seconds
+        FROM study_sessions
+        WHERE date(start_time) BETWEEN :start AND :end
+        GROUP BY 1, 2, 3
+    ), cells AS (
+        SELECT day, group_id, study_activity_id FROM review_days
+        UNION
+        SELECT day, group_id, study_activity_id FROM session_days
+    )
+    SELECT c.day, c.group_id, c.study_activity_id,
+           COALESCE(rd.reviews, 0), COALESCE(rd.correct, 0), COALESCE(rd.words, 0),
+           COALESCE(sd.sessions, 0), COALESCE(sd.session_seconds, 0)
+    FROM cells c
+    LEFT JOIN review_days rd USING (day, group_id, study_activity_id)
+    LEFT JOIN session_days sd USING (day, group_id, study_activity_id)
+    WHERE c.day IS NOT NULL
+    ORDER BY 1, 2, 3
+'''
+
+# First day of the bucket a rollup day falls in; weeks start on Monday
+TIMESERIES_BUCKETS = {
+    'day': 'day',
+    'week': "date(day, '-6 days', 'weekday 1')",
+}
+
+# Covers the whole history when no range is given
+ALL_DAYS = {'start': '0000-01-01', 'end': '9999-12-31'}
+
+class DashboardDAO(BaseDAO):
+    def get_stats(self) -> Dict:
+        """Return the incrementally maintained dashboard aggregates."""
+        with self._get_read_connection() as conn:
+            row = conn.execute(f'SELECT {", ".join(STATS_COLUMNS)} FROM dashboard_stats WHERE id = 1').fetchone()
+            if row is None:
+                return dict.fromkeys(STATS_COLUMNS, 0) | {'last_session_id': None}
+            return dict(zip(STATS_COLUMNS, row))
 
-class DashboardDAO:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        
     def get_last_study_session(self) -> Dict:
         """Return the last study session details, including correct and incorrect word counts."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
-            # Query to get the last study session and count correct and incorrect words
             cursor.execute('''
                 SELECT ss.id, ss.group_id, ss.study_activity_id, ss.start_time, ss.end_time,
-                       SUM(CASE WHEN sr.correct = 1 THEN 1 ELSE 0 END) AS correct_words,
-                       SUM(CASE WHEN sr.correct = 0 THEN 1 ELSE 0 END) AS incorrect_words
-                FROM study_sessions ss
-                LEFT JOIN study_reviews sr ON ss.id = sr.study_session_id
-                GROUP BY ss.id
-                ORDER BY ss.start_time DESC
-                LIMIT 1
+                       ds.last_session_correct, ds.last_session_incorrect
+                FROM dashboard_stats ds
+                JOIN study_sessions ss ON ss.id = ds.last_session_id
+                WHERE ds.id = 1
             ''')
             row = cursor.fetchone()
             if row:
@@ -35,36 +100,106 @@ class DashboardDAO:
                     "incorrect_words": row[6]
                 }
             return {}
-        finally:
-            conn.close()
+
     def get_study_progress(self) -> Dict:
         """Return current study progress."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM words')
-            total_words = cursor.fetchone()[0]
-            cursor.execute('SELECT COUNT(*) FROM study_reviews WHERE correct = 1')
-            studied_words = cursor.fetchone()[0]
-            return {
-                "studied_words": studied_words,
-                "total_words": total_words
-            }
-        finally:
-            conn.close()
+        stats = self.get_stats()
+        return {
+            "studied_words": stats['studied_words'],
+            "total_words": stats['total_words']
+        }
 
     def get_quick_stats(self) -> Dict:
         """Return quick statistics."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(DISTINCT group_id) FROM study_sessions')
-            active_groups = cursor.fetchone()[0]
-            cursor.execute('SELECT COUNT(*) FROM study_sessions')
-            total_sessions = cursor.fetchone()[0]
+        stats = self.get_stats()
+        return {
+            "active_groups": stats['active_groups'],
+            "total_sessions": stats['total_sessions']
+        }
+
+    def rebuild_stats(self) -> Dict:
+        """Recompute the dashboard aggregates from scratch and store them."""
+        with self._get_connection() as conn:
+            row = conn.execute(RECOMPUTE_STATS_SQL).fetchone()
+            conn.execute(f'''
+                INSERT OR REPLACE INTO dashboard_stats (id, {", ".join(STATS_COLUMNS)})
+                VALUES (1, {", ".join("?" for _ in STATS_COLUMNS)})
+            ''', row)
+            conn.commit()
+            return dict(zip(STATS_COLUMNS, row))
+
+    def verify_stats(self) -> Dict:
+        """Compare stored aggregates with a full recomputation.
+
+        Returns a mapping of column name to (stored, expected) for every mismatch.
+        """
+        with self._get_connection() as conn:
+            expected = dict(zip(STATS_COLUMNS, conn.execute(RECOMPUTE_STATS_SQL).fetchone()))
+            stored = self.get_stats()
             return {
-                "active_groups": active_groups,
-                "total_sessions": total_sessions
+                column: (stored[column], expected[column])
+                for column in STATS_COLUMNS
+                if stored[column] != expected[column]
             }
-        finally:
-            conn.close()
\ No newline at end of file
+
+    def get_timeseries(self, start: str, end: str, bucket: str = 'day',
+                       group_id: Optional[int] = None, study_activity_id: Optional[int] = None) -> List[Dict]:
+        """Sum the daily rollups between two days (inclusive) per day or week bucket.
+
+        Only buckets with activity are returned. Reads one row per day, group
+        and activity in the range, never the reviews themselves.
+        """
+        clauses, params = ['day BETWEEN ? AND ?'], [start, end]
+        if group_id is not None:
+            clauses.append('group_id = ?')
+            params.append(group_id)
+        if study_activity_id is not None:
+            clauses.append('study_activity_id = ?')
+            params.append(study_activity_id)
+        sums = ', '.join(f'SUM({column}) AS {column}' for column in ROLLUP_COLUMNS)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'''
+                SELECT {TIMESERIES_BUCKETS[bucket]} AS date, {sums}
+                FROM daily_rollups
+                WHERE {' AND '.join(clauses)}
+                GROUP BY 1
+                ORDER BY 1
+            ''', params)
+            return cursor.fetchall()
+
+    def rebuild_rollups(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        """Recompute the daily rollups between two days (inclusive), or all of them.
+
+        Returns the number of rollup rows written.
+        """
+        days = {'start': start or ALL_DAYS['start'], 'end': end or ALL_DAYS['end']}
+        with self._get_connection() as conn:
+            rows = conn.execute(RECOMPUTE_ROLLUPS_SQL, days).fetchall()
+            conn.execute('DELETE FROM daily_rollups WHERE day BETWEEN :start AND :end', days)
+            conn.executemany(f'''
+                INSERT INTO daily_rollups (day, group_id, study_activity_id, {", ".join(ROLLUP_COLUMNS)})
+                VALUES ({", ".join("?" for _ in range(3 + len(ROLLUP_COLUMNS)))})
+            ''', rows)
+            conn.commit()
+            return len(rows)
+
+    def verify_rollups(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """Compare stored daily rollups with a full recomputation.
+
+        Returns one entry per (day, group_id, study_activity_id) that differs,
+        with the stored and expected counts (None for a missing row).
+        """
+        days = {'start': start or ALL_DAYS['start'], 'end': end or ALL_DAYS['end']}
+        with self._get_connection() as conn:
+            expected = {row[:3]: row[3:] for row in conn.execute(RECOMPUTE_ROLLUPS_SQL, days)}
+            stored = {row[:3]: row[3:] for row in conn.execute(f'''
+                SELECT day, group_id, study_activity_id, {", ".join(ROLLUP_COLUMNS)}
+                FROM daily_rollups WHERE day BETWEEN :start AND :end
+            ''', days)}
+        return [
+            {'day': key[0], 'group_id': key[1], 'study_activity_id': key[2],
+             'stored': stored.get(key), 'expected': expected.get(key)}
+            for key in sorted(expected.keys() | stored.keys())
+            if stored.get(key) != expected.get(key)
+        ]
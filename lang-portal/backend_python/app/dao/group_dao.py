@@ -1,96 +1,201 @@
-import sqlite3
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from ..models.group import Group
+from .base_dao import BaseDAO, iso_timestamp
 
-class GroupDAO:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-
-    def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+class GroupDAO(BaseDAO):
+    # Columns of a group as served by the API, timestamps already ISO formatted
+    GROUP_COLUMNS = f"id, name, {iso_timestamp('created_at')}, {iso_timestamp('updated_at')}"
+    # Sort options of a group's word list, mapped to their ORDER BY columns
+    WORD_SORT_COLUMNS = {
+        'id': 'w.id',
+        'kanji': 'w.kanji',
+        'romaji': 'w.romaji',
+        'english': 'w.english',
+        'added_at': 'gw.created_at',
+    }
+    # Word count and review stats for a page of groups. Sessions are filtered
+    # with IN (page) rather than joined from it: joined, the planner builds an
+    # automatic covering index over study_reviews on every call instead of
+    # using idx_study_reviews_session_id.
+    GROUP_SUMMARY_SQL = f'''
+        WITH page AS (
+            SELECT id, name FROM groups ORDER BY id LIMIT ? OFFSET ?
+        ),
+        session_stats AS (
+            SELECT s.group_id,
+                   MAX(s.start_time) AS last_studied_at,
+                   COUNT(r.id) AS review_count,
+                   COALESCE(SUM(r.correct), 0) AS correct_count,
+                   COUNT(DISTINCT r.word_id) AS reviewed_word_count
+            FROM study_sessions s
+            LEFT JOIN study_reviews r ON r.study_session_id = s.id
+            WHERE s.group_id IN (SELECT id FROM page)
+            GROUP BY s.group_id
+        )
+        SELECT page.id,
+               page.name,
+               (SELECT COUNT(*) FROM group_words gw WHERE gw.group_id = page.id) AS word_count,
+               COALESCE(ss.reviewed_word_count, 0) AS reviewed_word_count,
+               COALESCE(ss.review_count, 0) AS review_count,
+               CASE WHEN ss.review_count > 0
+                    THEN 100.0 * ss.correct_count / ss.review_count ELSE 0 END AS accuracy,
+               {iso_timestamp('last_studied_at', 'ss')}
+        FROM page
+        LEFT JOIN session_stats ss ON ss.group_id = page.id
+        ORDER BY page.id
+    '''
 
     def get_groups(self, page: int = 1, per_page: int = 10) -> List[Dict]:
         """Get paginated list of groups"""
         offset = (page - 1) * per_page
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM groups')
-            total_count = cursor.fetchone()[0]
-            cursor.execute('''
-                SELECT id, name, created_at, updated_at
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'''
+                SELECT {self.GROUP_COLUMNS}
                 FROM groups
                 ORDER BY id
                 LIMIT ? OFFSET ?
             ''', (per_page, offset))
-            groups = [
-                Group(
-                    id=row[0],
-                    name=row[1],
-                    created_at=datetime.fromisoformat(row[2]) if row[2] else None,
-                    updated_at=datetime.fromisoformat(row[3]) if row[3] else None
-                ).to_dict()
-                for row in cursor.fetchall()
-            ]
-            return groups
-        finally:
-            conn.close()
+            return cursor.fetchall()
+
+    def get_groups_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                         include_total: bool = False) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of groups following a (sort_key, id) cursor key"""
+        where, params = self._keyset_clause('id', after)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            total_count = None
+            if include_total:
+                cursor.execute('SELECT COUNT(*) AS total FROM groups')
+                total_count = cursor.fetchone()['total']
+            cursor.execute(f'''
+                SELECT {self.GROUP_COLUMNS}
+                FROM groups
+                {where}
+                ORDER BY id
+                LIMIT ?
+            ''', params + (per_page + 1,))
+            groups, next_key = self._split_page(cursor.fetchall(), per_page, 'id', 'id')
+            return groups, total_count, next_key
 
     def get_group_by_id(self, group_id: int) -> Optional[Dict]:
-        """Get a group by its ID"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, name, created_at, updated_at FROM groups WHERE id = ?', (group_id,))
-            row = cursor.fetchone()
-            if row:
-                return Group(
-                    id=row[0],
-                    name=row[1],
-                    created_at=datetime.fromisoformat(row[2]) if row[2] else None,
-                    updated_at=datetime.fromisoformat(row[3]) if row[3] else None
-                ).to_dict()
-            return None
-        finally:
-            conn.close()
+        """Get a group by its ID, from the entity cache when it is there"""
+        return self._cached('groups', group_id, lambda: self._fetch_group(group_id))
+
+    def _fetch_group(self, group_id: int) -> Optional[Dict]:
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'SELECT {self.GROUP_COLUMNS} FROM groups WHERE id = ?', (group_id,))
+            return cursor.fetchone()
 
     def create_group(self, name: str) -> Dict:
         """Create a new group"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_connection() as conn:
             now = datetime.utcnow().isoformat()
-            cursor.execute('INSERT INTO groups (name, created_at, updated_at) VALUES (?, ?, ?)', (name, now, now))
-            group_id = cursor.lastrowid
+            (group,) = self._dict_cursor(conn).execute(
+                f'INSERT INTO groups (name, created_at, updated_at) VALUES (?, ?, ?) '
+                f'RETURNING {self.GROUP_COLUMNS}', (name, now, now)
+            ).fetchall()
+            version = self._table_version(conn, 'groups')
             conn.commit()
-            return self.get_group_by_id(group_id)
-        finally:
-            conn.close()
+        self._invalidate('groups', (), version, changes=1)
+        return group
 
     def update_group(self, group_id: int, name: str) -> Optional[Dict]:
         """Update an existing group"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_connection() as conn:
             now = datetime.utcnow().isoformat()
-            cursor.execute('UPDATE groups SET name = ?, updated_at = ? WHERE id = ?', (name, now, group_id))
-            if cursor.rowcount > 0:
-                conn.commit()
-                return self.get_group_by_id(group_id)
-            return None
-        finally:
-            conn.close()
+            rows = self._dict_cursor(conn).execute(
+                f'UPDATE groups SET name = ?, updated_at = ? WHERE id = ? '
+                f'RETURNING {self.GROUP_COLUMNS}', (name, now, group_id)
+            ).fetchall()
+            if not rows:
+                return None
+            version = self._table_version(conn, 'groups')
+            conn.commit()
+        self._invalidate('groups', (group_id,), version, changes=1)
+        return rows[0]
 
     def delete_group(self, group_id: int) -> bool:
         """Delete a group"""
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM groups WHERE id = ?', (group_id,))
             success = cursor.rowcount > 0
             if success:
+                version = self._table_version(conn, 'groups')
                 conn.commit()
+                self._invalidate('groups', (group_id,), version, changes=1)
             return success
-        finally:
-            conn.close()
+
+
+    def get_group_summaries(self, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
+        """Get a page of groups with word counts and review stats in one statement"""
+        offset = (page - 1) * per_page
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute('SELECT total_groups AS total FROM dashboard_stats WHERE id = 1')
+            total_count = cursor.fetchone()['total']
+            cursor.execute(self.GROUP_SUMMARY_SQL, (per_page, offset))
+            return cursor.fetchall(), total_count
+
+    def add_word_to_group(self, group_id: int, word_id: int) -> Optional[bool]:
+        """Add a word to a group: False if it is already there, None if the word does not exist"""
+        with self._get_connection() as conn:
+            if conn.execute('SELECT 1 FROM words WHERE id = ?', (word_id,)).fetchone() is None:
+                return None
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO group_words (group_id, word_id, created_at) VALUES (?, ?, ?)',
+                (group_id, word_id, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def get_group_words(self, group_id: int, page: int = 1, per_page: int = 10,
+                        sort_by: str = 'id', order: str = 'asc') -> Tuple[List[Dict], int]:
+        """Get a sorted page of the words in a group"""
+        sort_column = self.WORD_SORT_COLUMNS[sort_by]
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        offset = (page - 1) * per_page
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute('SELECT COUNT(*) AS total FROM group_words WHERE group_id = ?', (group_id,))
+            total_count = cursor.fetchone()['total']
+            
+            cursor.execute(f'''
+                SELECT w.id, w.kanji, w.romaji, w.english,
+                       replace(gw.created_at, ' ', 'T') AS added_at
+                FROM group_words gw
+                JOIN words w ON w.id = gw.word_id
+                WHERE gw.group_id = ?
+                ORDER BY {sort_column} {direction}, w.id {direction}
+                LIMIT ? OFFSET ?
+            ''', (group_id, per_page, offset))
+            return cursor.fetchall(), total_count
+
+    def iter_group_words(self, group_id: int, chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield every word of a group in id order, ``chunk_size`` rows at a time
+
+        Each chunk seeks past the last word id on its own borrowed connection,
+        so no connection or read transaction is held while the caller consumes it.
+        """
+        last_id = 0
+        while True:
+            with self._get_read_connection() as conn:
+                cursor = self._dict_cursor(conn)
+                cursor.execute('''
+                    SELECT w.id, w.kanji, w.romaji, w.english,
+                           replace(gw.created_at, ' ', 'T') AS added_at
+                    FROM group_words gw
+                    JOIN words w ON w.id = gw.word_id
+                    WHERE gw.group_id = ? AND gw.word_id > ?
+                    ORDER BY gw.word_id
+                    LIMIT ?
+                ''', (group_id, last_id, chunk_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield rows
+            if len(rows) < chunk_size:
+                return
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from .base_dao import BaseDAO
+
+# (kanji, romaji) identifies a word for deduplication
+WordKey = Tuple[str, str]
+
+class ImportDAO(BaseDAO):
+    # Stay well under SQLite's bound-parameter limit (two parameters per key)
+    LOOKUP_BATCH = 250
+
+    def _lookup_word_ids(self, conn, keys: Iterable[WordKey]) -> Dict[WordKey, Tuple[int, str]]:
+        """Map existing (kanji, romaji) keys to (id, english), lowest id first"""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), self.LOOKUP_BATCH):
+            chunk = keys[start:start + self.LOOKUP_BATCH]
+            values = ', '.join('(?, ?)' for _ in chunk)
+            params = [part for key in chunk for part in key]
+            # Join from the key list so each key is one index seek; a row-value
+            # IN (VALUES ...) makes SQLite scan the whole index instead
+            rows = conn.execute(f'''
+                SELECT w.id, w.kanji, w.romaji, w.english
+                FROM (VALUES {values}) AS k
+                CROSS JOIN words w ON w.kanji = k.column1 AND w.romaji = k.column2
+                ORDER BY w.id
+            ''', params)
+            for word_id, kanji, romaji, english in rows:
+                found.setdefault((kanji, romaji), (word_id, english))
+        return found
+
+    def get_group_ids(self, names: Iterable[str], create_missing: bool = False) -> Dict[str, int]:
+        """Map group names to IDs, optionally creating the groups that do not exist
+
+        Creating goes through a write transaction (see BaseDAO._write), so two
+        imports naming the same new group cannot both create it.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        if not create_missing:
+            with self._get_read_connection() as conn:
+                return self._lookup_group_ids(conn, names)
+
+        def create(conn):
+            group_ids = self._lookup_group_ids(conn, names)
+            now = datetime.utcnow().isoformat()
+            created = 0
+            for name in names:
+                if name not in group_ids:
+                    cursor = conn.execute(
+                        'INSERT INTO groups (name, created_at, updated_at) VALUES (?, ?, ?)', (name, now, now)
+                    )
+                    group_ids[name] = cursor.lastrowid
+                    created += 1
+            version = self._table_version(conn, 'groups') if created else None
+            return group_ids, created, version
+
+        group_ids, created, version = self._write(create)
+        if created:
+            self._invalidate('groups', (), version, changes=created)
+        return group_ids
+
+    @staticmethod
+    def _lookup_group_ids(conn, names: List[str]) -> Dict[str, int]:
+        """Map existing group names to IDs, lowest id first"""
+        placeholders = ', '.join('?' for _ in names)
+        group_ids = {}
+        for group_id, name in conn.execute(
+            f'SELECT id, name FROM groups WHERE name IN ({placeholders}) ORDER BY id', names
+        ):
+            group_ids.setdefault(name, group_id)
+        return group_ids
+
+    def import_words(self, words: List[Tuple[str, str, str, List[int]]], on_conflict: str = 'skip') -> Dict:
+        """Insert or update a chunk of words and their group links in one transaction
+
+        ``words`` holds (kanji, romaji, english, group_ids) tuples with unique
+        (kanji, romaji) keys. A key that already exists is left alone with
+        ``on_conflict='skip'``, gets the new english with ``'update'``, and is
+        reported back in ``conflicts`` with ``'error'``. The lookup runs in
+        the same write transaction as the inserts, so concurrent imports of a
+        key cannot both insert it.
+        """
+        now = datetime.utcnow().isoformat()
+
+        def write(conn):
+            existing = self._lookup_word_ids(conn, ((kanji, romaji) for kanji, romaji, _, _ in words))
+
+            new_rows = [(kanji, romaji, english, now, now)
+                        for kanji, romaji, english, _ in words if (kanji, romaji) not in existing]
+            conn.executemany('''
+                INSERT INTO words (kanji, romaji, english, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', new_rows)
+
+            updates = []
+            conflicts = []
+            for kanji, romaji, english, _ in words:
+                match = existing.get((kanji, romaji))
+                if match is None:
+                    continue
+                if on_conflict == 'update' and match[1] != english:
+                    updates.append((english, now, match[0]))
+                elif on_conflict == 'error':
+                    conflicts.append((kanji, romaji))
+            conn.executemany('UPDATE words SET english = ?, updated_at = ? WHERE id = ?', updates)
+
+            links = []
+            if any(group_ids for _, _, _, group_ids in words):
+                # Existing words join the listed groups too, unless the row was rejected as a conflict
+                if new_rows:
+                    existing.update(self._lookup_word_ids(conn, ((kanji, romaji) for kanji, romaji, _, _, _ in new_rows)))
+                conflict_keys = set(conflicts)
+                for kanji, romaji, _, group_ids in words:
+                    if (kanji, romaji) in conflict_keys:
+                        continue
+                    word_id = existing[(kanji, romaji)][0]
+                    links.extend((group_id, word_id, now) for group_id in group_ids)
+            cursor = conn.executemany(
+                'INSERT OR IGNORE INTO group_words (group_id, word_id, created_at) VALUES (?, ?, ?)', links
+            )
+            linked = cursor.rowcount if links else 0
+            return new_rows, updates, conflicts, linked, self._table_version(conn, 'words')
+
+        new_rows, updates, conflicts, linked, version = self._write(write)
+        self._invalidate('words', [word_id for _, _, word_id in updates], version,
+                         changes=len(new_rows) + len(updates))
+        return {
+            'inserted': len(new_rows),
+            'updated': len(updates),
+            'unchanged': len(words) - len(new_rows) - len(updates) - len(conflicts),
+            'group_links': linked,
+            'conflicts': conflicts,
+        }
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..utils.scheduler import ScheduleState, format_timestamp, parse_timestamp, review
+from .base_dao import BaseDAO
+
+class ScheduleDAO(BaseDAO):
+    STATE_COLUMNS = 'ease, interval_days, repetitions, lapses, due_at, last_reviewed_at'
+
+    # Next words of a group to study; served by a range scan of idx_word_schedules_due
+    DUE_WORDS_SQL = '''
+        SELECT w.id, w.kanji, w.romaji, w.english,
+               replace(ws.due_at, ' ', 'T') AS due_at,
+               replace(ws.last_reviewed_at, ' ', 'T') AS last_reviewed_at,
+               ws.interval_days, ws.ease, ws.repetitions, ws.lapses
+        FROM word_schedules ws
+        JOIN words w ON w.id = ws.word_id
+        WHERE ws.group_id = ? AND ws.due_at <= ?
+        ORDER BY ws.due_at, ws.word_id
+        LIMIT ?
+    '''
+
+    @staticmethod
+    def _state_from_row(row) -> ScheduleState:
+        ease, interval_days, repetitions, lapses, due_at, last_reviewed_at = row
+        return ScheduleState(
+            ease=ease,
+            interval_days=interval_days,
+            repetitions=repetitions,
+            lapses=lapses,
+            due_at=parse_timestamp(due_at) if due_at else None,
+            last_reviewed_at=parse_timestamp(last_reviewed_at) if last_reviewed_at else None
+        )
+
+    @staticmethod
+    def _state_params(state: ScheduleState) -> Tuple:
+        return (state.ease, state.interval_days, state.repetitions, state.lapses,
+                format_timestamp(state.due_at),
+                format_timestamp(state.last_reviewed_at) if state.last_reviewed_at else None)
+
+    def _save_states(self, conn, states: Dict[Tuple[int, int], ScheduleState]):
+        conn.executemany('''
+            UPDATE word_schedules
+            SET ease = ?, interval_days = ?, repetitions = ?, lapses = ?, due_at = ?, last_reviewed_at = ?
+            WHERE group_id = ? AND word_id = ?
+        ''', [self._state_params(state) + key for key, state in states.items()])
+
+    def apply_reviews(self, session_id: int, reviews: Iterable[Tuple[int, bool]], reviewed_at: datetime) -> int:
+        """Advance the schedules of the session's group by a batch of (word_id, correct) reviews
+
+        Runs on the caller's connection and does not commit, so it belongs to
+        the transaction that records the reviews. Words that are not in the
+        group have no schedule and are ignored. Returns the schedules updated.
+        """
+        reviews = list(reviews)
+        with self._get_connection() as conn:
+            row = conn.execute('SELECT group_id FROM study_sessions WHERE id = ?', (session_id,)).fetchone()
+            if row is None or not reviews:
+                return 0
+            group_id = row[0]
+            word_ids = list(dict.fromkeys(word_id for word_id, _ in reviews))
+            states = {}
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(word_ids), 500):
+                chunk = word_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                for word_id, *state in conn.execute(f'''
+                    SELECT word_id, {self.STATE_COLUMNS}
+                    FROM word_schedules
+                    WHERE group_id = ? AND word_id IN ({placeholders})
+                ''', [group_id] + chunk):
+                    states[(group_id, word_id)] = self._state_from_row(state)
+            for word_id, correct in reviews:
+                key = (group_id, word_id)
+                if key in states:
+                    states[key] = review(states[key], bool(correct), reviewed_at)
+            self._save_states(conn, states)
+            return len(states)
+
+    def get_due_words(self, group_id: int, limit: int = 20, as_of: Optional[datetime] = None) -> List[Dict]:
+        """Get the group's words that are due at ``as_of`` (default now), most overdue first"""
+        as_of = as_of or datetime.utcnow()
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(self.DUE_WORDS_SQL, (group_id, format_timestamp(as_of), limit))
+            return cursor.fetchall()
+
+    def rebuild_schedules(self) -> Dict:
+        """Recompute every schedule by replaying study_reviews in the order they were recorded"""
+        with self._get_connection() as conn:
+            conn.execute('DELETE FROM word_schedules')
+            conn.execute('''
+                INSERT INTO word_schedules (group_id, word_id, due_at)
+                SELECT group_id, word_id, datetime(COALESCE(created_at, 'now'))
+                FROM group_words
+            ''')
+            scheduled = {(group_id, word_id) for group_id, word_id in
+                         conn.execute('SELECT group_id, word_id FROM word_schedules')}
+
+            states = {}
+            replayed = 0
+            rows = conn.execute('''
+                SELECT s.group_id, r.word_id, r.correct, r.created_at
+                FROM study_reviews r
+                JOIN study_sessions s ON s.id = r.study_session_id
+                ORDER BY r.id
+            ''')
+            for group_id, word_id, correct, created_at in rows:
+                key = (group_id, word_id)
+                if key not in scheduled:
+                    continue
+                reviewed_at = parse_timestamp(created_at) if created_at else datetime.utcnow()
+                states[key] = review(states.get(key) or ScheduleState(), bool(correct), reviewed_at)
+                replayed += 1
+
+            self._save_states(conn, states)
+            conn.commit()
+            return {'schedules': len(scheduled), 'reviews_replayed': replayed, 'schedules_reviewed': len(states)}
@@ -0,0 +1,40 @@
+from typing import Dict, List, Tuple
+from .base_dao import BaseDAO
+
+# Tables whose rows make up the vocabulary snapshot
+SNAPSHOT_TABLES = ('words', 'groups', 'group_words')
+
+class SnapshotDAO(BaseDAO):
+    def get_source_versions(self) -> Dict[str, int]:
+        """Get the change counters of the tables the snapshot is built from"""
+        with self._get_read_connection() as conn:
+            placeholders = ', '.join('?' for _ in SNAPSHOT_TABLES)
+            return dict(conn.execute(
+                f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+                SNAPSHOT_TABLES
+            ))
+
+    def read_vocabulary(self) -> Tuple[Dict[str, int], List[tuple], List[tuple], List[tuple]]:
+        """Read every word, group and group membership as of one point in time
+
+        Returns (source versions, (id, kanji, romaji, english) rows,
+        (id, name) rows, (group_id, word_id) rows), each in id order. The
+        reads share one transaction so they agree with each other and with
+        the versions.
+        """
+        with self._get_read_connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                placeholders = ', '.join('?' for _ in SNAPSHOT_TABLES)
+                versions = dict(conn.execute(
+                    f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+                    SNAPSHOT_TABLES
+                ))
+                words = conn.execute('SELECT id, kanji, romaji, english FROM words ORDER BY id').fetchall()
+                groups = conn.execute('SELECT id, name FROM groups ORDER BY id').fetchall()
+                members = conn.execute(
+                    'SELECT group_id, word_id FROM group_words ORDER BY group_id, word_id'
+                ).fetchall()
+            finally:
+                conn.rollback()
+            return versions, words, groups, members
@@ -1,103 +1,103 @@
-import sqlite3
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from ..models.study_activity import StudyActivity
 from ..models.study_session import StudySession, StudyReview
+from .base_dao import BaseDAO
 
-class StudyActivityDAO:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-
+class StudyActivityDAO(BaseDAO):
     def create_activity(self, activity: StudyActivity) -> bool:
         """Create a new study activity in the database."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)',
                            (activity.name, activity.url))
+            version = self._table_version(conn, 'study_activities')
             conn.commit()
+            self._invalidate('study_activities', (), version, changes=cursor.rowcount)
             return cursor.rowcount > 0
-        finally:
-            conn.close()
 
     def get_activity_by_id(self, activity_id: int) -> StudyActivity:
-        """Retrieve a study activity by its ID."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        """Retrieve a study activity by its ID, from the entity cache when it is there."""
+        row = self._cached('study_activities', activity_id, lambda: self._fetch_activity(activity_id))
+        if row:
+            return StudyActivity(**row)
+        return None
+
+    def _fetch_activity(self, activity_id: int) -> Optional[Dict]:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT name, url FROM study_activities WHERE id = ?', (activity_id,))
             row = cursor.fetchone()
             if row:
-                return StudyActivity(name=row[0], url=row[1])
+                return {'name': row[0], 'url': row[1]}
             return None
-        finally:
-            conn.close()
 
     def update_activity(self, activity_id: int, activity: StudyActivity) -> bool:
         """Update an existing study activity."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('UPDATE study_activities SET name = ?, url = ? WHERE id = ?',
                            (activity.name, activity.url, activity_id))
+            version = self._table_version(conn, 'study_activities')
             conn.commit()
+            self._invalidate('study_activities', (activity_id,), version, changes=cursor.rowcount)
             return cursor.rowcount > 0
-        finally:
-            conn.close()
 
     def delete_activity(self, activity_id: int) -> bool:
         """Delete a study activity by its ID."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM study_activities WHERE id = ?', (activity_id,))
+            version = self._table_version(conn, 'study_activities')
             conn.commit()
+            self._invalidate('study_activities', (activity_id,), version, changes=cursor.rowcount)
             return cursor.rowcount > 0
-        finally:
-            conn.close()
 
     def get_all_activities(self, page: int = 1, per_page: int = 10) -> List[StudyActivity]:
         """Retrieve a paginated list of study activities."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             offset = (page - 1) * per_page
-            cursor.execute('SELECT name, url,id FROM study_activities LIMIT ? OFFSET ?', (per_page, offset))
+            cursor.execute('SELECT name, url,id FROM study_activities ORDER BY id LIMIT ? OFFSET ?', (per_page, offset))
             rows = cursor.fetchall()
             return [StudyActivity(name=row[0], url=row[1], id=row[2]) for row in rows]
-        finally:
-            conn.close()
 
     def get_study_activities(self, page: int = 1, per_page: int = 10) -> List[StudyActivity]:
         """Get paginated list of study activities."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             offset = (page - 1) * per_page
-            cursor.execute('SELECT name, url, id FROM study_activities LIMIT ? OFFSET ?', (per_page, offset))
+            cursor.execute('SELECT name, url, id FROM study_activities ORDER BY id LIMIT ? OFFSET ?', (per_page, offset))
             rows = cursor.fetchall()
             return [StudyActivity(name=row[0], url=row[1], id=row[2]) for row in rows]
-        finally:
-            conn.close()
+
+    def get_study_activities_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                                   include_total: bool = False) -> Tuple[List[StudyActivity], Optional[int], Optional[Tuple]]:
+        """Get the page of study activities following a (sort_key, id) cursor key."""
+        where, params = self._keyset_clause('id', after)
+        with self._get_read_connection() as conn:
+            cursor = conn.cursor()
+            total_count = None
+            if include_total:
+                cursor.execute('SELECT COUNT(*) FROM study_activities')
+                total_count = cursor.fetchone()[0]
+            cursor.execute(f'SELECT id, name, url FROM study_activities {where} ORDER BY id LIMIT ?',
+                           params + (per_page + 1,))
+            rows, next_key = self._split_page(cursor.fetchall(), per_page)
+            return [StudyActivity(name=row[1], url=row[2], id=row[0]) for row in rows], total_count, next_key
 
     def add_study_session(self, study_activity_id: int, group_id: int) -> bool:
         """Add a study session associated with a study activity."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('INSERT INTO study_sessions (study_activity_id, group_id) VALUES (?, ?)',
                            (study_activity_id, group_id))
             conn.commit()
             return cursor.rowcount > 0
-        finally:
-            conn.close()
 
     def get_study_sessions(self, id: int) -> List[StudySession]:
         """Retrieve all study sessions for a specific study activity."""
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM study_sessions WHERE id = ?', (id,))
             rows = cursor.fetchall()
             return [StudySession(id=row[0], group_id=row[1], study_activity_id=row[2]) for row in rows]
-        finally:
-            conn.close()
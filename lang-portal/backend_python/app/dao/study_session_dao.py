@@ -1,171 +1,239 @@
 import sqlite3
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from ..models.study_session import StudySession, StudyReview
-from ..models.word import Word
+from .base_dao import BaseDAO, iso_timestamp
+from .schedule_dao import ScheduleDAO
 
-class StudySessionDAO:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-
-    def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+class StudySessionDAO(BaseDAO):
+    # Columns of a session as served by the API; matches StudySession.to_dict()
+    SESSION_COLUMNS = (
+        f"id, group_id, study_activity_id, {iso_timestamp('start_time')}, {iso_timestamp('end_time')}, "
+        f"{iso_timestamp('created_at')}, NULL AS updated_at, NULL AS reviews"
+    )
 
     def get_study_sessions(self, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
         """Get paginated list of study sessions"""
         offset = (page - 1) * per_page
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
             
             # Get total count
-            cursor.execute('SELECT COUNT(*) FROM study_sessions')
-            total_count = cursor.fetchone()[0]
+            cursor.execute('SELECT total_sessions FROM dashboard_stats WHERE id = 1')
+            total_count = cursor.fetchone()['total_sessions']
             
-            # Get paginated sessions
-            cursor.execute('''
-                SELECT id, group_id, study_activity_id, start_time, end_time, created_at
+            # Get paginated sessions straight from the cursor as dicts; page mode
+            # keeps its id order, only cursors seek on (start_time, id)
+            cursor.execute(f'''
+                SELECT {self.SESSION_COLUMNS}
                 FROM study_sessions 
                 ORDER BY id 
                 LIMIT ? OFFSET ?
             ''', (per_page, offset))
             
-            sessions = [
-                StudySession(
-                    id=row[0],
-                    group_id=row[1],
-                    study_activity_id=row[2],
-                    start_time=datetime.fromisoformat(row[3]) if row[3] else None,
-                    end_time=datetime.fromisoformat(row[4]) if row[4] else None,
-                    created_at=datetime.fromisoformat(row[5]) if row[5] else None
-                ).to_dict()
-                for row in cursor.fetchall()
-            ]
+            return cursor.fetchall(), total_count
+
+    def get_study_sessions_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                                 include_total: bool = False) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of study sessions following a (start_time, id) cursor key"""
+        where, params = self._keyset_clause('start_time', after)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
             
-            return sessions, total_count
+            total_count = None
+            if include_total:
+                cursor.execute('SELECT total_sessions FROM dashboard_stats WHERE id = 1')
+                total_count = cursor.fetchone()['total_sessions']
             
-        finally:
-            conn.close()
-
-    def get_study_session_by_id(self, session_id: int, include_reviews: bool = False) -> Optional[Dict]:
-        """Get a study session by its ID"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, group_id, study_activity_id, start_time, end_time, created_at
+            # The raw start_time is the seek key; the served one is ISO formatted
+            cursor.execute(f'''
+                SELECT {self.SESSION_COLUMNS}, start_time AS seek_key
                 FROM study_sessions 
-                WHERE id = ?
-            ''', (session_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                session = StudySession(
-                    id=row[0],
-                    group_id=row[1],
-                    study_activity_id=row[2],
-                    start_time=datetime.fromisoformat(row[3]) if row[3] else None,
-                    end_time=datetime.fromisoformat(row[4]) if row[4] else None,
-                    created_at=datetime.fromisoformat(row[5]) if row[5] else None
-                )
-                
-                if include_reviews:
-                    cursor.execute('''
-                        SELECT sr.id, sr.word_id, sr.correct, sr.created_at,
-                               w.kanji, w.romaji, w.english, w.created_at, w.updated_at
-                        FROM study_reviews sr
-                        JOIN words w ON sr.word_id = w.id
-                        WHERE sr.study_session_id = ?
-                    ''', (session_id,))
-                    
-                    session.reviews = [
-                        StudyReview(
-                            id=row[0],
-                            study_session_id=session_id,
-                            word_id=row[1],
-                            correct=bool(row[2]),
-                            created_at=datetime.fromisoformat(row[3]) if row[3] else None,
-                            word=Word(
-                                id=row[1],
-                                kanji=row[4],
-                                romaji=row[5],
-                                english=row[6],
-                                created_at=datetime.fromisoformat(row[7]) if row[7] else None,
-                                updated_at=datetime.fromisoformat(row[8]) if row[8] else None
-                            )
-                        )
-                        for row in cursor.fetchall()
-                    ]
-                
-                return session.to_dict()
-            return None
+                {where}
+                ORDER BY study_sessions.start_time, id 
+                LIMIT ?
+            ''', params + (per_page + 1,))
+            sessions, next_key = self._split_page(cursor.fetchall(), per_page, 'seek_key', 'id')
+            for session in sessions:
+                del session['seek_key']
             
-        finally:
-            conn.close()
+            return sessions, total_count, next_key
+
+    def get_study_session_by_id(self, session_id: int, include_reviews: bool = False) -> Optional[Dict]:
+        """Get a study session by its ID, with its reviews and their words if asked for"""
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'SELECT {self.SESSION_COLUMNS} FROM study_sessions WHERE id = ?', (session_id,))
+            session = cursor.fetchone()
+            if session and include_reviews:
+                cursor = self._dict_cursor(conn)
+                cursor.execute(f'''
+                    SELECT sr.id, {iso_timestamp('created_at', 'sr')}, NULL AS updated_at,
+                           sr.study_session_id, sr.word_id, sr.correct = 1 AS correct,
+                           w.kanji, w.romaji, w.english,
+                           replace(w.created_at, ' ', 'T') AS word_created_at,
+                           replace(w.updated_at, ' ', 'T') AS word_updated_at
+                    FROM study_reviews sr
+                    JOIN words w ON sr.word_id = w.id
+                    WHERE sr.study_session_id = ?
+                ''', (session_id,))
+                session['reviews'] = [self._review_with_word(review) for review in cursor.fetchall()]
+            return session
+
+    @staticmethod
+    def _review_with_word(review: Dict) -> Dict:
+        """Move the joined word columns of a review row into its nested ``word``"""
+        review['correct'] = bool(review['correct'])
+        review['word'] = {
+            'id': review['word_id'],
+            'kanji': review.pop('kanji'),
+            'romaji': review.pop('romaji'),
+            'english': review.pop('english'),
+            'created_at': review.pop('word_created_at'),
+            'updated_at': review.pop('word_updated_at'),
+        }
+        return review
 
     def create_study_session(self, group_id: int, study_activity_id: int) -> Dict:
         """Create a new study session"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        def insert(conn):
             now = datetime.utcnow().isoformat()
-            cursor.execute('''
+            cursor = conn.execute('''
                 INSERT INTO study_sessions (group_id, study_activity_id, start_time, created_at)
                 VALUES (?, ?, ?, ?)
             ''', (group_id, study_activity_id, now, now))
-            
-            session_id = cursor.lastrowid
-            conn.commit()
-            
-            return self.get_study_session_by_id(session_id)
-            
-        finally:
-            conn.close()
+            return cursor.lastrowid
+
+        return self.get_study_session_by_id(self._write(insert))
 
     def end_study_session(self, session_id: int) -> Optional[Dict]:
         """End a study session"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            now = datetime.utcnow().isoformat()
-            cursor.execute('''
+        def update(conn):
+            cursor = conn.execute('''
                 UPDATE study_sessions 
                 SET end_time = ?
                 WHERE id = ?
-            ''', (now, session_id))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                return self.get_study_session_by_id(session_id)
-            return None
-            
-        finally:
-            conn.close()
+            ''', (datetime.utcnow().isoformat(), session_id))
+            return cursor.rowcount > 0
+
+        if self._write(update):
+            return self.get_study_session_by_id(session_id)
+        return None
 
     def add_review(self, session_id: int, word_id: int, correct: bool) -> Optional[Dict]:
         """Add a word review to a study session"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            now = datetime.utcnow().isoformat()
-            cursor.execute('''
+        def insert(conn):
+            reviewed_at = datetime.utcnow()
+            conn.execute('''
                 INSERT INTO study_reviews (study_session_id, word_id, correct, created_at)
                 VALUES (?, ?, ?, ?)
-            ''', (session_id, word_id, correct, now))
-            
-            review_id = cursor.lastrowid
-            conn.commit()
-            
-            # Return updated session with reviews
-            return self.get_study_session_by_id(session_id, include_reviews=True)
-            
-        finally:
-            conn.close()
+            ''', (session_id, word_id, correct, reviewed_at.isoformat()))
+            ScheduleDAO(self.db_path).apply_reviews(session_id, [(word_id, correct)], reviewed_at)
+
+        self._write(insert)
+        # Return updated session with reviews
+        return self.get_study_session_by_id(session_id, include_reviews=True)
+
+    def add_reviews(self, session_id: int, reviews: List[Tuple[int, bool]],
+                    idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        """Insert a batch of (word_id, correct) reviews in one transaction
+
+        Returns a summary with the inserted and correct counts and the new session
+        accuracy. A repeated idempotency key replays the stored summary instead.
+        Returns None when the writer acknowledges the batch before committing it.
+        """
+        try:
+            return self._write(lambda conn: self._insert_reviews(conn, session_id, reviews, idempotency_key),
+                               deferrable=True)
+        except sqlite3.IntegrityError:
+            # A concurrent retry committed the same batch first
+            if idempotency_key:
+                with self._get_read_connection() as conn:
+                    replay = self._get_review_batch(conn.cursor(), session_id, idempotency_key)
+                if replay:
+                    return replay
+            raise
+
+    def _insert_reviews(self, conn: sqlite3.Connection, session_id: int, reviews: List[Tuple[int, bool]],
+                        idempotency_key: Optional[str]) -> Dict:
+        cursor = conn.cursor()
+        if idempotency_key:
+            replay = self._get_review_batch(cursor, session_id, idempotency_key)
+            if replay:
+                return replay
+
+        reviewed_at = datetime.utcnow()
+        now = reviewed_at.isoformat()
+        cursor.executemany('''
+            INSERT INTO study_reviews (study_session_id, word_id, correct, created_at)
+            VALUES (?, ?, ?, ?)
+        ''', [(session_id, word_id, bool(correct), now) for word_id, correct in reviews])
+        # Same transaction: the schedules move only if the reviews commit
+        ScheduleDAO(self.db_path).apply_reviews(session_id, reviews, reviewed_at)
+
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(CASE WHEN correct THEN 1 ELSE 0 END), 0)
+            FROM study_reviews
+            WHERE study_session_id = ?
+        ''', (session_id,))
+        total_reviews, correct_reviews = cursor.fetchone()
+        summary = {
+            'session_id': session_id,
+            'reviews_recorded': len(reviews),
+            'correct_count': sum(1 for _, correct in reviews if correct),
+            'session_accuracy': (correct_reviews / total_reviews * 100) if total_reviews > 0 else 0,
+            'replayed': False
+        }
+
+        if idempotency_key:
+            cursor.execute('''
+                INSERT INTO review_batches (study_session_id, idempotency_key, reviews_recorded,
+                                            correct_count, session_accuracy, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (session_id, idempotency_key, summary['reviews_recorded'],
+                  summary['correct_count'], summary['session_accuracy'], now))
+        return summary
+
+    @staticmethod
+    def _get_review_batch(cursor, session_id: int, idempotency_key: str) -> Optional[Dict]:
+        cursor.execute('''
+            SELECT reviews_recorded, correct_count, session_accuracy
+            FROM review_batches
+            WHERE study_session_id = ? AND idempotency_key = ?
+        ''', (session_id, idempotency_key))
+        row = cursor.fetchone()
+        if row:
+            return {
+                'session_id': session_id,
+                'reviews_recorded': row[0],
+                'correct_count': row[1],
+                'session_accuracy': row[2],
+                'replayed': True
+            }
+        return None
+
+    def session_exists(self, session_id: int) -> bool:
+        """Check whether a study session exists"""
+        with self._get_read_connection() as conn:
+            row = conn.execute('SELECT 1 FROM study_sessions WHERE id = ?', (session_id,)).fetchone()
+            return row is not None
+
+    def get_missing_word_ids(self, word_ids: List[int]) -> List[int]:
+        """Return the given word IDs that do not exist"""
+        unique_ids = list(dict.fromkeys(word_ids))
+        found = set()
+        with self._get_read_connection() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique_ids), 500):
+                chunk = unique_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                found.update(row[0] for row in conn.execute(
+                    f'SELECT id FROM words WHERE id IN ({placeholders})', chunk
+                ))
+        return [word_id for word_id in unique_ids if word_id not in found]
 
     def get_session_stats(self, session_id: int) -> Optional[Dict]:
         """Get statistics for a study session"""
-        conn = self._get_connection()
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
@@ -185,78 +253,80 @@ class StudySessionDAO:
                     'accuracy': (correct_reviews / total_reviews * 100) if total_reviews > 0 else 0
                 }
             return None
-            
-        finally:
-            conn.close()
 
     def get_study_progress(self) -> Dict:
         """Get overall study progress"""
-        conn = self._get_connection()
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
-            # Get total words
-            cursor.execute('SELECT COUNT(*) FROM words')
-            total_words = cursor.fetchone()[0]
-            
-            # Get studied words (words that have been reviewed at least once)
-            cursor.execute('''
-                SELECT COUNT(DISTINCT word_id) 
-                FROM study_reviews
-            ''')
-            studied_words = cursor.fetchone()[0]
+            # Totals are maintained by triggers on words and study_reviews
+            cursor.execute('SELECT total_words, studied_words FROM dashboard_stats WHERE id = 1')
+            total_words, studied_words = cursor.fetchone() or (0, 0)
             
             return {
                 'total_words': total_words,
                 'studied_words': studied_words,
                 'progress_percentage': (studied_words / total_words * 100) if total_words > 0 else 0
             }
-            
-        finally:
-            conn.close()
 
     def get_quick_stats(self) -> Dict:
         """Get quick overview statistics"""
-        conn = self._get_connection()
-        try:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
-            # Get success rate
+            # Totals are maintained by triggers on groups, study_sessions and study_reviews
             cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_reviews,
-                    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) as correct_reviews
-                FROM study_reviews
+                SELECT total_reviews, correct_reviews, total_groups, total_sessions
+                FROM dashboard_stats
+                WHERE id = 1
             ''')
-            row = cursor.fetchone()
-            total_reviews = row[0]
-            correct_reviews = row[1] or 0
+            total_reviews, correct_reviews, active_groups, total_sessions = cursor.fetchone() or (0, 0, 0, 0)
             success_rate = (correct_reviews / total_reviews * 100) if total_reviews > 0 else 0
             
-            # Get active groups count
-            cursor.execute('SELECT COUNT(*) FROM groups')
-            active_groups = cursor.fetchone()[0]
-            
-            # Get total sessions
-            cursor.execute('SELECT COUNT(*) FROM study_sessions')
-            total_sessions = cursor.fetchone()[0]
-            
             return {
                 'success_rate': success_rate,
                 'active_groups': active_groups,
                 'total_sessions': total_sessions
             }
-            
-        finally:
-            conn.close()
 
-    def get_all_study_sessions(self) -> List[StudySession]:
-        """Retrieve all study sessions."""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM study_sessions')
-            rows = cursor.fetchall()
-            return [StudySession(id=row[0], group_id=row[1], study_activity_id=row[2], start_time=row[3]) for row in rows]
-        finally:
-            conn.close()
\ No newline at end of file
+    def iter_study_sessions(self, chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield every study session in start time order, ``chunk_size`` rows at a time
+
+        Each chunk is a keyset query on its own borrowed connection, so no
+        connection or read transaction is held while the caller consumes it.
+        """
+        after = None
+        while True:
+            rows, _, after = self.get_study_sessions_after(after, chunk_size)
+            if rows:
+                yield rows
+            if after is None:
+                return
+
+    def iter_session_reviews(self, session_id: int, chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield the reviews of a session with their words, in the order they were recorded
+
+        Chunks are read like iter_study_sessions, seeking past the last review id.
+        """
+        last_id = 0
+        while True:
+            with self._get_read_connection() as conn:
+                cursor = self._dict_cursor(conn)
+                cursor.execute(f'''
+                    SELECT r.id, r.word_id, w.kanji, w.romaji, w.english,
+                           r.correct = 1 AS correct, {iso_timestamp('created_at', 'r')}
+                    FROM study_reviews r
+                    JOIN words w ON w.id = r.word_id
+                    WHERE r.study_session_id = ? AND r.id > ?
+                    ORDER BY r.id
+                    LIMIT ?
+                ''', (session_id, last_id, chunk_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                row['correct'] = bool(row['correct'])
+            last_id = rows[-1]['id']
+            yield rows
+            if len(rows) < chunk_size:
+                return
@@ -0,0 +1,14 @@
+from typing import Dict, Iterable
+from .base_dao import BaseDAO
+
+class VersionDAO(BaseDAO):
+    def get_versions(self, tables: Iterable[str]) -> Dict[str, int]:
+        """Get the change counters of the given tables"""
+        tables = list(tables)
+        with self._get_read_connection() as conn:
+            placeholders = ', '.join('?' for _ in tables)
+            cursor = conn.execute(
+                f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+                tables
+            )
+            return dict(cursor.fetchall())
@@ -1,151 +1,380 @@
-import sqlite3
+import re
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-from ..models.word import Word
+from .base_dao import BaseDAO, iso_timestamp
 
-class WordDAO:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
+WORD_STATS_COLUMNS = ('reviews', 'correct', 'wrong', 'streak', 'last_reviewed_at', 'accuracy')
 
-    def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+# Recomputes word_stats rows from study_reviews. wrong_since counts the wrong
+# answers from a review to the word's latest one, so the streak is the number
+# of reviews where it is still 0.
+RECOMPUTE_WORD_STATS_SQL = '''
+    WITH ordered AS (
+        SELECT word_id, correct, created_at,
+               SUM(correct = 0) OVER (
+                   PARTITION BY word_id ORDER BY created_at DESC, id DESC ROWS UNBOUNDED PRECEDING
+               ) AS wrong_since
+        FROM study_reviews
+    )
+    SELECT word_id, COUNT(*), SUM(correct != 0), SUM(correct = 0), SUM(wrong_since = 0), MAX(created_at),
+           CAST(SUM(correct != 0) AS REAL) / COUNT(*)
+    FROM ordered
+    GROUP BY word_id
+    ORDER BY word_id
+'''
+
+class WordDAO(BaseDAO):
+    # Columns of a word as served by the API, timestamps already ISO formatted
+    WORD_COLUMNS = f"id, kanji, romaji, english, {iso_timestamp('created_at')}, {iso_timestamp('updated_at')}"
+    # The same columns qualified, for queries joining words_fts (which also has kanji/romaji/english)
+    QUALIFIED_WORD_COLUMNS = (f"words.id, words.kanji, words.romaji, words.english, "
+                              f"{iso_timestamp('created_at', 'words')}, {iso_timestamp('updated_at', 'words')}")
+    # Kana and kanji, which unicode61 does not split into words; queries made
+    # of such terms search kanji substrings through words_kanji_fts instead
+    CJK_PATTERN = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+    # Shortest term the trigram index can look up
+    TRIGRAM_LENGTH = 3
+    # Ranking costs a bm25 evaluation per match; broader queries (one-letter
+    # prefixes on a large vocabulary) are returned in id order instead
+    SEARCH_RANK_LIMIT = 5000
+    # Sort options of the reviewed-word list, mapped to word_stats columns;
+    # each stats column has a covering index led by it, then word_id
+    STATS_SORT_COLUMNS = {
+        'id': 'ws.word_id',
+        'accuracy': 'ws.accuracy',
+        'last_reviewed': 'ws.last_reviewed_at',
+        'reviews': 'ws.reviews',
+    }
 
     def get_words(self, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
         """Get paginated list of words"""
         offset = (page - 1) * per_page
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
             
             # Get total count
-            cursor.execute('SELECT COUNT(*) FROM words')
-            total_count = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) AS total FROM words')
+            total_count = cursor.fetchone()['total']
             
-            # Get paginated words
-            cursor.execute('''
-                SELECT id, kanji, romaji, english, created_at, updated_at
+            # Get paginated words straight from the cursor as dicts
+            cursor.execute(f'''
+                SELECT {self.WORD_COLUMNS}
                 FROM words 
                 ORDER BY id 
                 LIMIT ? OFFSET ?
             ''', (per_page, offset))
             
-            words = [
-                Word(
-                    id=row[0],
-                    kanji=row[1],
-                    romaji=row[2],
-                    english=row[3],
-                    created_at=datetime.fromisoformat(row[4]) if row[4] else None,
-                    updated_at=datetime.fromisoformat(row[5]) if row[5] else None
-                ).to_dict()
-                for row in cursor.fetchall()
-            ]
+            return cursor.fetchall(), total_count
+
+    def get_words_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                        include_total: bool = False) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of words following a (sort_key, id) cursor key"""
+        where, params = self._keyset_clause('id', after)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
             
-            return words, total_count
+            total_count = None
+            if include_total:
+                cursor.execute('SELECT COUNT(*) AS total FROM words')
+                total_count = cursor.fetchone()['total']
             
-        finally:
-            conn.close()
-
-    def get_word_by_id(self, word_id: int) -> Optional[Dict]:
-        """Get a word by its ID"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, kanji, romaji, english, created_at, updated_at
+            cursor.execute(f'''
+                SELECT {self.WORD_COLUMNS}
                 FROM words 
-                WHERE id = ?
-            ''', (word_id,))
+                {where}
+                ORDER BY id 
+                LIMIT ?
+            ''', params + (per_page + 1,))
+            words, next_key = self._split_page(cursor.fetchall(), per_page, 'id', 'id')
             
-            row = cursor.fetchone()
-            if row:
-                return Word(
-                    id=row[0],
-                    kanji=row[1],
-                    romaji=row[2],
-                    english=row[3],
-                    created_at=datetime.fromisoformat(row[4]) if row[4] else None,
-                    updated_at=datetime.fromisoformat(row[5]) if row[5] else None
-                ).to_dict()
+            return words, total_count, next_key
+
+    @classmethod
+    def _reviewed_words_query(cls, sort: str, order: str, min_reviews: int,
+                              after: Optional[Tuple] = None) -> Tuple[str, list]:
+        """SQL and parameters listing reviewed words in sort order, from word_stats
+
+        The page of word ids is picked from the covering index on the sort
+        column (which carries reviews for the filter); only those words are
+        then looked up. The LIMIT and OFFSET parameters are left for the caller.
+        """
+        sort_column = cls.STATS_SORT_COLUMNS[sort]
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        clauses, params = ['ws.reviews >= ?'], [min_reviews]
+        if after is not None:
+            comparison = '<' if order == 'desc' else '>'
+            if sort == 'id':
+                clauses.append(f'ws.word_id {comparison} ?')
+                params.append(after[1])
+            else:
+                clauses.append(f'({sort_column}, ws.word_id) {comparison} (?, ?)')
+                params.extend(after)
+        sql = f'''
+            SELECT {cls.QUALIFIED_WORD_COLUMNS},
+                   ws.reviews, ws.correct, ws.wrong, ws.streak, ws.accuracy,
+                   {iso_timestamp('last_reviewed_at', 'ws')},
+                   page.sort_key
+            FROM (
+                SELECT ws.word_id, {sort_column} AS sort_key
+                FROM word_stats ws
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {sort_column} {direction}, ws.word_id {direction}
+                LIMIT ? OFFSET ?
+            ) AS page
+            JOIN word_stats ws ON ws.word_id = page.word_id
+            JOIN words ON words.id = page.word_id
+            ORDER BY page.sort_key {direction}, page.word_id {direction}
+        '''
+        return sql, params
+
+    @staticmethod
+    def _with_stats(rows: List[Dict]) -> List[Dict]:
+        """Move the word_stats columns of each row under a ``stats`` key"""
+        for row in rows:
+            row.pop('sort_key')
+            accuracy = row.pop('accuracy')
+            row['stats'] = {
+                'reviews': row.pop('reviews'),
+                'correct': row.pop('correct'),
+                'wrong': row.pop('wrong'),
+                'streak': row.pop('streak'),
+                'accuracy': round(accuracy * 100, 1),
+                'last_reviewed_at': row.pop('last_reviewed_at'),
+            }
+        return rows
+
+    def _count_reviewed_words(self, cursor, min_reviews: int) -> int:
+        cursor.execute('SELECT COUNT(*) AS total FROM word_stats WHERE reviews >= ?', (min_reviews,))
+        return cursor.fetchone()['total']
+
+    def get_reviewed_words(self, page: int = 1, per_page: int = 10, sort: str = 'id', order: str = 'asc',
+                           min_reviews: int = 1) -> Tuple[List[Dict], int, Optional[Tuple]]:
+        """Get a page of the words reviewed at least ``min_reviews`` times, with their stats
+
+        Also returns the cursor key of the next page, if there is one.
+        """
+        sql, params = self._reviewed_words_query(sort, order, min_reviews)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            total_count = self._count_reviewed_words(cursor, min_reviews)
+            cursor.execute(sql, params + [per_page + 1, (page - 1) * per_page])
+            words, next_key = self._split_page(cursor.fetchall(), per_page, 'sort_key', 'id')
+            return self._with_stats(words), total_count, next_key
+
+    def get_reviewed_words_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                                 include_total: bool = False, sort: str = 'id', order: str = 'asc',
+                                 min_reviews: int = 1) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of reviewed words following a (sort_key, id) cursor key"""
+        sql, params = self._reviewed_words_query(sort, order, min_reviews, after)
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            total_count = self._count_reviewed_words(cursor, min_reviews) if include_total else None
+            cursor.execute(sql, params + [per_page + 1, 0])
+            words, next_key = self._split_page(cursor.fetchall(), per_page, 'sort_key', 'id')
+            return self._with_stats(words), total_count, next_key
+
+    def rebuild_word_stats(self) -> int:
+        """Recompute word_stats from study_reviews; returns the number of rows written"""
+        with self._get_connection() as conn:
+            rows = conn.execute(RECOMPUTE_WORD_STATS_SQL).fetchall()
+            conn.execute('DELETE FROM word_stats')
+            conn.executemany(f'''
+                INSERT INTO word_stats (word_id, {", ".join(WORD_STATS_COLUMNS)})
+                VALUES ({", ".join("?" for _ in range(1 + len(WORD_STATS_COLUMNS)))})
+            ''', rows)
+            conn.commit()
+            return len(rows)
+
+    def verify_word_stats(self) -> List[Dict]:
+        """Compare word_stats with a full recomputation from study_reviews.
+
+        Returns one entry per word that differs, with the stored and expected
+        (reviews, correct, wrong, streak, last_reviewed_at, accuracy), None for
+        a missing row.
+        """
+        with self._get_connection() as conn:
+            expected = {row[0]: row[1:] for row in conn.execute(RECOMPUTE_WORD_STATS_SQL)}
+            stored = {row[0]: row[1:] for row in conn.execute(
+                f'SELECT word_id, {", ".join(WORD_STATS_COLUMNS)} FROM word_stats'
+            )}
+        return [
+            {'word_id': word_id, 'stored': stored.get(word_id), 'expected': expected.get(word_id)}
+            for word_id in sorted(expected.keys() | stored.keys())
+            if stored.get(word_id) != expected.get(word_id)
+        ]
+
+    @staticmethod
+    def fts_query(text: str, prefix: bool = True) -> Optional[str]:
+        """Turn user input into an FTS5 query matching every term
+
+        Each term is quoted so FTS5 operators in the input are taken
+        literally; with ``prefix`` the last term also matches as a prefix.
+        """
+        terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+        if not terms:
             return None
+        if prefix:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search_words(self, query: str, page: int = 1, per_page: int = 10,
+                     prefix: bool = True) -> Tuple[List[Dict], int]:
+        """Get a page of words matching a full-text query, best bm25 rank first
+
+        Queries matching more than SEARCH_RANK_LIMIT words are ordered by id.
+        Queries whose every term contains kana or kanji match substrings of
+        kanji instead (see search_kanji).
+        """
+        terms = query.split()
+        if terms and all(self.CJK_PATTERN.search(term) for term in terms):
+            return self.search_kanji(terms, page, per_page)
+        match = self.fts_query(query, prefix)
+        if match is None:
+            return [], 0
+        offset = (page - 1) * per_page
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            
+            cursor.execute('SELECT COUNT(*) AS total FROM words_fts WHERE words_fts MATCH ?', (match,))
+            total_count = cursor.fetchone()['total']
+            if offset >= total_count:
+                return [], total_count
+            order = 'rank' if total_count <= self.SEARCH_RANK_LIMIT else 'words_fts.rowid'
+            
+            cursor.execute(f'''
+                SELECT {self.QUALIFIED_WORD_COLUMNS},
+                       highlight(words_fts, 0, '<mark>', '</mark>') AS kanji_highlight,
+                       highlight(words_fts, 1, '<mark>', '</mark>') AS romaji_highlight,
+                       highlight(words_fts, 2, '<mark>', '</mark>') AS english_highlight
+                FROM words_fts
+                JOIN words ON words.id = words_fts.rowid
+                WHERE words_fts MATCH ?
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+            ''', (match, per_page, offset))
             
-        finally:
-            conn.close()
+            words = cursor.fetchall()
+            for word in words:
+                word['highlight'] = {
+                    column: word.pop(f'{column}_highlight') for column in ('kanji', 'romaji', 'english')
+                }
+            return words, total_count
+
+    def search_kanji(self, terms: List[str], page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
+        """Get a page of words whose kanji contains every term, shortest kanji first
+
+        Terms of three characters or more are looked up in the trigram index;
+        shorter ones, which have no trigram, filter the rows it returns, or
+        scan words.kanji when no term is long enough. Highlights mark the
+        terms in kanji.
+        """
+        long_terms = [term for term in terms if len(term) >= self.TRIGRAM_LENGTH]
+        conditions = ['instr(words.kanji, ?) > 0' for term in terms if len(term) < self.TRIGRAM_LENGTH]
+        params = [term for term in terms if len(term) < self.TRIGRAM_LENGTH]
+        if long_terms:
+            source = 'words_kanji_fts JOIN words ON words.id = words_kanji_fts.rowid'
+            conditions.insert(0, 'words_kanji_fts MATCH ?')
+            params.insert(0, ' '.join('"' + term.replace('"', '""') + '"' for term in long_terms))
+        else:
+            source = 'words'
+        where = ' AND '.join(conditions)
+        offset = (page - 1) * per_page
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'SELECT COUNT(*) AS total FROM {source} WHERE {where}', params)
+            total_count = cursor.fetchone()['total']
+            if offset >= total_count:
+                return [], total_count
+            cursor.execute(f'''
+                SELECT {self.QUALIFIED_WORD_COLUMNS}
+                FROM {source}
+                WHERE {where}
+                ORDER BY length(words.kanji), words.id
+                LIMIT ? OFFSET ?
+            ''', params + [per_page, offset])
+            words = cursor.fetchall()
+        marked = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+        for word in words:
+            word['highlight'] = {
+                'kanji': marked.sub(lambda m: f'<mark>{m.group(0)}</mark>', word['kanji']),
+                'romaji': word['romaji'],
+                'english': word['english'],
+            }
+        return words, total_count
+
+    def get_word_by_id(self, word_id: int) -> Optional[Dict]:
+        """Get a word by its ID, from the entity cache when it is there"""
+        return self._cached('words', word_id, lambda: self._fetch_word(word_id))
+
+    def _fetch_word(self, word_id: int) -> Optional[Dict]:
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            cursor.execute(f'SELECT {self.WORD_COLUMNS} FROM words WHERE id = ?', (word_id,))
+            return cursor.fetchone()
+
+    def get_words_by_ids(self, word_ids: List[int]) -> Dict[int, Dict]:
+        """Get words keyed by ID for the given IDs"""
+        if not word_ids:
+            return {}
+        with self._get_read_connection() as conn:
+            cursor = self._dict_cursor(conn)
+            placeholders = ', '.join('?' for _ in word_ids)
+            cursor.execute(f'SELECT {self.WORD_COLUMNS} FROM words WHERE id IN ({placeholders})', list(word_ids))
+            return {word['id']: word for word in cursor.fetchall()}
+
+    def get_embedding_rows(self) -> List[Tuple[int, str, str]]:
+        """Get (id, updated_at, text) of every word, the input of the embedding index"""
+        with self._get_read_connection() as conn:
+            cursor = conn.execute('''
+                SELECT id, updated_at, english || ' | ' || romaji || ' | ' || kanji
+                FROM words
+                ORDER BY id
+            ''')
+            return cursor.fetchall()
 
     def create_word(self, kanji: str, romaji: str, english: str) -> Dict:
         """Create a new word"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_connection() as conn:
             now = datetime.utcnow().isoformat()
-            cursor.execute('''
+            # RETURNING hands back the stored row, so there is nothing to re-read
+            (word,) = self._dict_cursor(conn).execute(f'''
                 INSERT INTO words (kanji, romaji, english, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (kanji, romaji, english, now, now))
-            
-            word_id = cursor.lastrowid
+                RETURNING {self.WORD_COLUMNS}
+            ''', (kanji, romaji, english, now, now)).fetchall()
+            version = self._table_version(conn, 'words')
             conn.commit()
-            
-            return self.get_word_by_id(word_id)
-            
-        finally:
-            conn.close()
+        
+        self._invalidate('words', (), version, changes=1)
+        return word
 
     def update_word(self, word_id: int, kanji: str, romaji: str, english: str) -> Optional[Dict]:
         """Update an existing word"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
+        with self._get_connection() as conn:
             now = datetime.utcnow().isoformat()
-            cursor.execute('''
+            rows = self._dict_cursor(conn).execute(f'''
                 UPDATE words 
-                SET kanji = ?, romaji = ?, meaning = ?, updated_at = ?
+                SET kanji = ?, romaji = ?, english = ?, updated_at = ?
                 WHERE id = ?
-            ''', (kanji, romaji, english, now, word_id))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                return self.get_word_by_id(word_id)
-            return None
+                RETURNING {self.WORD_COLUMNS}
+            ''', (kanji, romaji, english, now, word_id)).fetchall()
             
-        finally:
-            conn.close()
+            if not rows:
+                return None
+            version = self._table_version(conn, 'words')
+            conn.commit()
+        
+        self._invalidate('words', (word_id,), version, changes=1)
+        return rows[0]
 
     def delete_word(self, word_id: int) -> bool:
         """Delete a word"""
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM words WHERE id = ?', (word_id,))
             success = cursor.rowcount > 0
             if success:
+                version = self._table_version(conn, 'words')
                 conn.commit()
+                self._invalidate('words', (word_id,), version, changes=1)
             return success
-            
-        finally:
-            conn.close()
-def add_word_to_group(self, group_id: int, word_id: int) -> bool:
-    """Add a word to a group"""
-    conn = self._get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO group_words (group_id, word_id) VALUES (?, ?)', (group_id, word_id))
-        conn.commit()
-        return cursor.rowcount > 0
-    finally:
-        conn.close()
-
-def get_words_in_group(self, group_id: int) -> List[Dict]:
-    """Get words in a specific group"""
-    conn = self._get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT w.id, w.kanji, w.romaji, w.english
-            FROM words w
-            JOIN group_words gw ON w.id = gw.word_id
-            WHERE gw.group_id = ?
-        ''', (group_id,))
-        return [dict(id=row[0], kanji=row[1], romaji=row[2], english=row[3]) for row in cursor.fetchall()]
-    finally:
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from queue import LifoQueue, Empty
+from typing import Callable, Dict, Iterator, Optional, Type
+
+# Pragmas applied once to every connection the pool opens
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'mmap_size': 268435456,
+    'cache_size': -20000,
+}
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time"""
+
+class ConnectionPool:
+    """Thread-aware pool of SQLite connections for a single database file.
+
+    Connections are created lazily up to ``size``. A thread that borrows a
+    connection while already holding one gets the same connection back, so a
+    DAO method can call another DAO method inside its own transaction.
+    A ``read_only`` pool opens its connections with ``mode=ro``.
+    """
+
+    def __init__(self, db_path: str, size: int = 5, timeout: float = 5.0, pragmas: Dict = None,
+                 factory: Type[sqlite3.Connection] = sqlite3.Connection,
+                 trace_callback: Optional[Callable[[str], None]] = None, read_only: bool = False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.factory = factory
+        self.trace_callback = trace_callback
+        self._idle = LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            conn = sqlite3.connect(f'{Path(self.db_path).resolve().as_uri()}?mode=ro', uri=True,
+                                   timeout=self.timeout, check_same_thread=False, factory=self.factory)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False, factory=self.factory)
+        for name, value in self.pragmas.items():
+            # The journal mode belongs to the file; read-only connections cannot switch it
+            if not (self.read_only and name == 'journal_mode'):
+                conn.execute(f'PRAGMA {name} = {value}')
+        if self.trace_callback is not None:
+            conn.set_trace_callback(self.trace_callback)
+        return conn
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection configured like the pooled ones but owned by the caller"""
+        return self._connect()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool exhausted, wait for another thread to give a connection back
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except Empty:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s (pool size {self.size})"
+            )
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._stats['waits'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of the ``with`` block.
+
+        Uncommitted work is rolled back when the outermost borrow ends.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        with self._lock:
+            self._stats['checkouts'] += 1
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def holding(self) -> bool:
+        """Whether the calling thread is inside a borrow of this pool"""
+        return getattr(self._local, 'conn', None) is not None
+
+    @contextmanager
+    def pinned(self, conn: sqlite3.Connection) -> Iterator[None]:
+        """Serve ``conn`` to every borrow made by the calling thread inside the block
+
+        Used by the writer thread so DAO methods it runs share its connection
+        and transaction. The connection is never returned to the pool.
+        """
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+
+    def stats(self) -> Dict:
+        """Return pool size and wait-time metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            created = self._created
+        idle = self._idle.qsize()
+        stats.update({
+            'size': self.size,
+            'created': created,
+            'idle': idle,
+            'in_use': created - idle,
+            'wait_time_avg': stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0,
+        })
+        return stats
+
+    def close(self) -> None:
+        """Close every idle connection; borrowed ones are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pools: Dict[str, ConnectionPool] = {}
+_read_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Return the pool registered for ``db_path``, creating a default one if needed"""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = _pools[db_path] = ConnectionPool(db_path)
+    return pool
+
+def get_read_pool(db_path: str) -> ConnectionPool:
+    """Return the read-only pool for ``db_path``, or the read-write one if there is none"""
+    return _read_pools.get(db_path) or get_pool(db_path)
+
+def register_pool(db_path: str, read_only: bool = False, **kwargs) -> ConnectionPool:
+    """Create the pool for ``db_path``, replacing (and closing) any previous one"""
+    pools = _read_pools if read_only else _pools
+    with _pools_lock:
+        previous = pools.pop(db_path, None)
+        pool = pools[db_path] = ConnectionPool(db_path, read_only=read_only, **kwargs)
+    if previous is not None:
+        previous.close()
+    return pool
+
+def close_pool(db_path: str) -> None:
+    """Stop the snapshot watcher and writer thread, drop the entity cache and close and forget the pools for ``db_path``"""
+    from .cache import register_cache
+    from .snapshot import register_store
+    from .writer import register_writer
+    register_store(db_path, None)
+    register_writer(db_path, None)
+    register_cache(db_path, None)
+    with _pools_lock:
+        pools = [_pools.pop(db_path, None), _read_pools.pop(db_path, None)]
+    for pool in pools:
+        if pool is not None:
+            pool.close()
+
+def init_app(app) -> ConnectionPool:
+    """Register the connection pools for the app's database
+
+    Unless DB_WRITE_MODE is ``direct``, reads get their own pool of
+    read-only connections next to the read-write one.
+    """
+    pragmas = dict(DEFAULT_PRAGMAS)
+    pragmas['mmap_size'] = app.config['DB_MMAP_SIZE']
+    pragmas['cache_size'] = app.config['DB_CACHE_SIZE']
+    hooks = {}
+    if app.config['METRICS_ENABLED']:
+        # Charge each request's SQL work to it for /api/metrics
+        from .metrics import InstrumentedConnection, record_statement
+        hooks = {'factory': InstrumentedConnection, 'trace_callback': record_statement}
+    options = dict(size=app.config['DB_POOL_SIZE'], timeout=app.config['DB_POOL_TIMEOUT'], pragmas=pragmas, **hooks)
+    pool = register_pool(app.config['DATABASE'], **options)
+    app.extensions['db_pool'] = pool
+    if app.config['DB_WRITE_MODE'] == 'direct':
+        with _pools_lock:
+            previous = _read_pools.pop(app.config['DATABASE'], None)
+        if previous is not None:
+            previous.close()
+    else:
+        app.extensions['db_read_pool'] = register_pool(app.config['DATABASE'], read_only=True, **options)
+    return pool
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+embedding_log = logging.getLogger('app.embeddings')
+
+class HashingEmbedder:
+    """Deterministic local stand-in for the embedding service
+
+    Hashes character trigrams into a fixed number of signed buckets, so
+    texts that share spelling get similar vectors. Used when no embedding
+    service is configured and in tests.
+    """
+    model = 'hashing-trigram'
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            padded = f'  {text.lower()} '
+            for i in range(len(padded) - 2):
+                digest = hashlib.blake2b(padded[i:i + 3].encode('utf-8'), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dim
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+            vectors.append(vector)
+        return vectors
+
+class EmbeddingClient:
+    """Client for an OpenAI-compatible /v1/embeddings endpoint"""
+
+    def __init__(self, url: str, model: Optional[str] = None, timeout: float = 30.0):
+        self.url = url
+        self.model = model or 'default'
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        payload = {'input': list(texts), 'model': self.model}
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = sorted(response.json()['data'], key=lambda item: item['index'])
+        return [item['embedding'] for item in data]
+
+class EmbeddingIndex:
+    """Word vectors in one contiguous float32 matrix memory-mapped from disk
+
+    ``vectors.f32`` holds one L2-normalised row per word, in the order of
+    ``meta.json``'s ``rows`` ([word_id, updated_at] pairs), so cosine
+    similarity is a single matrix-vector product. Refreshes only embed words
+    whose ``updated_at`` differs from the stored one and swap the files in
+    atomically, so readers never see a half-written matrix. Searches start
+    them on a background thread (``refresh_in_background``) so embedding
+    never runs on a request thread.
+    """
+
+    def __init__(self, directory: str, embedder, batch_size: int = 64):
+        self.directory = directory
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.source_version = None
+        self._lock = threading.Lock()
+        self._builder_lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        # (word ids, updated_at values, matrix), swapped as one unit for readers
+        self._state = (np.empty(0, dtype=np.int64), [], np.empty((0, 0), dtype=np.float32))
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, 'vectors.f32')
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.directory, 'meta.json')
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def _load(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        if meta.get('model') != self.embedder.model:
+            # Vectors from another model are not comparable; rebuild on refresh
+            return
+        rows = meta['rows']
+        matrix = np.empty((0, meta['dim']), dtype=np.float32)
+        if rows:
+            matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(len(rows), meta['dim']))
+        self._state = (np.array([row[0] for row in rows], dtype=np.int64), [row[1] for row in rows], matrix)
+        self.source_version = meta.get('source_version')
+
+    def _embed_batches(self, texts: List[str]) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = np.asarray(self.embedder.embed(texts[start:start + self.batch_size]), dtype=np.float32)
+            batches.append(batch)
+        vectors = np.vstack(batches)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def refresh(self, rows: Iterable[Tuple[int, str, str]], source_version=None) -> dict:
+        """Bring the index in line with ``rows`` of (word_id, updated_at, text)
+
+        Returns counts of embedded, reused and removed rows.
+        """
+        with self._lock:
+            rows = list(rows)
+            ids, updated_values, old_matrix = self._state
+            known = {int(word_id): (i, updated) for i, (word_id, updated) in enumerate(zip(ids, updated_values))}
+            stale = [i for i, (word_id, updated_at, _) in enumerate(rows)
+                     if word_id not in known or known[word_id][1] != updated_at]
+            current_ids = {row[0] for row in rows}
+            removed = sum(1 for word_id in known if word_id not in current_ids)
+
+            if stale or removed or len(rows) != len(ids):
+                fresh = self._embed_batches([rows[i][2] for i in stale]) if stale else None
+                dim = fresh.shape[1] if fresh is not None else old_matrix.shape[1]
+                matrix = np.empty((len(rows), dim), dtype=np.float32)
+                if fresh is not None:
+                    matrix[stale] = fresh
+                stale_set = set(stale)
+                for i, (word_id, _, _) in enumerate(rows):
+                    if i not in stale_set:
+                        matrix[i] = old_matrix[known[word_id][0]]
+                self._write(rows, matrix, source_version)
+            elif source_version != self.source_version:
+                self._write_meta(rows, old_matrix.shape[1], source_version)
+
+            return {'embedded': len(stale), 'reused': len(rows) - len(stale), 'removed': removed}
+
+    def refresh_in_background(self, load_rows: Callable[[], Iterable[Tuple[int, str, str]]], source_version,
+                              timeout: Optional[float] = 0) -> bool:
+        """Refresh towards ``source_version`` on a background thread, waiting up to ``timeout`` seconds
+
+        ``load_rows`` is called on that thread. Only one refresh runs at a
+        time; a call while one is running waits for it instead of starting
+        another. ``timeout=None`` waits for as long as it takes. Returns
+        whether the index is at ``source_version`` afterwards.
+        """
+        with self._builder_lock:
+            if self._builder is None or not self._builder.is_alive():
+                self._builder = None
+                if self.source_version != source_version:
+                    self._builder = threading.Thread(target=self._refresh_rows, args=(load_rows, source_version),
+                                                     name='embedding-refresh', daemon=True)
+                    self._builder.start()
+            builder = self._builder
+        if builder is not None and timeout != 0:
+            builder.join(timeout)
+        return self.source_version == source_version
+
+    def _refresh_rows(self, load_rows, source_version) -> None:
+        try:
+            self.refresh(load_rows(), source_version=source_version)
+        except Exception:
+            embedding_log.exception('Refreshing the embedding index failed')
+
+    def _write(self, rows, matrix: np.ndarray, source_version):
+        tmp_path = self.vectors_path + '.tmp'
+        if len(rows):
+            out = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=matrix.shape)
+            out[:] = matrix
+            out.flush()
+            del out
+            os.replace(tmp_path, self.vectors_path)
+        self._write_meta(rows, matrix.shape[1], source_version)
+        self._load()
+
+    def _write_meta(self, rows, dim: int, source_version):
+        meta = {
+            'model': self.embedder.model,
+            'dim': dim,
+            'source_version': source_version,
+            'rows': [[row[0], row[1]] for row in rows],
+        }
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self.source_version = source_version
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Top ``limit`` (word_id, cosine similarity) pairs for ``query``"""
+        ids, _, matrix = self._state
+        if not len(ids):
+            return []
+        vector = self._embed_batches([query])[0]
+        scores = matrix @ vector
+        limit = min(limit, len(ids))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+def create_embedder(app):
+    """Embedding service client, or the local stand-in when none is configured"""
+    if app.config['EMBEDDING_URL']:
+        return EmbeddingClient(app.config['EMBEDDING_URL'], app.config['EMBEDDING_MODEL'])
+    return HashingEmbedder(app.config['EMBEDDING_DIM'])
+
+def get_index(app) -> EmbeddingIndex:
+    """Return the app's embedding index, opening it on first use"""
+    index = app.extensions.get('embedding_index')
+    if index is None:
+        index = app.extensions['embedding_index'] = EmbeddingIndex(
+            app.config['EMBEDDING_DIR'] or os.path.join(app.instance_path, 'embeddings'),
+            create_embedder(app),
+            batch_size=app.config['EMBEDDING_BATCH_SIZE'],
+        )
+    return index
@@ -0,0 +1,399 @@
+"""Per-request SQL and latency metrics, exported in the Prometheus text format
+
+Each request gets a RequestStats on the handling thread. Pooled connections
+charge their work to it: SQLite's trace callback counts the statements it
+runs (trigger programs and transaction control included), and the
+instrumented cursor times execute and fetch calls and counts the rows they
+return. When the request ends the totals go into histograms labelled by the
+Flask endpoint.
+"""
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request
+
+slow_query_log = logging.getLogger('app.slow_query')
+
+# Work done on this thread is charged to the request it is serving, if any
+_current = threading.local()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SERIALIZATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class RequestStats:
+    """What one request has cost so far"""
+    __slots__ = ('metrics', 'endpoint', 'started', 'statements', 'sql_seconds', 'rows', 'serialization_seconds',
+                 'status')
+
+    def __init__(self, metrics: 'RequestMetrics', endpoint: str = 'unmatched'):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.serialization_seconds = 0.0
+        self.status = None
+
+def current_stats() -> Optional[RequestStats]:
+    return getattr(_current, 'stats', None)
+
+def add_serialization_time(seconds: float) -> None:
+    """Charge JSON encoding to the current request; called by the JSON provider and streamed responses"""
+    stats = getattr(_current, 'stats', None)
+    if stats is not None:
+        stats.serialization_seconds += seconds
+
+def charge_to_current_request(fn: Callable[[sqlite3.Connection], object]) -> Callable[[sqlite3.Connection], object]:
+    """Wrap a queued write so the SQL it runs on the writer thread counts towards the request that queued it"""
+    stats = getattr(_current, 'stats', None)
+    if stats is None:
+        return fn
+
+    def run(conn):
+        previous = getattr(_current, 'stats', None)
+        _current.stats = stats
+        try:
+            return fn(conn)
+        finally:
+            _current.stats = previous
+    return run
+
+def record_statement(sql: str) -> None:
+    """Trace callback installed on pooled connections; SQLite calls it as each statement starts"""
+    stats = getattr(_current, 'stats', None)
+    if stats is not None:
+        stats.statements += 1
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges its execute and fetch time, and the rows it returns, to the current request"""
+    _sql = None
+    _params = None
+    _elapsed = 0.0
+    _reported = False
+
+    def _charge(self, started: float, rows: int = 0) -> None:
+        stats = getattr(_current, 'stats', None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats.sql_seconds += elapsed
+        stats.rows += rows
+        self._elapsed += elapsed
+        threshold = stats.metrics.slow_query_seconds
+        if threshold is not None and not self._reported and self._elapsed >= threshold:
+            self._reported = True
+            stats.metrics.record_slow_query(stats.endpoint, self.connection, self._sql, self._params, self._elapsed)
+
+    def _start(self, sql, params) -> float:
+        self._sql, self._params, self._elapsed, self._reported = sql, params, 0.0, False
+        return time.perf_counter()
+
+    def execute(self, sql, parameters=()):
+        started = self._start(sql, parameters)
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._charge(started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = self._start(sql, None)
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._charge(started)
+
+    def executescript(self, sql_script):
+        started = self._start(sql_script, None)
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._charge(started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._charge(started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._charge(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._charge(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._charge(started)
+            raise
+        self._charge(started, 1)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose shortcut methods go through InstrumentedCursor like explicit cursors do"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f'{self.name}{_labels(self.labels, key)} {_number(value)}' for key, value in values)
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == '+Inf' else f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+def _gauges_and_counters(gauges, counters, labels: Sequence[str], samples: Dict[Tuple, Dict]) -> List[str]:
+    lines = []
+    for kind, metrics in (('gauge', gauges), ('counter', counters)):
+        for name, help, key in metrics:
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            lines.extend(f'{name}{_labels(labels, values)} {_number(stats[key])}' for values, stats in samples.items())
+    return lines
+
+def pool_metrics(pools: Dict[str, Dict]) -> List[str]:
+    """Prometheus lines for ConnectionPool.stats() of each pool, labelled by pool name"""
+    gauges = (
+        ('langportal_db_pool_size', 'Maximum number of pooled connections', 'size'),
+        ('langportal_db_pool_connections_in_use', 'Connections currently borrowed', 'in_use'),
+        ('langportal_db_pool_connections_idle', 'Connections open and waiting in the pool', 'idle'),
+    )
+    counters = (
+        ('langportal_db_pool_checkouts_total', 'Connections borrowed from the pool', 'checkouts'),
+        ('langportal_db_pool_waits_total', 'Borrows that had to wait for a free connection', 'waits'),
+        ('langportal_db_pool_timeouts_total', 'Borrows that gave up waiting', 'timeouts'),
+        ('langportal_db_pool_wait_seconds_total', 'Time spent waiting for a free connection', 'wait_time_total'),
+    )
+    return _gauges_and_counters(gauges, counters, ('pool',), {(name,): stats for name, stats in pools.items()})
+
+def writer_metrics(stats: Dict) -> List[str]:
+    """Prometheus lines for DatabaseWriter.stats()"""
+    gauges = (
+        ('langportal_db_write_queue_depth', 'Writes waiting for the writer thread', 'queue_depth'),
+        ('langportal_db_write_queue_size', 'Capacity of the write queue', 'queue_size'),
+    )
+    counters = (
+        ('langportal_db_write_jobs_total', 'Writes run by the writer thread', 'jobs'),
+        ('langportal_db_write_jobs_failed_total', 'Writes that raised or whose commit failed', 'failed_jobs'),
+        ('langportal_db_write_commits_total', 'Transactions committed by the writer thread', 'commits'),
+        ('langportal_db_write_commits_failed_total', 'Transactions that could not begin or commit', 'failed_commits'),
+        ('langportal_db_write_rejected_total', 'Writes refused because the queue stayed full', 'rejected'),
+    )
+    return _gauges_and_counters(gauges, counters, ('mode',), {(stats['mode'],): stats})
+
+def cache_metrics(stats: Dict) -> List[str]:
+    """Prometheus lines for EntityCache.stats(), lookups labelled by table"""
+    lines = _gauges_and_counters(
+        (('langportal_entity_cache_size', 'Rows held in the entity cache', 'size'),
+         ('langportal_entity_cache_max_size', 'Capacity of the entity cache', 'maxsize')),
+        (('langportal_entity_cache_evictions_total', 'Rows evicted as least recently used', 'evictions'),
+         ('langportal_entity_cache_invalidations_total', 'Rows dropped because they were written', 'invalidations'),
+         ('langportal_entity_cache_flushes_total', 'Tables dropped after a write made elsewhere', 'flushes')),
+        (), {(): stats}
+    )
+    return lines + _gauges_and_counters(
+        (), (('langportal_entity_cache_hits_total', 'Lookups served from the entity cache', 'hits'),
+             ('langportal_entity_cache_misses_total', 'Lookups that queried the database', 'misses')),
+        ('table',), {(table,): counts for table, counts in stats['tables'].items()}
+    )
+
+def explain(conn: sqlite3.Connection, sql: str, params) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN of a statement as indented lines, like the sqlite3 shell prints it"""
+    try:
+        rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params or ()).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+class RequestMetrics:
+    """Request, SQL and serialization histograms for one app"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_query_history: int = 50):
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+        self.slow_queries = deque(maxlen=slow_query_history)
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+        self.requests = Counter('langportal_http_requests_total', 'Requests served',
+                                ('endpoint', 'method', 'status'))
+        self.latency = Histogram('langportal_http_request_duration_seconds',
+                                 'Time from routing to the end of the request', LATENCY_BUCKETS, ('endpoint',))
+        self.sql_time = Histogram('langportal_db_time_seconds_per_request',
+                                  'Time spent executing SQL and fetching rows', LATENCY_BUCKETS, ('endpoint',))
+        self.statements = Histogram('langportal_db_statements_per_request',
+                                    'SQL statements run, including trigger programs', COUNT_BUCKETS, ('endpoint',))
+        self.rows = Histogram('langportal_db_rows_per_request', 'Rows fetched from SQLite', ROW_BUCKETS,
+                              ('endpoint',))
+        self.serialization = Histogram('langportal_serialization_seconds_per_request',
+                                       'Time spent encoding JSON responses', SERIALIZATION_BUCKETS, ('endpoint',))
+        self.slow = Counter('langportal_db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS',
+                            ('endpoint',))
+        self._metrics = (self.requests, self.latency, self.sql_time, self.statements, self.rows,
+                         self.serialization, self.slow)
+
+    def start_request(self):
+        _current.stats = RequestStats(self, request.endpoint or 'unmatched')
+
+    def record_status(self, response):
+        stats = current_stats()
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    def finish_request(self, exc=None):
+        stats = current_stats()
+        if stats is None:
+            return
+        _current.stats = None
+        elapsed = time.perf_counter() - stats.started
+        endpoint = (request.endpoint or 'unmatched',)
+        # A streamed response the client stopped reading ends with GeneratorExit; its status was already sent
+        failed = exc is not None and not isinstance(exc, GeneratorExit)
+        status = stats.status if not failed and stats.status is not None else 500
+        self.requests.inc((endpoint[0], request.method, str(status)))
+        self.latency.observe(endpoint, elapsed)
+        self.sql_time.observe(endpoint, stats.sql_seconds)
+        self.statements.observe(endpoint, stats.statements)
+        self.rows.observe(endpoint, stats.rows)
+        self.serialization.observe(endpoint, stats.serialization_seconds)
+
+    def record_slow_query(self, endpoint: str, conn: sqlite3.Connection, sql: str, params, elapsed: float) -> None:
+        # executemany and executescript have no single parameter set to plan with
+        plan = explain(conn, sql, params) if params is not None else None
+        self.slow.inc((endpoint,))
+        self.slow_queries.append({
+            'at': datetime.utcnow().isoformat(),
+            'endpoint': endpoint,
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'sql': ' '.join(sql.split()),
+            'plan': plan,
+        })
+        slow_query_log.warning('Slow query (%.1f ms) in %s: %s\n%s', elapsed * 1000, endpoint,
+                               ' '.join(sql.split()), '\n'.join(plan or ['(no plan)']))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+def init_app(app) -> Optional[RequestMetrics]:
+    """Track every request of the app; the pool installs the SQL hooks (see db.init_app)"""
+    if not app.config['METRICS_ENABLED']:
+        return None
+    metrics = RequestMetrics(app.config['SLOW_QUERY_MS'])
+    pools = {'read_write': app.extensions['db_pool']}
+    if 'db_read_pool' in app.extensions:
+        pools['read_only'] = app.extensions['db_read_pool']
+    metrics.collectors.append(lambda: pool_metrics({name: pool.stats() for name, pool in pools.items()}))
+    cache = app.extensions.get('entity_cache')
+    if cache is not None:
+        metrics.collectors.append(lambda: cache_metrics(cache.stats()))
+    writer = app.extensions.get('db_writer')
+    if writer is not None:
+        batch_size = Histogram('langportal_db_commit_batch_size', 'Writes committed together in one transaction',
+                               BATCH_BUCKETS)
+        commit_time = Histogram('langportal_db_commit_seconds', 'Time from BEGIN to COMMIT of a write batch',
+                                LATENCY_BUCKETS)
+        queue_wait = Histogram('langportal_db_write_queue_wait_seconds',
+                               'Time a write waited in the queue before its batch started', LATENCY_BUCKETS)
+
+        def observe_commit(jobs: int, seconds: float, waits: List[float]):
+            batch_size.observe((), jobs)
+            commit_time.observe((), seconds)
+            for wait in waits:
+                queue_wait.observe((), wait)
+
+        writer.commit_listeners.append(observe_commit)
+        writer.wrap_job = charge_to_current_request
+        metrics.collectors.append(lambda: writer_metrics(writer.stats()) + batch_size.render()
+                                  + commit_time.render() + queue_wait.render())
+    app.extensions['metrics'] = metrics
+    app.before_request(metrics.start_request)
+    app.after_request(metrics.record_status)
+    app.teardown_request(metrics.finish_request)
+    return metrics
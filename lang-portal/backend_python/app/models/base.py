@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class BaseModel:
     """Base model class with common fields and methods"""
     id: Optional[int] = None
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 from .base import BaseModel
 
-@dataclass
+@dataclass(slots=True)
 class Group(BaseModel):
     """Group model representing a collection of words"""
     name: str = "Default Group Name"  # Default value for name
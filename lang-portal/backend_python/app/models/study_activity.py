@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from .base import BaseModel
 
-@dataclass
+@dataclass(slots=True)
 class StudyActivity(BaseModel):
     name: str = field(default="Default Study Activity")
     url: str = field(default="http://default.url")
@@ -4,7 +4,7 @@ from typing import Optional, List
 from .base import BaseModel
 from .word import Word
 
-@dataclass
+@dataclass(slots=True)
 class StudyReview(BaseModel):
     """StudyReview model representing a word review in a study session"""
     study_session_id: int=0      
@@ -25,12 +25,12 @@ class StudyReview(BaseModel):
     
     def to_dict(self) -> dict:
         """Convert review to dictionary, including word if present"""
-        result = super().to_dict()
+        result = BaseModel.to_dict(self)
         if self.word:
             result['word'] = self.word.to_dict()
         return result
 
-@dataclass
+@dataclass(slots=True)
 class StudySession(BaseModel):
     """StudySession model representing a learning session"""
     group_id: int=0
@@ -52,7 +52,7 @@ class StudySession(BaseModel):
     
     def to_dict(self) -> dict:
         """Convert session to dictionary, including reviews if present"""
-        result = super().to_dict()
+        result = BaseModel.to_dict(self)
         if self.reviews:
             result['reviews'] = [review.to_dict() for review in self.reviews]
         return result
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional
 from .base import BaseModel
 
-@dataclass
+@dataclass(slots=True)
 class Word(BaseModel):
     """Word model representing a Japanese vocabulary word"""
     kanji: str = field(default=None)
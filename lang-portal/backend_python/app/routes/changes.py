@@ -0,0 +1,90 @@
+import time
+from flask import Blueprint, jsonify, current_app, request, stream_with_context
+from ..metrics import add_serialization_time
+from ..services.change_service import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, ChangeService
+from ..utils.services import get_service
+
+bp = Blueprint('changes', __name__, url_prefix='/api/changes')
+
+RESYNC_MESSAGE = "Changes after since were compacted; sync again from since=0"
+
+def get_change_service():
+    return get_service(ChangeService)
+
+def parse_position(value):
+    """A sequence number from the query string or Last-Event-ID, or None if it is not one"""
+    try:
+        position = int(value)
+    except (TypeError, ValueError):
+        return None
+    return position if position >= 0 else None
+
+@bp.route('', methods=['GET'])
+def list_changes():
+    """Latest change of every word, group, membership and session changed after ``since``."""
+    since = parse_position(request.args.get('since', '0'))
+    if since is None:
+        return jsonify({"status": "error", "message": "since must be a non-negative integer"}), 400
+    limit = request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int)
+    if not 1 <= limit <= MAX_CHANGES_LIMIT:
+        return jsonify({"status": "error", "message": f"limit must be between 1 and {MAX_CHANGES_LIMIT}"}), 400
+
+    page = get_change_service().get_changes(since, limit)
+    if page is None:
+        return jsonify({"status": "error", "message": RESYNC_MESSAGE}), 410
+    response = jsonify({"status": "success", "data": page})
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+@bp.route('/stream', methods=['GET'])
+def stream_changes():
+    """The same changes as Server-Sent Events, followed live for up to ``timeout`` seconds.
+
+    Starts after Last-Event-ID when the client reconnects, else after
+    ``since``, else at the latest change. ``timeout=0`` sends the backlog and
+    closes. Each event's id is its sequence number.
+    """
+    service = get_change_service()
+    position = request.headers.get('Last-Event-ID', request.args.get('since'))
+    if position is None:
+        since = service.get_positions()['latest']
+    else:
+        since = parse_position(position)
+        if since is None:
+            return jsonify({"status": "error", "message": "since must be a non-negative integer"}), 400
+        if 0 < since < service.get_positions()['compacted_through']:
+            return jsonify({"status": "error", "message": RESYNC_MESSAGE}), 410
+
+    max_duration = current_app.config['CHANGES_STREAM_SECONDS']
+    duration = request.args.get('timeout', max_duration, type=float)
+    if duration is None or duration < 0:
+        return jsonify({"status": "error", "message": "timeout must be a non-negative number"}), 400
+    duration = min(duration, max_duration)
+    poll_interval = current_app.config['CHANGES_POLL_MS'] / 1000
+    keepalive = current_app.config['CHANGES_KEEPALIVE_SECONDS']
+    dumps = current_app.json.dumps
+
+    def events():
+        # Reconnect after roughly one poll instead of the browser default of a few seconds
+        yield f'retry: {max(int(poll_interval * 1000), 1000)}\n\n'
+        last_sent = time.monotonic()
+        for changes in service.follow(since, duration, poll_interval):
+            if changes is None:
+                yield f'event: reset\ndata: {dumps({"message": RESYNC_MESSAGE})}\n\n'
+                return
+            if changes:
+                started = time.perf_counter()
+                body = ''.join(f'id: {change["seq"]}\nevent: change\ndata: {dumps(change)}\n\n'
+                               for change in changes)
+                add_serialization_time(time.perf_counter() - started)
+                yield body
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= keepalive:
+                # A comment line, so proxies do not close an idle connection
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+
+    response = current_app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,27 +1,57 @@
 # /Users/mohitgarg/Desktop/Projects/free-genai-bootcamp-2025/lang-portal/backend_python/app/routes/dashboard.py
 
-from flask import Blueprint, jsonify, current_app
-from ..services.dashboard_service import DashboardService
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, current_app, request
+from ..services.dashboard_service import MAX_TIMESERIES_DAYS, DashboardService
+from ..utils.services import get_service
+from ..utils.conditional import conditional_get
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
 def get_dashboard_service():
-    return DashboardService(current_app.config['DATABASE'])
+    return get_service(DashboardService)
 
 @bp.route('/last_study_session', methods=['GET'])
+@conditional_get('study_sessions', 'study_reviews')
 def last_study_session():
     """Return last study session."""
     session = get_dashboard_service().get_last_study_session()
     return jsonify({"status": "success", "data": session}), 200
 
 @bp.route('/study_progress', methods=['GET'])
+@conditional_get('words', 'study_reviews')
 def study_progress():
     """Return study progress."""
     progress = get_dashboard_service().get_study_progress()
     return jsonify({"status": "success", "data": progress}), 200
 
 @bp.route('/quick_stats', methods=['GET'])
+@conditional_get('study_sessions')
 def quick_stats():
     """Return quick statistics."""
     stats = get_dashboard_service().get_quick_stats()
-    return jsonify({"status": "success", "data": stats}), 200
\ No newline at end of file
+    return jsonify({"status": "success", "data": stats}), 200
+
+@bp.route('/timeseries', methods=['GET'])
+def timeseries():
+    """Activity per day or week from the daily rollups; not cached since the default range follows the clock"""
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ('day', 'week'):
+        return jsonify({"status": "error", "message": "bucket must be one of day, week"}), 400
+    try:
+        end = request.args.get('to')
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else datetime.utcnow().date()
+        start = request.args.get('from')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"status": "error", "message": "from and to must be dates (YYYY-MM-DD)"}), 400
+    if start > end:
+        return jsonify({"status": "error", "message": "from must not be after to"}), 400
+    if (end - start).days >= MAX_TIMESERIES_DAYS:
+        return jsonify({"status": "error", "message": f"range is limited to {MAX_TIMESERIES_DAYS} days"}), 400
+    data = get_dashboard_service().get_timeseries(
+        start, end, bucket,
+        group_id=request.args.get('group_id', type=int),
+        study_activity_id=request.args.get('study_activity_id', type=int)
+    )
+    return jsonify({"status": "success", "data": data}), 200
@@ -1,21 +1,36 @@
 from flask import Blueprint, request, jsonify
 from ..services.group_service import GroupService
+from ..utils.services import get_service
 from ..models.group import Group
 from flask import Blueprint, request, current_app
+from ..utils.pagination import (is_cursor_request, get_cursor_params, cursor_paginate_response,
+                                get_pagination_params, paginate_response)
+from ..utils.conditional import conditional_get
+from ..utils.scheduler import parse_timestamp
+from ..utils.streaming import get_stream_format, stream_response
 
 bp = Blueprint('groups', __name__, url_prefix='/api/groups')
 
 def get_group_service():
-    return GroupService(current_app.config['DATABASE'])
+    return get_service(GroupService)
     # Your logic for retrieving groups
 @bp.route('', methods=['GET'])
+@conditional_get('groups')
 def get_groups():
+    if is_cursor_request():
+        try:
+            after, per_page, include_total = get_cursor_params()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        groups, total_count, next_key = get_group_service().get_groups_after(after, per_page, include_total)
+        return jsonify({"status": "success", "data": cursor_paginate_response(groups, next_key, per_page, total_count)})
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     groups = get_group_service().get_groups(page, per_page)
     return jsonify({"status": "success", "data": groups})
 
 @bp.route('/<int:group_id>', methods=['GET'])
+@conditional_get('groups')
 def get_group(group_id):
     group = get_group_service().get_group_by_id(group_id)
     if group:
@@ -49,18 +64,69 @@ def delete_group(group_id):
         return jsonify({"status": "success", "message": "Group deleted"})
     return jsonify({"status": "error", "message": "Group not found"}), 404
 
+@bp.route('/summary', methods=['GET'])
+@conditional_get('groups', 'group_words', 'study_sessions', 'study_reviews')
+def get_group_summaries():
+    """Groups with word count, reviewed-word count, accuracy and last-studied time"""
+    page, per_page = get_pagination_params()
+    groups, total_count = get_group_service().get_group_summaries(page, per_page)
+    return jsonify({"status": "success", "data": paginate_response(groups, total_count, page, per_page)})
+
 @bp.route('/<int:group_id>/words', methods=['POST'])
-def add_word():
-    data = request.get_json()
+def add_word(group_id):
+    data = request.get_json() or {}
     word_id = data.get('word_id')
     if not word_id:
         return jsonify({"status": "error", "message": "Word ID is required"}), 400
-    success = get_group_service().add_word_to_group(group_id, word_id)
-    if success:
+    if not get_group_service().get_group_by_id(group_id):
+        return jsonify({"status": "error", "message": "Group not found"}), 404
+    added = get_group_service().add_word_to_group(group_id, word_id)
+    if added is None:
+        return jsonify({"status": "error", "message": "Word not found"}), 404
+    if added:
         return jsonify({"status": "success", "message": "Word added to group"}), 201
-    return jsonify({"status": "error", "message": "Failed to add word to group"}), 400
+    return jsonify({"status": "success", "message": "Word already in group"}), 200
 
 @bp.route('/<int:group_id>/words', methods=['GET'])
+@conditional_get('groups', 'group_words', 'words')
 def get_words(group_id):
-    words = get_group_service().get_words_in_group(group_id)
-    return jsonify({"status": "success", "data": words})
\ No newline at end of file
+    sort_by = request.args.get('sort_by', 'id')
+    order = request.args.get('order', 'asc')
+    if sort_by not in GroupService.WORD_SORT_OPTIONS:
+        return jsonify({"status": "error",
+                        "message": f"sort_by must be one of {', '.join(GroupService.WORD_SORT_OPTIONS)}"}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({"status": "error", "message": "order must be asc or desc"}), 400
+    if not get_group_service().get_group_by_id(group_id):
+        return jsonify({"status": "error", "message": "Group not found"}), 404
+    page, per_page = get_pagination_params()
+    words, total_count = get_group_service().get_group_words(group_id, page, per_page, sort_by, order)
+    return jsonify({"status": "success", "data": paginate_response(words, total_count, page, per_page)})
+
+@bp.route('/<int:group_id>/words/export', methods=['GET'])
+@conditional_get('groups', 'group_words', 'words')
+def export_words(group_id):
+    """Stream every word of the group in id order, as JSON or NDJSON"""
+    try:
+        fmt = get_stream_format()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if not get_group_service().get_group_by_id(group_id):
+        return jsonify({"status": "error", "message": "Group not found"}), 404
+    chunks = get_group_service().iter_group_words(group_id, current_app.config['STREAM_CHUNK_SIZE'])
+    return stream_response(chunks, fmt)
+
+@bp.route('/<int:group_id>/due', methods=['GET'])
+def get_due_words(group_id):
+    """Words of the group due for review; not cached since the answer moves with the clock"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    as_of = request.args.get('as_of')
+    if as_of:
+        try:
+            as_of = parse_timestamp(as_of)
+        except ValueError:
+            return jsonify({"status": "error", "message": "as_of must be an ISO 8601 timestamp"}), 400
+    if not get_group_service().get_group_by_id(group_id):
+        return jsonify({"status": "error", "message": "Group not found"}), 404
+    words = get_group_service().get_due_words(group_id, limit, as_of or None)
+    return jsonify({"status": "success", "data": {"group_id": group_id, "words": words}})
@@ -0,0 +1,28 @@
+from flask import Blueprint, jsonify, current_app
+
+bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+# Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def get_metrics():
+    return current_app.extensions.get('metrics')
+
+@bp.route('', methods=['GET'])
+def prometheus_metrics():
+    """Request, SQL and connection pool metrics in the Prometheus text format."""
+    metrics = get_metrics()
+    if metrics is None:
+        return jsonify({"status": "error", "message": "Metrics are disabled"}), 404
+    return current_app.response_class(metrics.render(), content_type=CONTENT_TYPE)
+
+@bp.route('/slow_queries', methods=['GET'])
+def slow_queries():
+    """Most recent statements slower than SLOW_QUERY_MS, with their query plans."""
+    metrics = get_metrics()
+    if metrics is None:
+        return jsonify({"status": "error", "message": "Metrics are disabled"}), 404
+    return jsonify({"status": "success", "data": {
+        "threshold_ms": current_app.config['SLOW_QUERY_MS'],
+        "queries": list(reversed(metrics.slow_queries)),
+    }})
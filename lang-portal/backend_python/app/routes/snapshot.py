@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, current_app, request, url_for
+from werkzeug.wsgi import wrap_file
+from ..snapshot import get_store
+from ..utils.conditional import conditional_get
+
+bp = Blueprint('snapshot', __name__, url_prefix='/api/snapshot')
+
+# Versioned URLs never change content, so caches may keep them for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+BUFFER_SIZE = 64 * 1024
+
+def build_timeout() -> float:
+    return current_app.config['SNAPSHOT_BUILD_TIMEOUT']
+
+@bp.route('', methods=['GET'])
+@conditional_get('words', 'groups', 'group_words')
+def snapshot_info():
+    """Version, URL, row counts and sizes of the current vocabulary snapshot."""
+    # Rebuilds run in the background; only a process with no snapshot yet waits for one
+    store = get_store(current_app)
+    snapshot = store.refresh(0) or store.refresh(build_timeout())
+    if snapshot is None:
+        response = jsonify({"status": "error", "message": "Snapshot is still being built"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    data = dict(snapshot.info, url=url_for('snapshot.download', version=snapshot.version))
+    response = jsonify({"status": "success", "data": data})
+    if not store.is_current(snapshot):
+        # A rebuild is still running: this body must not be cached under the ETag of the newer tables
+        response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+@bp.route('/<version>', methods=['GET'])
+def download(version):
+    """The snapshot body in the best encoding the client accepts, with range and ETag support."""
+    snapshot = get_store(current_app).get(version, build_timeout())
+    if snapshot is None:
+        return jsonify({"status": "error", "message": "Snapshot not found"}), 404
+
+    encoding = snapshot.negotiate(request.accept_encodings)
+    response = current_app.response_class(
+        wrap_file(request.environ, snapshot.open(encoding), buffer_size=BUFFER_SIZE),
+        mimetype='application/json', direct_passthrough=True
+    )
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.content_length = snapshot.size(encoding)
+    response.set_etag(f'{version}-{encoding}')
+    return response.make_conditional(request, accept_ranges=True, complete_length=snapshot.size(encoding))
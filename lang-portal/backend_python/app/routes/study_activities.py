@@ -1,15 +1,26 @@
 from flask import Blueprint, request, jsonify, current_app
 from ..services.study_activity_service import StudyActivityService
+from ..utils.services import get_service
 from ..models.study_activity import StudyActivity
+from ..utils.pagination import is_cursor_request, get_cursor_params, cursor_paginate_response
+from ..utils.conditional import conditional_get
 
 bp = Blueprint('study_activities', __name__, url_prefix='/api/study_activities')
 
 def get_study_activity_service():
-    return StudyActivityService(current_app.config['DATABASE'])
+    return get_service(StudyActivityService)
 
 @bp.route('', methods=['GET'])
+@conditional_get('study_activities')
 def get_study_activities():
     """Retrieve the list of study activities."""
+    if is_cursor_request():
+        try:
+            after, per_page, include_total = get_cursor_params()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        activities, total_count, next_key = get_study_activity_service().get_activities_after(after, per_page, include_total)
+        return jsonify({"status": "success", "data": cursor_paginate_response(activities, next_key, per_page, total_count)}), 200
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     activities = get_study_activity_service().get_all_activities(page, per_page)
@@ -24,6 +35,7 @@ def create_study_activity():
     return jsonify({"status": "success", "data": activity}), 201 if success else 400
 
 @bp.route('/<int:activity_id>', methods=['GET'])
+@conditional_get('study_activities')
 def get_study_activity(activity_id):
     """Retrieve a specific study activity by ID."""
     activity = get_study_activity_service().get_activity_by_id(activity_id)
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
 from ..services.study_session_service import StudySessionService
+from ..utils.services import get_service
 from ..models.study_session import StudySession
+from ..utils.pagination import is_cursor_request, get_cursor_params, cursor_paginate_response
+from ..utils.conditional import conditional_get
+from ..utils.streaming import get_stream_format, stream_response
 
 bp = Blueprint('study_sessions', __name__, url_prefix='/api/study_sessions')
 
 def get_study_session_service():
-    return StudySessionService(current_app.config['DATABASE'])
+    return get_service(StudySessionService)
 
 @bp.route('', methods=['POST'])
 def create_study_session():
@@ -22,15 +26,21 @@ def create_study_session():
 
 @bp.route('/<int:id>/review', methods=['POST'])
 def record_word_reviews(id):
-    """Records word reviews for a session."""
-    data = request.get_json()
-    reviews = data.get('reviews')
-    # Logic to record reviews would go here
-    # Assuming you have a service method to handle this
-    success = get_study_session_service().record_word_reviews(id, reviews)
-    return jsonify({"status": "success", "message": "Word reviews recorded successfully"}), 200 if success else 400
+    """Records a batch of word reviews for a session in one transaction."""
+    data = request.get_json(silent=True) or {}
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    service = get_study_session_service()
+    if not service.session_exists(id):
+        return jsonify({"status": "error", "message": "Study session not found"}), 404
+    summary, errors = service.record_word_reviews(id, data.get('reviews'), idempotency_key)
+    if errors:
+        return jsonify({"status": "error", "message": "Validation error", "errors": errors}), 400
+    if summary.get('queued'):
+        return jsonify({"status": "success", "message": "Reviews queued", "data": summary}), 202
+    return jsonify({"status": "success", "message": "Reviews recorded successfully", "data": summary}), 200
 
 @bp.route('/<int:id>', methods=['GET'])
+@conditional_get('study_sessions', 'study_reviews', 'words')
 def get_study_session(id):
     """Retrieve details of a specific study session."""
     session = get_study_session_service().get_study_sessions(id)
@@ -49,7 +59,32 @@ def get_study_session_progress(id):
     return jsonify({"status": "success", "data": progress}), 200 if progress else 404
 
 @bp.route('', methods=['GET'])
+@conditional_get('study_sessions')
 def list_study_sessions():
-    """Retrieve a list of all study sessions."""
-    sessions = get_study_session_service().get_all_study_sessions()  # Assuming you have a method in the service to get all sessions
-    return jsonify({"status": "success", "data": sessions}), 200
\ No newline at end of file
+    """Retrieve a list of all study sessions, streamed unless a cursor page is asked for."""
+    if is_cursor_request():
+        try:
+            after, per_page, include_total = get_cursor_params()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        sessions, total_count, next_key = get_study_session_service().get_study_sessions_after(after, per_page, include_total)
+        return jsonify({"status": "success", "data": cursor_paginate_response(sessions, next_key, per_page, total_count)}), 200
+    try:
+        fmt = get_stream_format()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    chunks = get_study_session_service().iter_study_sessions(current_app.config['STREAM_CHUNK_SIZE'])
+    return stream_response(chunks, fmt)
+
+@bp.route('/<int:id>/reviews', methods=['GET'])
+@conditional_get('study_reviews', 'words')
+def export_session_reviews(id):
+    """Stream every review of a session with its word, as JSON or NDJSON."""
+    try:
+        fmt = get_stream_format()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    service = get_study_session_service()
+    if not service.session_exists(id):
+        return jsonify({"status": "error", "message": "Study session not found"}), 404
+    return stream_response(service.iter_session_reviews(id, current_app.config['STREAM_CHUNK_SIZE']), fmt)
\ No newline at end of file
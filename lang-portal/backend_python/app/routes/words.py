@@ -1,28 +1,129 @@
 from flask import Blueprint, request, current_app
+from ..embeddings import get_index
 from ..services.word_service import WordService
+from ..services.import_service import ImportService, WORD_FIELDS
+from ..utils.services import get_service
 from ..utils.error_handlers import success_response, error_response, not_found_error
-from ..utils.pagination import get_pagination_params, paginate_response
+from ..utils.pagination import (get_pagination_params, paginate_response, is_cursor_request,
+                                get_cursor_params, cursor_paginate_response)
+from ..utils.conditional import conditional_get
+from ..utils.importers import FORMATS, decode_lines, detect_format, read_records
 
 bp = Blueprint('words', __name__, url_prefix='/api/words')
 
 def get_word_service():
-    return WordService(current_app.config['DATABASE'])
+    return get_service(WordService)
+
+# Query parameters that list reviewed words from word_stats instead of all words
+STATS_ARGS = ('sort', 'min_reviews')
+
+def words_tables():
+    """Tables behind the word list; stats sorts and filters also read the reviews"""
+    if any(arg in request.args for arg in STATS_ARGS):
+        return ('words', 'study_reviews')
+    return ('words',)
 
 @bp.route('', methods=['GET'])
+@conditional_get(words_tables)
 def get_words():
-    """Get paginated list of words"""
+    """Get paginated list of words
+
+    ``sort`` (accuracy, last_reviewed, reviews or id) and ``min_reviews``
+    list only the words reviewed at least ``min_reviews`` times (default 1),
+    each with its review stats; ``order`` is asc or desc.
+    """
+    if any(arg in request.args for arg in STATS_ARGS):
+        return get_reviewed_words()
     try:
-        page, per_page = get_pagination_params()
         word_service = get_word_service()
+        if is_cursor_request():
+            after, per_page, include_total = get_cursor_params()
+            words, total_count, next_key = word_service.get_words_after(after, per_page, include_total)
+            return success_response(
+                cursor_paginate_response(words, next_key, per_page, total_count)
+            )
+        
+        page, per_page = get_pagination_params()
         words, total_count = word_service.get_words(page, per_page)
         
+        # Let page-based clients switch to cursors from any page
+        next_key = None
+        if words and page * per_page < total_count:
+            next_key = (words[-1]['id'], words[-1]['id'])
+        
+        return success_response(
+            paginate_response(words, total_count, page, per_page, next_key)
+        )
+    except Exception as e:
+        return error_response(str(e))
+
+def get_reviewed_words():
+    """Reviewed words in stats order, for get_words"""
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc')
+    min_reviews = request.args.get('min_reviews', '1')
+    if sort not in WordService.STATS_SORT_OPTIONS:
+        return error_response(f"sort must be one of {', '.join(WordService.STATS_SORT_OPTIONS)}")
+    if order not in ('asc', 'desc'):
+        return error_response("order must be asc or desc")
+    if not min_reviews.isdigit() or int(min_reviews) < 1:
+        return error_response("min_reviews must be a positive integer")
+    min_reviews = int(min_reviews)
+    try:
+        word_service = get_word_service()
+        if is_cursor_request():
+            after, per_page, include_total = get_cursor_params()
+            words, total_count, next_key = word_service.get_reviewed_words_after(
+                after, per_page, include_total, sort, order, min_reviews
+            )
+            return success_response(
+                cursor_paginate_response(words, next_key, per_page, total_count)
+            )
+        
+        page, per_page = get_pagination_params()
+        words, total_count, next_key = word_service.get_reviewed_words(page, per_page, sort, order, min_reviews)
         return success_response(
-            paginate_response(words, total_count, page, per_page)
+            paginate_response(words, total_count, page, per_page, next_key)
         )
     except Exception as e:
         return error_response(str(e))
 
+@bp.route('/search', methods=['GET'])
+@conditional_get('words')
+def search_words():
+    """Full-text search over kanji, romaji and english, best match first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return error_response("Query parameter 'q' is required")
+    prefix = request.args.get('prefix', 'true').lower() != 'false'
+    try:
+        page, per_page = get_pagination_params()
+        words, total_count = get_word_service().search_words(query, page, per_page, prefix)
+        return success_response(paginate_response(words, total_count, page, per_page))
+    except Exception as e:
+        return error_response(str(e))
+
+@bp.route('/semantic_search', methods=['GET'])
+@conditional_get('words')
+def semantic_search():
+    """Get the words closest in meaning to the query"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return error_response("Query parameter 'q' is required")
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    try:
+        words, current = get_word_service().semantic_search(
+            get_index(current_app), query, limit, current_app.config['EMBEDDING_REFRESH_TIMEOUT'])
+        response = success_response({'query': query, 'items': words, 'index_current': current})
+        if not current:
+            # Ranked on vectors older than the words table: no ETag, so the next request searches again
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        return error_response(str(e))
+
 @bp.route('/<int:word_id>', methods=['GET'])
+@conditional_get('words')
 def get_word(word_id):
     """Get a word by its ID"""
     try:
@@ -57,6 +158,35 @@ def create_word():
     except Exception as e:
         return error_response(str(e))
 
+@bp.route('/import', methods=['POST'])
+def import_words():
+    """Bulk import words from a CSV or JSONL upload, streamed in chunks
+
+    Accepts a multipart ``file`` field or the raw request body. Rows are
+    deduplicated on (kanji, romaji) following ``on_conflict`` and may list
+    groups to join in a ``groups`` field.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.content_type
+    else:
+        stream, filename, content_type = request.stream, None, request.content_type
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    if fmt not in FORMATS:
+        return error_response(f"Import format must be one of {', '.join(FORMATS)}")
+    
+    try:
+        report = get_service(ImportService).import_words(
+            read_records(decode_lines(stream), fmt, WORD_FIELDS),
+            on_conflict=request.args.get('on_conflict', 'skip'),
+            group=request.args.get('group'),
+            create_groups=request.args.get('create_groups', 'true').lower() != 'false',
+            chunk_size=current_app.config['IMPORT_CHUNK_SIZE']
+        )
+        return success_response(report, "Import finished")
+    except (ValueError, UnicodeDecodeError) as e:
+        return error_response(str(e))
+
 @bp.route('/<int:word_id>', methods=['PUT'])
 def update_word(word_id):
     """Update an existing word"""
@@ -0,0 +1,62 @@
+import time
+from typing import Dict, Iterator, List, Optional
+from ..dao.change_dao import ChangeDAO
+
+DEFAULT_CHANGES_LIMIT = 100
+# Most changes one page may hold
+MAX_CHANGES_LIMIT = 1000
+
+class ChangeService:
+    def __init__(self, db_path: str):
+        self.dao = ChangeDAO(db_path)
+
+    def get_changes(self, since: int, limit: int = DEFAULT_CHANGES_LIMIT) -> Optional[Dict]:
+        """Page of changes after sequence number ``since``, or None if compaction dropped some of them.
+
+        ``since=0`` lists every live row, so a client with nothing to go on
+        syncs from there. A client continues from ``next_since``; once
+        ``has_more`` is false it has caught up with ``latest``.
+        """
+        changes, has_more, latest, floor = self.dao.get_changes(since, limit)
+        if 0 < since < floor:
+            return None
+        return {
+            'changes': changes,
+            'has_more': has_more,
+            'next_since': changes[-1]['seq'] if has_more else max(since, latest),
+            'latest': latest,
+        }
+
+    def get_positions(self) -> Dict:
+        """Latest sequence number and the compaction floor below which a client must resync."""
+        latest, floor = self.dao.get_positions()
+        return {'latest': latest, 'compacted_through': floor}
+
+    def follow(self, since: int, duration: float, poll_interval: float,
+               limit: int = MAX_CHANGES_LIMIT) -> Iterator[Optional[List[Dict]]]:
+        """Yield the changes after ``since`` as they are committed, for ``duration`` seconds.
+
+        The backlog comes first, a page at a time; after that the log is
+        polled every ``poll_interval`` seconds, yielding an empty list when
+        nothing changed so the caller can send keepalives. No connection is
+        held between polls. Yields None and stops if compaction overtakes
+        the position.
+        """
+        deadline = time.monotonic() + duration
+        while True:
+            page = self.get_changes(since, limit)
+            if page is None:
+                yield None
+                return
+            since = page['next_since']
+            yield page['changes']
+            if page['has_more']:
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(poll_interval, remaining))
+
+    def compact(self, retention_days: float) -> Dict:
+        """Drop superseded change entries and tombstones older than the retention period."""
+        return self.dao.compact(retention_days)
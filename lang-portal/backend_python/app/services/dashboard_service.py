@@ -1,6 +1,11 @@
 # /Users/mohitgarg/Desktop/Projects/free-genai-bootcamp-2025/lang-portal/backend_python/app/services/dashboard_service.py
 
-from ..dao.dashboard_dao import DashboardDAO
+from datetime import date, timedelta
+from typing import Dict, Optional
+from ..dao.dashboard_dao import ROLLUP_COLUMNS, DashboardDAO
+
+# Longest range one time-series request may cover
+MAX_TIMESERIES_DAYS = 3660
 
 class DashboardService:
     def __init__(self, db_path: str):
@@ -16,4 +21,58 @@ class DashboardService:
 
     def get_quick_stats(self):
         """Get quick statistics."""
-        return self.dao.get_quick_stats()
\ No newline at end of file
+        return self.dao.get_quick_stats()
+
+    def get_timeseries(self, start: date, end: date, bucket: str = 'day',
+                       group_id: Optional[int] = None, study_activity_id: Optional[int] = None) -> Dict:
+        """Review and session activity per day or week between two dates (inclusive).
+
+        Weekly ranges are widened to whole Monday-to-Sunday weeks. Every bucket
+        in the range is listed, with zeros where nothing happened. ``words``
+        counts distinct words per day, group and activity, so it is summed
+        rather than de-duplicated across them.
+        """
+        if bucket == 'week':
+            start -= timedelta(days=start.weekday())
+            end += timedelta(days=6 - end.weekday())
+        step = timedelta(days=7 if bucket == 'week' else 1)
+        rows = {row['date']: row for row in self.dao.get_timeseries(
+            start.isoformat(), end.isoformat(), bucket, group_id, study_activity_id)}
+
+        series = []
+        totals = dict.fromkeys(ROLLUP_COLUMNS, 0)
+        current = start
+        while current <= end:
+            row = rows.get(current.isoformat()) or dict.fromkeys(ROLLUP_COLUMNS, 0)
+            for column in ROLLUP_COLUMNS:
+                totals[column] += row[column]
+            series.append(self._timeseries_point(current.isoformat(), row))
+            current += step
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "bucket": bucket,
+            "series": series,
+            "totals": self._timeseries_point(None, totals)
+        }
+
+    @staticmethod
+    def _timeseries_point(day: Optional[str], row: Dict) -> Dict:
+        point = {"date": day} if day else {}
+        point.update({
+            "reviews": row['reviews'],
+            "correct": row['correct'],
+            "accuracy": (row['correct'] / row['reviews'] * 100) if row['reviews'] else 0,
+            "words": row['words'],
+            "sessions": row['sessions'],
+            "session_minutes": round(row['session_seconds'] / 60, 1)
+        })
+        return point
+
+    def rebuild_rollups(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        """Backfill the daily rollups from the base tables."""
+        return self.dao.rebuild_rollups(start, end)
+
+    def verify_rollups(self, start: Optional[str] = None, end: Optional[str] = None):
+        """List daily rollup rows that differ from a full recomputation."""
+        return self.dao.verify_rollups(start, end)
@@ -1,14 +1,22 @@
 from ..dao.group_dao import GroupDAO
+from ..dao.schedule_dao import ScheduleDAO
 from ..models.group import Group
 
 class GroupService:
+    WORD_SORT_OPTIONS = tuple(GroupDAO.WORD_SORT_COLUMNS)
+
     def __init__(self, db_path: str):
         self.group_dao = GroupDAO(db_path)
+        self.schedule_dao = ScheduleDAO(db_path)
 
     def get_groups(self, page: int = 1, per_page: int = 10):
         """Retrieve paginated list of groups"""
         return self.group_dao.get_groups(page, per_page)
 
+    def get_groups_after(self, after=None, per_page: int = 10, include_total: bool = False):
+        """Retrieve the page of groups following a cursor key"""
+        return self.group_dao.get_groups_after(after, per_page, include_total)
+
     def get_group_by_id(self, group_id: int):
         """Retrieve a group by its ID"""
         return self.group_dao.get_group_by_id(group_id)
@@ -29,6 +37,23 @@ class GroupService:
         """Add a word to a group"""
         return self.group_dao.add_word_to_group(group_id, word_id)
 
-    def get_words_in_group(self, group_id: int):
-        """Get words in a specific group"""
-        return self.group_dao.get_words_in_group(group_id)
\ No newline at end of file
+    def get_group_summaries(self, page: int = 1, per_page: int = 10):
+        """Retrieve a page of groups with word counts and review stats"""
+        return self.group_dao.get_group_summaries(page, per_page)
+
+    def get_group_words(self, group_id: int, page: int = 1, per_page: int = 10,
+                        sort_by: str = 'id', order: str = 'asc'):
+        """Retrieve a sorted page of the words in a group"""
+        return self.group_dao.get_group_words(group_id, page, per_page, sort_by, order)
+
+    def iter_group_words(self, group_id: int, chunk_size: int = 500):
+        """Stream every word of a group in chunks"""
+        return self.group_dao.iter_group_words(group_id, chunk_size)
+
+    def get_due_words(self, group_id: int, limit: int = 20, as_of=None):
+        """Retrieve the group's words that are due for review, most overdue first"""
+        return self.schedule_dao.get_due_words(group_id, limit, as_of)
+
+    def rebuild_schedules(self):
+        """Recompute all review schedules from the recorded reviews"""
+        return self.schedule_dao.rebuild_schedules()
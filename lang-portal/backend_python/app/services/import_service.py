@@ -0,0 +1,97 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from ..dao.import_dao import ImportDAO
+from ..models.word import Word
+from ..utils.importers import chunked
+
+CONFLICT_POLICIES = ('skip', 'update', 'error')
+WORD_FIELDS = ('kanji', 'romaji', 'english')
+
+class ImportService:
+    def __init__(self, db_path: str):
+        self.import_dao = ImportDAO(db_path)
+
+    @staticmethod
+    def _group_names(record: Dict, default_group: Optional[str]) -> List[str]:
+        """Group names of a record: a list, or a ';'-separated string in CSV files"""
+        groups = record.get('groups') or []
+        if isinstance(groups, str):
+            groups = groups.split(';')
+        names = [str(name).strip() for name in groups if str(name).strip()]
+        if default_group:
+            names.append(default_group)
+        return list(dict.fromkeys(names))
+
+    def import_words(self, records: Iterable[Tuple[int, Union[Dict, str]]], on_conflict: str = 'skip',
+                     group: Optional[str] = None, create_groups: bool = True,
+                     chunk_size: int = 1000, max_errors: int = 100) -> Dict:
+        """Validate and import a stream of (line number, record) pairs chunk by chunk
+
+        Each chunk is written in one transaction, so memory use is bounded by
+        ``chunk_size`` rather than the input size. Returns the counts, the
+        first ``max_errors`` per-row errors and the throughput.
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"on_conflict must be one of {', '.join(CONFLICT_POLICIES)}")
+
+        started = time.perf_counter()
+        report = {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0,
+                  'duplicates': 0, 'failed': 0, 'group_links': 0}
+        errors = []
+        group_ids = {}
+
+        def fail(line: int, messages: List[str]):
+            report['failed'] += 1
+            if len(errors) < max_errors:
+                errors.append({'line': line, 'errors': messages})
+
+        for chunk in chunked(records, chunk_size):
+            # Rows keyed by (kanji, romaji); a repeated key in the input counts once
+            rows = {}
+            lines = {}
+            for line, record in chunk:
+                report['rows'] += 1
+                if isinstance(record, str):
+                    fail(line, [record])
+                    continue
+                word = Word(
+                    kanji=str(record.get('kanji') or '').strip(),
+                    romaji=str(record.get('romaji') or '').strip(),
+                    english=str(record.get('english') or '').strip()
+                )
+                validation_errors = word.validate()
+                if validation_errors:
+                    fail(line, validation_errors)
+                    continue
+                key = (word.kanji, word.romaji)
+                if key in rows:
+                    report['duplicates'] += 1
+                    if on_conflict != 'update':
+                        continue
+                rows[key] = (word.kanji, word.romaji, word.english, self._group_names(record, group))
+                lines[key] = line
+
+            if not rows:
+                continue
+
+            names = {name for *_, row_groups in rows.values() for name in row_groups if name not in group_ids}
+            group_ids.update(self.import_dao.get_group_ids(names, create_missing=create_groups))
+            words = []
+            for key, (kanji, romaji, english, row_groups) in rows.items():
+                unknown = [name for name in row_groups if name not in group_ids]
+                if unknown:
+                    fail(lines[key], [f"Unknown group: {name}" for name in unknown])
+                    continue
+                words.append((kanji, romaji, english, [group_ids[name] for name in row_groups]))
+
+            result = self.import_dao.import_words(words, on_conflict)
+            for field in ('inserted', 'updated', 'unchanged', 'group_links'):
+                report[field] += result[field]
+            for key in result['conflicts']:
+                fail(lines[key], ["Word already exists"])
+
+        elapsed = time.perf_counter() - started
+        report['errors'] = errors
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed > 0 else None
+        return report
@@ -34,6 +34,10 @@ class StudyActivityService:
     def get_all_activities(self, page: int = 1, per_page: int = 10) -> list:
         """Retrieve a paginated list of study activities."""
         return self.dao.get_study_activities(page, per_page)
+
+    def get_activities_after(self, after=None, per_page: int = 10, include_total: bool = False):
+        """Retrieve the page of study activities following a cursor key."""
+        return self.dao.get_study_activities_after(after, per_page, include_total)
     
     def add_study_session(self, activity_id: int, group_id: int) -> bool:
         """Add a study session associated with a study activity."""
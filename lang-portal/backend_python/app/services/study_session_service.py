@@ -15,19 +15,70 @@ class StudySessionService:
         """Retrieve all study sessions for a specific study activity."""
         return self.dao.get_study_session_by_id(activity_id,True)
 
-    def record_word_reviews(self, session_id: int, reviews: list) -> bool:
-        """Record word reviews for a specific study session."""
-        # Logic to process and save reviews
-        for review in reviews:
-            # Save each review to the database (implement this in the DAO)
-            self.dao.add_review(session_id, review['word_id'], review['correct'])
-        return True
+    def record_word_reviews(self, session_id: int, reviews: list, idempotency_key: str = None) -> tuple:
+        """Validate and record a batch of word reviews for a study session.
+
+        Returns (summary, errors); nothing is written unless the whole batch is valid.
+        With DB_WRITE_MODE=async the summary only says the batch was queued.
+        """
+        if not isinstance(reviews, list) or not reviews:
+            return None, ["reviews must be a non-empty list"]
+
+        errors = []
+        parsed = []
+        for index, review in enumerate(reviews):
+            if not isinstance(review, dict):
+                errors.append(f"reviews[{index}]: must be an object")
+                continue
+            try:
+                word_id = int(review.get('word_id'))
+            except (TypeError, ValueError):
+                word_id = None
+            correct = review.get('correct')
+            for error in StudyReview(study_session_id=session_id, word_id=word_id).validate():
+                errors.append(f"reviews[{index}]: {error}")
+            if not isinstance(correct, bool):
+                errors.append(f"reviews[{index}]: correct must be true or false")
+            if word_id and isinstance(correct, bool):
+                parsed.append((word_id, correct))
+        if errors:
+            return None, errors
+
+        missing = set(self.dao.get_missing_word_ids([word_id for word_id, _ in parsed]))
+        if missing:
+            return None, [
+                f"reviews[{index}]: word {word_id} not found"
+                for index, (word_id, _) in enumerate(parsed) if word_id in missing
+            ]
+
+        summary = self.dao.add_reviews(session_id, parsed, idempotency_key)
+        if summary is None:
+            # Queued by the asynchronous writer; the accuracy is only known once it commits
+            summary = {
+                'session_id': session_id,
+                'reviews_recorded': len(parsed),
+                'correct_count': sum(1 for _, correct in parsed if correct),
+                'queued': True
+            }
+        return summary, []
+
+    def session_exists(self, session_id: int) -> bool:
+        """Check whether a study session exists."""
+        return self.dao.session_exists(session_id)
 
     def get_study_session_progress(self, session_id: int) -> dict:
         """Retrieve progress of a specific study session."""
         # Logic to calculate and return progress
         return {"progress": "some progress data"}  # Replace with actual logic
     
-    def get_all_study_sessions(self) -> list:
-        """Retrieve all study sessions."""
-        return self.dao.get_all_study_sessions()  # Implement this in DAO as well
\ No newline at end of file
+    def get_study_sessions_after(self, after=None, per_page: int = 10, include_total: bool = False):
+        """Retrieve the page of study sessions following a cursor key."""
+        return self.dao.get_study_sessions_after(after, per_page, include_total)
+
+    def iter_study_sessions(self, chunk_size: int = 500):
+        """Stream all study sessions in chunks."""
+        return self.dao.iter_study_sessions(chunk_size)
+
+    def iter_session_reviews(self, session_id: int, chunk_size: int = 500):
+        """Stream the reviews of a study session in chunks."""
+        return self.dao.iter_session_reviews(session_id, chunk_size)
@@ -1,19 +1,78 @@
 from typing import Dict, List, Optional, Tuple
 from ..dao.word_dao import WordDAO
+from ..dao.version_dao import VersionDAO
 from ..models.word import Word
 
 class WordService:
+    STATS_SORT_OPTIONS = tuple(WordDAO.STATS_SORT_COLUMNS)
+
     def __init__(self, db_path: str):
         self.word_dao = WordDAO(db_path)
+        self.version_dao = VersionDAO(db_path)
     
     def get_words(self, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
         """Get paginated list of words"""
         return self.word_dao.get_words(page, per_page)
     
+    def get_words_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                        include_total: bool = False) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of words following a cursor key"""
+        return self.word_dao.get_words_after(after, per_page, include_total)
+    
+    def get_reviewed_words(self, page: int = 1, per_page: int = 10, sort: str = 'id', order: str = 'asc',
+                           min_reviews: int = 1) -> Tuple[List[Dict], int, Optional[Tuple]]:
+        """Get a page of reviewed words with their stats, in stats order"""
+        return self.word_dao.get_reviewed_words(page, per_page, sort, order, min_reviews)
+    
+    def get_reviewed_words_after(self, after: Optional[Tuple] = None, per_page: int = 10,
+                                 include_total: bool = False, sort: str = 'id', order: str = 'asc',
+                                 min_reviews: int = 1) -> Tuple[List[Dict], Optional[int], Optional[Tuple]]:
+        """Get the page of reviewed words following a cursor key"""
+        return self.word_dao.get_reviewed_words_after(after, per_page, include_total, sort, order, min_reviews)
+    
+    def rebuild_word_stats(self) -> int:
+        """Recompute the per-word review stats from the reviews"""
+        return self.word_dao.rebuild_word_stats()
+    
+    def verify_word_stats(self) -> List[Dict]:
+        """List the words whose stored review stats differ from a recomputation"""
+        return self.word_dao.verify_word_stats()
+    
     def get_word_by_id(self, word_id: int) -> Optional[Dict]:
         """Get a word by its ID"""
         return self.word_dao.get_word_by_id(word_id)
     
+    def search_words(self, query: str, page: int = 1, per_page: int = 10,
+                     prefix: bool = True) -> Tuple[List[Dict], int]:
+        """Get a page of words matching a full-text query"""
+        return self.word_dao.search_words(query, page, per_page, prefix)
+    
+    def refresh_embeddings(self, index) -> Dict:
+        """Embed new and changed words into the index, dropping deleted ones"""
+        version = self.version_dao.get_versions(['words']).get('words')
+        return index.refresh(self.word_dao.get_embedding_rows(), source_version=version)
+    
+    def semantic_search(self, index, query: str, limit: int = 10,
+                        refresh_timeout: Optional[float] = 0) -> Tuple[List[Dict], bool]:
+        """Get the words closest in meaning to a query, best match first
+
+        When words changed since the index was last refreshed, a refresh
+        starts in the background and the search waits up to
+        ``refresh_timeout`` seconds for it before using the vectors it has.
+        Returns the words and whether the index was up to date.
+        """
+        # Only re-read the words table when it changed since the last refresh
+        version = self.version_dao.get_versions(['words']).get('words')
+        current = index.refresh_in_background(self.word_dao.get_embedding_rows, version, refresh_timeout)
+        
+        matches = index.search(query, limit)
+        words = self.word_dao.get_words_by_ids([word_id for word_id, _ in matches])
+        return [
+            dict(words[word_id], score=round(score, 4))
+            for word_id, score in matches
+            if word_id in words
+        ], current
+    
     def create_word(self, word_data: Dict) -> Optional[Dict]:
         """Create a new word"""
         # Create and validate word model
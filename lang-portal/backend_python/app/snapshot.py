@@ -0,0 +1,335 @@
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .compression import available_encodings, brotli, negotiate_encoding
+from .dao.snapshot_dao import SnapshotDAO
+
+snapshot_log = logging.getLogger('app.snapshot')
+
+# Content codings a snapshot is stored in, most preferred first
+ENCODINGS = ('br', 'gzip', 'identity')
+SUFFIXES = {'identity': '.json', 'gzip': '.json.gz', 'br': '.json.br'}
+# Hex digits of the body's SHA-256 used as the snapshot version
+VERSION_LENGTH = 16
+VERSION_PATTERN = re.compile(rf'[0-9a-f]{{{VERSION_LENGTH}}}')
+# Quality 11 takes several seconds per megabyte for about 5% less
+BROTLI_QUALITY = 9
+FORMAT = 1
+
+def encode_vocabulary(words, groups, members) -> bytes:
+    """Serialize words, groups and memberships so that equal content always gives equal bytes"""
+    word_ids: Dict[int, List[int]] = {}
+    for group_id, word_id in members:
+        word_ids.setdefault(group_id, []).append(word_id)
+    document = {
+        'format': FORMAT,
+        'words': [{'id': word_id, 'kanji': kanji, 'romaji': romaji, 'english': english}
+                  for word_id, kanji, romaji, english in words],
+        'groups': [{'id': group_id, 'name': name, 'word_ids': word_ids.get(group_id, [])}
+                   for group_id, name in groups],
+    }
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def content_version(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:VERSION_LENGTH]
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        # A fixed mtime keeps the compressed bytes, and so their ETag, stable across rebuilds
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return body
+
+class MappedReader:
+    """File-like view of a shared memory map with its own read position
+
+    Every response gets one, so concurrent downloads of the same snapshot
+    never move each other's position. Closing it leaves the map open.
+    """
+
+    def __init__(self, buffer: mmap.mmap):
+        self._buffer = buffer
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._buffer) if size is None or size < 0 else min(self._position + size, len(self._buffer))
+        data = self._buffer[self._position:end]
+        self._position = max(end, self._position)
+        return data
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: len(self._buffer)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        pass
+
+class Snapshot:
+    """One built snapshot, memory-mapped once per content coding
+
+    ``info`` is the metadata written next to the files: the version, when
+    it was generated, the row counts and the size of every encoding.
+    """
+
+    def __init__(self, info: Dict, paths: Dict[str, str]):
+        self.info = info
+        self.version = info['version']
+        self._maps = {}
+        for encoding, path in paths.items():
+            with open(path, 'rb') as f:
+                self._maps[encoding] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def encodings(self) -> tuple:
+        return tuple(encoding for encoding in ENCODINGS if encoding in self._maps)
+
+    def negotiate(self, accept_encodings) -> str:
+        """Pick the most preferred stored encoding the client accepts, else identity"""
+        return negotiate_encoding(accept_encodings, self.encodings)
+
+    def size(self, encoding: str) -> int:
+        return len(self._maps[encoding])
+
+    def open(self, encoding: str) -> MappedReader:
+        return MappedReader(self._maps[encoding])
+
+class SnapshotStore:
+    """Content-addressed vocabulary snapshots built in the background
+
+    Each snapshot is written to ``directory`` as ``vocabulary-<version>``
+    files, one per encoding plus ``.meta.json``, where the version is a hash
+    of the JSON body, so its URL never serves different bytes. A rebuild
+    starts when the words, groups or group_words counters in table_versions
+    have moved since the current snapshot was read; until it finishes the
+    current one keeps being served. ``watch`` polls those counters so writes
+    from any process start the rebuild without waiting for a request. The
+    last ``keep`` snapshots stay available so clients that just fetched the
+    metadata can still download.
+    """
+
+    def __init__(self, db_path: str, directory: str, keep: int = 2):
+        self.dao = SnapshotDAO(db_path)
+        self.directory = directory
+        self.keep = max(keep, 1)
+        self._lock = threading.Lock()
+        # Oldest first; the last one is the current snapshot
+        self._snapshots: 'OrderedDict[str, Snapshot]' = OrderedDict()
+        self._built_from: Optional[Dict[str, int]] = None
+        self._built = set()
+        self._builder: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def current(self) -> Optional[Snapshot]:
+        with self._lock:
+            return next(reversed(self._snapshots.values()), None)
+
+    def refresh(self, timeout: Optional[float] = 0) -> Optional[Snapshot]:
+        """Start a rebuild if the source tables changed, waiting up to ``timeout`` seconds for it
+
+        Returns the current snapshot afterwards, which is None until the
+        first build finishes. ``timeout=None`` waits for as long as it takes.
+        """
+        with self._lock:
+            if self._builder is None or not self._builder.is_alive():
+                self._builder = None
+                if self.dao.get_source_versions() != self._built_from:
+                    self._builder = threading.Thread(target=self._build_in_background,
+                                                     name='snapshot-builder', daemon=True)
+                    self._builder.start()
+            builder = self._builder
+        if builder is not None and timeout != 0:
+            builder.join(timeout)
+        return self.current()
+
+    def watch(self, interval: float) -> None:
+        """Check the source tables every ``interval`` seconds, rebuilding in the background when they moved"""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                             name='snapshot-watcher', daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            try:
+                self.refresh(0)
+            except Exception:
+                snapshot_log.exception('Checking the vocabulary tables for changes failed')
+
+    def close(self) -> None:
+        """Stop watching and wait for a build in progress to finish"""
+        self._stopped.set()
+        with self._lock:
+            threads = [self._watcher, self._builder]
+        for thread in threads:
+            if thread is not None:
+                thread.join()
+
+    def is_current(self, snapshot: Snapshot) -> bool:
+        """Whether ``snapshot`` is the latest build and the source tables have not moved since"""
+        with self._lock:
+            latest = next(reversed(self._snapshots.values()), None)
+            built_from = self._built_from
+        return snapshot is latest and built_from == self.dao.get_source_versions()
+
+    def get(self, version: str, timeout: Optional[float] = 0) -> Optional[Snapshot]:
+        """Return the snapshot with this version, or None if it is unknown
+
+        Versions built by another process sharing the directory are loaded
+        from disk. A version this process has not built yet is looked for
+        again after a rebuild, waiting up to ``timeout`` seconds for it.
+        """
+        if not VERSION_PATTERN.fullmatch(version):
+            return None
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+        if snapshot is None:
+            snapshot = self._load(version)
+        if snapshot is None and timeout != 0:
+            self.refresh(timeout)
+            with self._lock:
+                snapshot = self._snapshots.get(version)
+        return snapshot
+
+    def _path(self, version: str, suffix: str) -> str:
+        return os.path.join(self.directory, f'vocabulary-{version}{suffix}')
+
+    def _load(self, version: str) -> Optional[Snapshot]:
+        try:
+            with open(self._path(version, '.meta.json'), encoding='utf-8') as f:
+                info = json.load(f)
+            snapshot = Snapshot(info, {encoding: self._path(version, SUFFIXES[encoding])
+                                       for encoding in info['sizes']})
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            snapshot = self._snapshots.get(version, snapshot)
+            # Served alongside this process's own snapshots but never made current
+            self._snapshots[version] = snapshot
+            self._snapshots.move_to_end(version, last=False)
+            removed = self._trim()
+        for old_version in removed:
+            self._remove_files(old_version)
+        return snapshot
+
+    def _build_in_background(self) -> None:
+        try:
+            self.build()
+        except Exception:
+            snapshot_log.exception('Building the vocabulary snapshot failed')
+
+    def build(self) -> Snapshot:
+        """Read the vocabulary, write its files and make it the current snapshot"""
+        versions, words, groups, members = self.dao.read_vocabulary()
+        body = encode_vocabulary(words, groups, members)
+        version = content_version(body)
+
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+        if snapshot is None:
+            snapshot = self._load(version) or self._write(version, body, {
+                'version': version,
+                'format': FORMAT,
+                'generated_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+                'words': len(words),
+                'groups': len(groups),
+                'group_words': len(members),
+            })
+
+        with self._lock:
+            self._snapshots[version] = snapshot
+            self._snapshots.move_to_end(version)
+            self._built_from = versions
+            removed = self._trim()
+        for old_version in removed:
+            self._remove_files(old_version)
+        return snapshot
+
+    def _write(self, version: str, body: bytes, info: Dict) -> Snapshot:
+        paths, sizes = {}, {}
+        for encoding in available_encodings():
+            data = compress(body, encoding)
+            paths[encoding] = self._path(version, SUFFIXES[encoding])
+            sizes[encoding] = len(data)
+            self._replace(paths[encoding], data)
+        info = dict(info, sizes=sizes)
+        # The metadata goes last: other processes only load versions that have it
+        self._replace(self._path(version, '.meta.json'), json.dumps(info).encode('utf-8'))
+        self._built.add(version)
+        return Snapshot(info, paths)
+
+    @staticmethod
+    def _replace(path: str, data: bytes) -> None:
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _trim(self) -> List[str]:
+        """Forget the oldest snapshots beyond ``keep``; returns the versions whose files this process wrote"""
+        removed = []
+        while len(self._snapshots) > self.keep:
+            version, _ = self._snapshots.popitem(last=False)
+            if version in self._built:
+                self._built.discard(version)
+                removed.append(version)
+        return removed
+
+    def _remove_files(self, version: str) -> None:
+        # Responses still streaming an old snapshot keep reading their map after the unlink
+        for suffix in ('.meta.json', *SUFFIXES.values()):
+            try:
+                os.remove(self._path(version, suffix))
+            except FileNotFoundError:
+                pass
+
+_stores: Dict[str, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+def register_store(db_path: str, store: Optional[SnapshotStore]) -> Optional[SnapshotStore]:
+    """Install (or with None, remove) the snapshot store for ``db_path``, closing any previous one"""
+    with _stores_lock:
+        previous = _stores.pop(db_path, None)
+        if store is not None:
+            _stores[db_path] = store
+    if previous is not None and previous is not store:
+        previous.close()
+    return store
+
+def get_store(app) -> SnapshotStore:
+    """Return the app's snapshot store, creating it on first use"""
+    store = app.extensions.get('vocabulary_snapshot')
+    if store is None:
+        store = app.extensions['vocabulary_snapshot'] = register_store(app.config['DATABASE'], SnapshotStore(
+            app.config['DATABASE'],
+            app.config['SNAPSHOT_DIR'] or os.path.join(app.instance_path, 'snapshots'),
+            keep=app.config['SNAPSHOT_KEEP'],
+        ))
+    return store
+
+def init_app(app) -> SnapshotStore:
+    """Create the app's snapshot store and watch its tables unless SNAPSHOT_WATCH_INTERVAL is 0"""
+    store = get_store(app)
+    if app.config['SNAPSHOT_WATCH_INTERVAL'] > 0:
+        store.watch(app.config['SNAPSHOT_WATCH_INTERVAL'])
+    return store
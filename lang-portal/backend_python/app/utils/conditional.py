@@ -0,0 +1,39 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from ..dao.version_dao import VersionDAO
+
+def compute_etag(path: str, versions: dict) -> str:
+    """Strong ETag for a URL given the versions of the tables it reads"""
+    state = ';'.join(f'{table}={versions.get(table)}' for table in sorted(versions))
+    return hashlib.sha1(f'{path}|{state}'.encode('utf-8')).hexdigest()
+
+def conditional_get(*tables):
+    """Declare which tables a GET route reads so it can answer conditional requests
+
+    The ETag is derived from the tables' change counters only, so a matching
+    If-None-Match gets a 304 without running the route or touching its tables.
+    A route whose tables depend on its query string passes a single function
+    returning them for the current request instead. A view that sends
+    ``Cache-Control: no-store`` (its body lags behind the tables) gets no ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            names = tables[0]() if len(tables) == 1 and callable(tables[0]) else tables
+            versions = VersionDAO(current_app.config['DATABASE']).get_versions(names)
+            etag = compute_etag(request.full_path, versions)
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                # Caches match the 304 to the stored body, which varies with compression
+                response.vary.add('Accept-Encoding')
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.cache_control.no_store:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
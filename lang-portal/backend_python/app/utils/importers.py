@@ -0,0 +1,62 @@
+import codecs
+import csv
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+FORMATS = ('csv', 'jsonl')
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """Guess the import format from a file name or content type"""
+    name = (filename or '').lower()
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if name.endswith('.csv') or mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')) or mimetype in ('application/x-ndjson', 'application/jsonl',
+                                                            'application/x-jsonlines'):
+        return 'jsonl'
+    return None
+
+def decode_lines(binary_stream: Iterable[bytes]) -> Iterator[str]:
+    """Decode a binary stream line by line, dropping a UTF-8 byte order mark"""
+    return codecs.iterdecode(binary_stream, 'utf-8-sig')
+
+def read_records(stream: Iterable[str], fmt: str,
+                 required_columns: Sequence[str] = ()) -> Iterator[Tuple[int, Union[Dict, str]]]:
+    """Yield (line number, record) from a CSV or JSONL text stream one at a time
+
+    A line that cannot be parsed yields an error message instead of a record,
+    so one bad line does not abort the import. A CSV header missing any of
+    ``required_columns`` raises ValueError.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        missing = [column for column in required_columns if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "Each line must be a JSON object"
+                continue
+            yield line_number, record
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most ``size`` items without materialising it"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
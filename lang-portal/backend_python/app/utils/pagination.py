@@ -1,5 +1,8 @@
+import base64
+import json
 from flask import request
 from math import ceil
+from urllib.parse import urlencode
 
 def get_pagination_params():
     """Get pagination parameters from request"""
@@ -19,16 +22,84 @@ def get_pagination_params():
     except ValueError:
         return 1, 10
 
-def paginate_response(items, total_count, page, per_page):
+def encode_cursor(key):
+    """Encode a (sort_key, id) tuple as an opaque cursor token"""
+    if key is None:
+        return None
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decode a cursor token back into a (sort_key, id) tuple
+
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, list) or len(key) != 2 or not isinstance(key[1], int):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+def is_cursor_request():
+    """Whether the client asked for cursor (keyset) pagination"""
+    return 'cursor' in request.args
+
+def get_cursor_params():
+    """Get cursor pagination parameters from request
+
+    An empty ``cursor`` starts from the first item. Returns
+    ``(after_key, per_page, include_total)``; raises ValueError for a
+    malformed cursor.
+    """
+    _, per_page = get_pagination_params()
+    token = request.args.get('cursor', '')
+    after = decode_cursor(token) if token else None
+    include_total = request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+    return after, per_page, include_total
+
+def _page_link(**params):
+    args = request.args.to_dict()
+    args.pop('page', None)
+    args.pop('cursor', None)
+    args.update(params)
+    return f"{request.path}?{urlencode(args)}"
+
+def paginate_response(items, total_count, page, per_page, next_key=None):
     """Create a paginated response"""
     total_pages = ceil(total_count / per_page) if per_page > 0 else 0
-    
+    next_cursor = encode_cursor(next_key)
+
     return {
         "items": items,
         "pagination": {
             "current_page": page,
             "total_pages": total_pages,
             "total_items": total_count,
-            "items_per_page": per_page
+            "items_per_page": per_page,
+            "next_cursor": next_cursor,
+            "links": {
+                "next": _page_link(cursor=next_cursor, per_page=per_page) if next_cursor else None
+            }
+        }
+    }
+
+def cursor_paginate_response(items, next_key, per_page, total_count=None):
+    """Create a cursor-paginated response"""
+    next_cursor = encode_cursor(next_key)
+    pagination = {
+        "items_per_page": per_page,
+        "next_cursor": next_cursor,
+        "links": {
+            "next": _page_link(cursor=next_cursor, per_page=per_page) if next_cursor else None
         }
     }
+    if total_count is not None:
+        pagination["total_items"] = total_count
+
+    return {
+        "items": items,
+        "pagination": pagination
+    }
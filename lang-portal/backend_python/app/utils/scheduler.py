@@ -0,0 +1,52 @@
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Optional
+
+# SM-2 constants
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# Reviews only record right/wrong; map them onto SM-2's 0-5 quality scale
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+# A missed word comes back later in the same sitting instead of tomorrow
+RELEARN_DELAY = timedelta(minutes=10)
+
+# Format of due_at/last_reviewed_at, the same as SQLite's datetime()
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+@dataclass(slots=True)
+class ScheduleState:
+    """SM-2 state of one word in one group"""
+    ease: float = INITIAL_EASE
+    interval_days: float = 0
+    repetitions: int = 0
+    lapses: int = 0
+    due_at: Optional[datetime] = None
+    last_reviewed_at: Optional[datetime] = None
+
+def format_timestamp(value: datetime) -> str:
+    return value.strftime(TIMESTAMP_FORMAT)
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a stored timestamp in either SQLite or isoformat() style"""
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+def review(state: ScheduleState, correct: bool, reviewed_at: datetime) -> ScheduleState:
+    """Return the state after one review, following SM-2"""
+    quality = CORRECT_QUALITY if correct else INCORRECT_QUALITY
+    ease = state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease = max(MIN_EASE, ease)
+
+    if not correct:
+        return replace(state, ease=ease, interval_days=0, repetitions=0, lapses=state.lapses + 1,
+                       due_at=reviewed_at + RELEARN_DELAY, last_reviewed_at=reviewed_at)
+
+    repetitions = state.repetitions + 1
+    if repetitions == 1:
+        interval = 1
+    elif repetitions == 2:
+        interval = 6
+    else:
+        interval = round(state.interval_days * state.ease)
+    return replace(state, ease=ease, interval_days=interval, repetitions=repetitions,
+                   due_at=reviewed_at + timedelta(days=interval), last_reviewed_at=reviewed_at)
@@ -0,0 +1,9 @@
+from flask import current_app
+
+def get_service(service_cls):
+    """Return the app-wide instance of a service, creating it on first use"""
+    services = current_app.extensions.setdefault('services', {})
+    service = services.get(service_cls)
+    if service is None:
+        service = services[service_cls] = service_cls(current_app.config['DATABASE'])
+    return service
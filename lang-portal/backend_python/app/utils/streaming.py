@@ -0,0 +1,57 @@
+import time
+from typing import Dict, Iterable, List
+from flask import current_app, request, stream_with_context
+from ..metrics import add_serialization_time
+
+# Formats a streamed list can be served in, and their content types
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+def get_stream_format() -> str:
+    """Format asked for by ``?format=`` or, failing that, an NDJSON Accept header
+
+    Raises ValueError for an unknown format.
+    """
+    fmt = request.args.get('format')
+    if fmt is None:
+        accepted = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+        return 'ndjson' if accepted == 'application/x-ndjson' else 'json'
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(STREAM_FORMATS)}")
+    return fmt
+
+def stream_response(chunks: Iterable[List[Dict]], fmt: str = 'json'):
+    """Stream lists of rows as they are fetched instead of building the whole body
+
+    ``json`` keeps the usual ``{"status": "success", "data": [...]}`` envelope
+    and writes the array piece by piece; ``ndjson`` writes one object per
+    line. Each chunk is encoded and sent on its own, so memory use depends on
+    the chunk size rather than the result size. The chunks are only pulled
+    once the client starts reading, inside the request context.
+    """
+    dumps = current_app.json.dumps
+
+    def encode(rows: List[Dict], separator: str) -> str:
+        started = time.perf_counter()
+        text = separator.join(dumps(row) for row in rows)
+        add_serialization_time(time.perf_counter() - started)
+        return text
+
+    def ndjson():
+        for rows in chunks:
+            if rows:
+                yield encode(rows, '\n') + '\n'
+
+    def json_array():
+        yield '{"status": "success", "data": ['
+        first = True
+        for rows in chunks:
+            if rows:
+                yield ('' if first else ',') + encode(rows, ',')
+                first = False
+        yield ']}\n'
+
+    body = ndjson() if fmt == 'ndjson' else json_array()
+    return current_app.response_class(stream_with_context(body), mimetype=STREAM_FORMATS[fmt])
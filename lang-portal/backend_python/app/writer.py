@@ -0,0 +1,262 @@
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from queue import Empty, Full, Queue
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from .db import ConnectionPool
+
+T = TypeVar('T')
+
+# direct: every DAO writes on its own pooled connection, as before
+# sync: writes go through the writer thread and the caller waits for the commit
+# async: like sync, but writes that allow it are acknowledged once queued
+WRITE_MODES = ('direct', 'sync', 'async')
+
+writer_log = logging.getLogger('app.writer')
+
+class WriteQueueFullError(RuntimeError):
+    """Raised when the write queue stays full for longer than the timeout"""
+
+class WriteTimeoutError(RuntimeError):
+    """Raised when a queued write is not committed within the timeout; it may still commit later"""
+
+class WriterStoppedError(RuntimeError):
+    """Raised for writes submitted to, or left queued on, a writer whose thread has stopped"""
+
+class _Job:
+    __slots__ = ('fn', 'future', 'queued_at')
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], object]):
+        self.fn = fn
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+class DatabaseWriter:
+    """Single thread that owns the read-write connection for queued writes.
+
+    Jobs are functions of a connection that must not commit. The thread takes
+    the first job off the queue, collects whatever else arrives within
+    ``window`` seconds (up to ``max_batch`` jobs) and runs them all in one
+    transaction, each under its own savepoint so a failing job is rolled back
+    alone and only its caller sees the error. One commit then covers the whole
+    batch, so concurrent writers share a single fsync and never wait on
+    SQLite's write lock.
+    """
+
+    def __init__(self, pool: ConnectionPool, mode: str = 'sync', queue_size: int = 1000,
+                 window: float = 0.002, max_batch: int = 64, timeout: float = 5.0):
+        if mode not in WRITE_MODES[1:]:
+            raise ValueError(f"mode must be one of {', '.join(WRITE_MODES[1:])}")
+        self.pool = pool
+        self.mode = mode
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        # Called with (jobs in the batch, seconds from BEGIN to COMMIT, seconds each job waited in the queue)
+        self.commit_listeners: List[Callable[[int, float, List[float]], None]] = []
+        # Applied to each job on the submitting thread, e.g. to carry per-request metrics over
+        self.wrap_job: Optional[Callable[[Callable], Callable]] = None
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = {'jobs': 0, 'failed_jobs': 0, 'commits': 0, 'failed_commits': 0, 'rejected': 0}
+        self._conn = pool.connect()
+        self._thread = threading.Thread(target=self._run, name=f'db-writer:{pool.db_path}', daemon=True)
+        self._thread.start()
+
+    @property
+    def asynchronous(self) -> bool:
+        return self.mode == 'async'
+
+    def submit(self, fn: Callable[[sqlite3.Connection], T]) -> 'Future[T]':
+        """Queue a write and return a future resolved once its batch commits"""
+        if threading.current_thread() is self._thread:
+            # A job that writes through another DAO joins the running transaction
+            future = Future()
+            future.set_result(fn(self._conn))
+            return future
+        if not self._thread.is_alive():
+            raise WriterStoppedError(f"The writer thread for {self.pool.db_path} is not running")
+        job = _Job(self.wrap_job(fn) if self.wrap_job is not None else fn)
+        try:
+            self._queue.put(job, timeout=self.timeout)
+        except Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise WriteQueueFullError(
+                f"Write queue still full after {self.timeout}s ({self._queue.maxsize} writes waiting)"
+            )
+        return job.future
+
+    def execute(self, fn: Callable[[sqlite3.Connection], T], deferrable: bool = False) -> Optional[T]:
+        """Run a write through the queue and return its result
+
+        In async mode a ``deferrable`` write returns None as soon as it is
+        queued; its errors are only logged.
+        """
+        future = self.submit(fn)
+        if deferrable and self.asynchronous:
+            future.add_done_callback(self._log_failure)
+            return None
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise WriteTimeoutError(f"Write not committed within {self.timeout}s") from None
+
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            writer_log.error('Queued write failed', exc_info=error)
+
+    def _run(self) -> None:
+        batch: List[_Job] = []
+        try:
+            with self.pool.pinned(self._conn):
+                stopping = False
+                while not stopping:
+                    job = self._queue.get()
+                    if job is None:
+                        break
+                    batch = [job]
+                    deadline = time.perf_counter() + self.window
+                    while len(batch) < self.max_batch:
+                        try:
+                            job = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                        except Empty:
+                            break
+                        if job is None:
+                            stopping = True
+                            break
+                        batch.append(job)
+                    try:
+                        self._commit(batch)
+                    except Exception as e:
+                        writer_log.exception('Write batch failed')
+                        self._fail(batch, e)
+                    batch = []
+        finally:
+            # However the thread ends, no caller is left waiting on a write it will not run
+            stopped = WriterStoppedError(f"The writer thread for {self.pool.db_path} stopped")
+            self._fail(batch, stopped)
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except Empty:
+                    break
+                if job is not None:
+                    self._fail([job], stopped)
+            self._conn.close()
+
+    @staticmethod
+    def _fail(batch: List[_Job], error: BaseException) -> None:
+        """Resolve the jobs of ``batch`` that are still pending with ``error``"""
+        for job in batch:
+            if not job.future.done():
+                job.future.set_exception(error)
+
+    def _commit(self, batch: List[_Job]) -> None:
+        conn = self._conn
+        started = time.perf_counter()
+        waits = [started - job.queued_at for job in batch]
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                conn.execute('SAVEPOINT job')
+                try:
+                    result = job.fn(conn)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    outcomes.append((job, None, e))
+                else:
+                    conn.execute('RELEASE job')
+                    outcomes.append((job, result, None))
+            conn.commit()
+        except Exception as e:
+            # BEGIN or COMMIT failed (a long write elsewhere held the lock past the busy timeout)
+            if conn.in_transaction:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    writer_log.exception('Rollback of a failed batch failed')
+            with self._lock:
+                self._stats['jobs'] += len(batch)
+                self._stats['failed_jobs'] += len(batch)
+                self._stats['failed_commits'] += 1
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        with self._lock:
+            self._stats['jobs'] += len(batch)
+            self._stats['failed_jobs'] += failed
+            self._stats['commits'] += 1
+        for listener in self.commit_listeners:
+            try:
+                listener(len(batch), elapsed, waits)
+            except Exception:
+                writer_log.exception('Commit listener failed')
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    def stats(self) -> Dict:
+        """Return queue depth and job and commit counts"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'mode': self.mode,
+            'queue_depth': self._queue.qsize(),
+            'queue_size': self._queue.maxsize,
+        })
+        return stats
+
+    def close(self) -> None:
+        """Finish the queued writes and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+_writers: Dict[str, DatabaseWriter] = {}
+_writers_lock = threading.Lock()
+
+def get_writer(db_path: str) -> Optional[DatabaseWriter]:
+    """Return the writer registered for ``db_path``; None means DAOs write directly"""
+    return _writers.get(db_path)
+
+def register_writer(db_path: str, writer: Optional[DatabaseWriter]) -> Optional[DatabaseWriter]:
+    """Install (or with None, remove) the writer for ``db_path``, stopping any previous one"""
+    with _writers_lock:
+        previous = _writers.pop(db_path, None)
+        if writer is not None:
+            _writers[db_path] = writer
+    if previous is not None:
+        previous.close()
+    return writer
+
+def init_app(app) -> Optional[DatabaseWriter]:
+    """Start the writer thread for the app's database unless DB_WRITE_MODE is direct"""
+    mode = app.config['DB_WRITE_MODE']
+    if mode not in WRITE_MODES:
+        raise ValueError(f"DB_WRITE_MODE must be one of {', '.join(WRITE_MODES)}")
+    writer = None
+    if mode != 'direct':
+        writer = DatabaseWriter(
+            app.extensions['db_pool'],
+            mode=mode,
+            queue_size=app.config['DB_WRITE_QUEUE_SIZE'],
+            window=app.config['DB_GROUP_COMMIT_MS'] / 1000,
+            max_batch=app.config['DB_GROUP_COMMIT_MAX'],
+            timeout=app.config['DB_POOL_TIMEOUT']
+        )
+        app.extensions['db_writer'] = writer
+    register_writer(app.config['DATABASE'], writer)
+    return writer
@@ -0,0 +1,405 @@
+"""Latency, throughput and memory of every API route on a synthetic dataset
+
+Each route is driven first in-process through the Flask test client (no
+network, one request at a time) and then over real HTTP by a pool of client
+threads against a threaded server. Results are JSON so runs on two commits
+can be compared with ``python -m benchmarks.compare``.
+
+Usage: python -m benchmarks.bench_endpoints [--scale 10k] [--requests 200]
+           [--concurrency 8] [--dataset PATH] [--only REGEX] [--output FILE]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from app.db import close_pool
+from app.dao.snapshot_dao import SnapshotDAO
+from app.snapshot import content_version, encode_vocabulary
+from .datasets import ENGLISH, SCALES
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # URL rule as registered with Flask, used to check that every route is covered
+    rule: str
+    # (context, request index) -> (path with query string, JSON body or raw body or None)
+    build: Callable
+
+class Context:
+    """What the scenarios need to know about the dataset while it changes under them"""
+
+    def __init__(self, db_path: str, seed: int):
+        self.db_path = db_path
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.created: Dict[str, range] = {}
+        self._before: Dict[str, int] = {}
+        # (table versions, content version) of the last snapshot version worked out
+        self._snapshot: Tuple[Optional[Dict], str] = (None, '')
+        self.max_id = {table: self._sequence(table) for table in
+                       ('words', 'groups', 'study_activities', 'study_sessions')}
+
+    def _sequence(self, table: str) -> int:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+
+    def recent_changes(self, count: int) -> int:
+        """A change log position ``count`` entries behind the latest one"""
+        return max(self._sequence('change_log') - count, 0)
+
+    def random_id(self, table: str) -> int:
+        with self.lock:
+            return self.rng.randint(1, self.max_id[table])
+
+    def choice(self, values):
+        with self.lock:
+            return self.rng.choice(values)
+
+    def before_create(self, table: str):
+        self._before[table] = self._sequence(table)
+
+    def after_create(self, table: str):
+        self.created[table] = range(self._before[table] + 1, self._sequence(table) + 1)
+
+    def created_id(self, table: str, index: int) -> int:
+        ids = self.created.get(table)
+        return ids[index % len(ids)] if ids else 0
+
+    def snapshot_version(self) -> str:
+        """Version the server gives the vocabulary as it stands now, recomputed only after it changes"""
+        dao = SnapshotDAO(self.db_path)
+        with self.lock:
+            if self._snapshot[0] != dao.get_source_versions():
+                versions, words, groups, members = dao.read_vocabulary()
+                self._snapshot = (versions, content_version(encode_vocabulary(words, groups, members)))
+            return self._snapshot[1]
+
+def _word_body(prefix: str, index: int) -> Dict:
+    return {'kanji': f'試{prefix}{index}', 'romaji': f'{prefix}{index}', 'english': f'{prefix} word {index}'}
+
+def _import_body(ctx: Context, index: int) -> bytes:
+    stamp = f'{os.getpid()}_{index}_{ctx.random_id("words")}'
+    return ''.join(json.dumps({'kanji': f'輸{stamp}_{n}', 'romaji': f'yunyu{stamp}_{n}', 'english': f'import {n}'},
+                              ensure_ascii=False) + '\n' for n in range(100)).encode()
+
+def _reviews_body(ctx: Context, index: int) -> Dict:
+    return {'reviews': [{'word_id': ctx.random_id('words'), 'correct': bool(n % 3)} for n in range(10)]}
+
+# Scenarios run in this order; creates come right before the updates and
+# deletes that consume the rows they made
+SCENARIOS: List[Scenario] = [
+    Scenario('words.list', 'GET', '/api/words',
+             lambda ctx, i: (f'/api/words?page={ctx.random_id("words") // 50 + 1}&per_page=50', None)),
+    Scenario('words.list_by_accuracy', 'GET', '/api/words',
+             lambda ctx, i: (f'/api/words?sort=accuracy&min_reviews={i % 5 + 1}&per_page=50', None)),
+    Scenario('words.get', 'GET', '/api/words/<int:word_id>',
+             lambda ctx, i: (f'/api/words/{ctx.random_id("words")}', None)),
+    Scenario('words.search', 'GET', '/api/words/search',
+             lambda ctx, i: (f'/api/words/search?q={ctx.choice(ENGLISH)}&per_page=20', None)),
+    Scenario('words.semantic_search', 'GET', '/api/words/semantic_search',
+             lambda ctx, i: (f'/api/words/semantic_search?q={ctx.choice(ENGLISH)}&limit=10', None)),
+    Scenario('words.create', 'POST', '/api/words',
+             lambda ctx, i: ('/api/words', _word_body(f'bench{ctx.random_id("words")}x', i))),
+    Scenario('words.update', 'PUT', '/api/words/<int:word_id>',
+             lambda ctx, i: (f'/api/words/{ctx.created_id("words", i)}', _word_body('updated', i))),
+    Scenario('words.delete', 'DELETE', '/api/words/<int:word_id>',
+             lambda ctx, i: (f'/api/words/{ctx.created_id("words", i)}', None)),
+    Scenario('words.import', 'POST', '/api/words/import',
+             lambda ctx, i: ('/api/words/import?format=jsonl', _import_body(ctx, i))),
+
+    Scenario('groups.list', 'GET', '/api/groups',
+             lambda ctx, i: (f'/api/groups?page={ctx.random_id("groups") // 10 + 1}&per_page=10', None)),
+    Scenario('groups.get', 'GET', '/api/groups/<int:group_id>',
+             lambda ctx, i: (f'/api/groups/{ctx.random_id("groups")}', None)),
+    Scenario('groups.summary', 'GET', '/api/groups/summary',
+             lambda ctx, i: (f'/api/groups/summary?page={ctx.random_id("groups") // 20 + 1}&per_page=20', None)),
+    Scenario('groups.words', 'GET', '/api/groups/<int:group_id>/words',
+             lambda ctx, i: (f'/api/groups/{ctx.random_id("groups")}/words?sort_by=english&per_page=50', None)),
+    Scenario('groups.words_export', 'GET', '/api/groups/<int:group_id>/words/export',
+             lambda ctx, i: (f'/api/groups/{ctx.random_id("groups")}/words/export?format=ndjson', None)),
+    Scenario('groups.due', 'GET', '/api/groups/<int:group_id>/due',
+             lambda ctx, i: (f'/api/groups/{ctx.random_id("groups")}/due?limit=20', None)),
+    Scenario('groups.add_word', 'POST', '/api/groups/<int:group_id>/words',
+             lambda ctx, i: (f'/api/groups/{ctx.random_id("groups")}/words', {'word_id': ctx.random_id('words')})),
+    Scenario('groups.create', 'POST', '/api/groups',
+             lambda ctx, i: ('/api/groups', {'name': f'Bench group {i}'})),
+    Scenario('groups.update', 'PUT', '/api/groups/<int:group_id>',
+             lambda ctx, i: (f'/api/groups/{ctx.created_id("groups", i)}', {'name': f'Renamed group {i}'})),
+    Scenario('groups.delete', 'DELETE', '/api/groups/<int:group_id>',
+             lambda ctx, i: (f'/api/groups/{ctx.created_id("groups", i)}', None)),
+
+    Scenario('study_activities.list', 'GET', '/api/study_activities',
+             lambda ctx, i: ('/api/study_activities?page=1&per_page=10', None)),
+    Scenario('study_activities.get', 'GET', '/api/study_activities/<int:activity_id>',
+             lambda ctx, i: (f'/api/study_activities/{ctx.random_id("study_activities")}', None)),
+    Scenario('study_activities.create', 'POST', '/api/study_activities',
+             lambda ctx, i: ('/api/study_activities', {'name': f'Bench activity {i}', 'url': 'http://localhost/a'})),
+    Scenario('study_activities.update', 'PUT', '/api/study_activities/<int:activity_id>',
+             lambda ctx, i: (f'/api/study_activities/{ctx.created_id("study_activities", i)}',
+                             {'name': f'Renamed activity {i}', 'url': 'http://localhost/b'})),
+    Scenario('study_activities.delete', 'DELETE', '/api/study_activities/<int:activity_id>',
+             lambda ctx, i: (f'/api/study_activities/{ctx.created_id("study_activities", i)}', None)),
+
+    Scenario('study_sessions.list', 'GET', '/api/study_sessions',
+             lambda ctx, i: ('/api/study_sessions', None)),
+    Scenario('study_sessions.get', 'GET', '/api/study_sessions/<int:id>',
+             lambda ctx, i: (f'/api/study_sessions/{ctx.random_id("study_sessions")}', None)),
+    Scenario('study_sessions.progress', 'GET', '/api/study_sessions/<int:id>/progress',
+             lambda ctx, i: (f'/api/study_sessions/{ctx.random_id("study_sessions")}/progress', None)),
+    Scenario('study_sessions.reviews', 'GET', '/api/study_sessions/<int:id>/reviews',
+             lambda ctx, i: (f'/api/study_sessions/{ctx.random_id("study_sessions")}/reviews?format=ndjson', None)),
+    Scenario('study_sessions.review', 'POST', '/api/study_sessions/<int:id>/review',
+             lambda ctx, i: (f'/api/study_sessions/{ctx.random_id("study_sessions")}/review', _reviews_body(ctx, i))),
+    Scenario('study_sessions.create', 'POST', '/api/study_sessions',
+             lambda ctx, i: ('/api/study_sessions', {'group_id': ctx.random_id('groups'),
+                                                     'study_activity_id': ctx.random_id('study_activities')})),
+    Scenario('study_sessions.delete', 'DELETE', '/api/study_sessions/<int:id>',
+             lambda ctx, i: (f'/api/study_sessions/{ctx.created_id("study_sessions", i)}', None)),
+
+    Scenario('dashboard.last_study_session', 'GET', '/api/dashboard/last_study_session',
+             lambda ctx, i: ('/api/dashboard/last_study_session', None)),
+    Scenario('dashboard.study_progress', 'GET', '/api/dashboard/study_progress',
+             lambda ctx, i: ('/api/dashboard/study_progress', None)),
+    Scenario('dashboard.quick_stats', 'GET', '/api/dashboard/quick_stats',
+             lambda ctx, i: ('/api/dashboard/quick_stats', None)),
+    # Alternates a month of days with the whole synthetic year in weeks
+    Scenario('dashboard.timeseries', 'GET', '/api/dashboard/timeseries',
+             lambda ctx, i: ('/api/dashboard/timeseries?from=2024-03-01&to=2024-03-31' if i % 2 else
+                             '/api/dashboard/timeseries?from=2024-01-01&to=2024-12-31&bucket=week', None)),
+
+    Scenario('snapshot.info', 'GET', '/api/snapshot', lambda ctx, i: ('/api/snapshot', None)),
+    Scenario('snapshot.download', 'GET', '/api/snapshot/<version>',
+             lambda ctx, i: (f'/api/snapshot/{ctx.snapshot_version()}', None)),
+
+    # Alternates the first page of a full sync with catching up on recent writes
+    Scenario('changes.list', 'GET', '/api/changes',
+             lambda ctx, i: (f'/api/changes?since={ctx.recent_changes(200) if i % 2 else 0}&limit=100', None)),
+    # The backlog only; a live stream would hold the connection for its timeout
+    Scenario('changes.stream', 'GET', '/api/changes/stream',
+             lambda ctx, i: (f'/api/changes/stream?since={ctx.recent_changes(100)}&timeout=0', None)),
+
+    Scenario('metrics.prometheus', 'GET', '/api/metrics', lambda ctx, i: ('/api/metrics', None)),
+    Scenario('metrics.slow_queries', 'GET', '/api/metrics/slow_queries',
+             lambda ctx, i: ('/api/metrics/slow_queries', None)),
+]
+
+# Table whose new ids a create scenario hands to the scenarios after it
+CREATES = {'words.create': 'words', 'groups.create': 'groups',
+           'study_activities.create': 'study_activities', 'study_sessions.create': 'study_sessions'}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (server and client share it)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def generate_in_subprocess(db_path: str, scale: str, seed: int) -> Dict:
+    """Build the dataset in a child process so its load peak stays out of this one's RSS"""
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.datasets', db_path, '--scale', scale,
+                             '--seed', str(seed)], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(result.stdout)
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    """Percentiles in milliseconds; the first request is reported separately as the cold cost"""
+    warm = sorted(latencies[1:] or latencies)
+    return {
+        'requests': len(latencies),
+        'statuses': _status_classes(statuses),
+        'first_ms': round(latencies[0] * 1000, 3) if latencies else None,
+        'p50_ms': round(percentile(warm, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(warm, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(warm, 0.99) * 1000, 3),
+        'max_ms': round(warm[-1] * 1000, 3) if warm else None,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def _status_classes(statuses: Counter) -> Dict[str, int]:
+    classes = Counter()
+    for code, count in statuses.items():
+        classes[f'{code // 100}xx'] += count
+    return dict(sorted(classes.items()))
+
+def _request_args(body) -> Dict:
+    if body is None:
+        return {}
+    if isinstance(body, bytes):
+        return {'data': body}
+    return {'json': body}
+
+def run_test_client(app, scenarios: List[Scenario], ctx: Context, count: int) -> Dict[str, Dict]:
+    """Send ``count`` requests per scenario through the in-process test client, one at a time"""
+    client = app.test_client()
+    results = {}
+    for scenario in scenarios:
+        if scenario.name in CREATES:
+            ctx.before_create(CREATES[scenario.name])
+        latencies, statuses = [], Counter()
+        started = time.perf_counter()
+        for index in range(count):
+            path, body = scenario.build(ctx, index)
+            sent = time.perf_counter()
+            response = client.open(path, method=scenario.method, **_request_args(body))
+            response.get_data()
+            latencies.append(time.perf_counter() - sent)
+            statuses[response.status_code] += 1
+        results[scenario.name] = summarize(latencies, statuses, time.perf_counter() - started)
+        if scenario.name in CREATES:
+            ctx.after_create(CREATES[scenario.name])
+    return results
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def run_http(app, scenarios: List[Scenario], ctx: Context, count: int, concurrency: int) -> Dict[str, Dict]:
+    """Send ``count`` requests per scenario over HTTP from ``concurrency`` client threads"""
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    local = threading.local()
+
+    def send(scenario: Scenario, index: int) -> Tuple[float, int]:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        path, body = scenario.build(ctx, index)
+        sent = time.perf_counter()
+        response = session.request(scenario.method, base_url + path, **_request_args(body))
+        return time.perf_counter() - sent, response.status_code
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for scenario in scenarios:
+                if scenario.name in CREATES:
+                    ctx.before_create(CREATES[scenario.name])
+                started = time.perf_counter()
+                outcomes = list(pool.map(lambda index: send(scenario, index), range(count)))
+                elapsed = time.perf_counter() - started
+                results[scenario.name] = summarize([latency for latency, _ in outcomes],
+                                                   Counter(code for _, code in outcomes), elapsed)
+                if scenario.name in CREATES:
+                    ctx.after_create(CREATES[scenario.name])
+    finally:
+        server.shutdown()
+        server_thread.join()
+    return results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix='bench_endpoints_')
+    db_path = os.path.join(workdir, 'bench.db')
+    try:
+        # A kept dataset is copied so the writes made by the run never touch it
+        if args.dataset and os.path.exists(args.dataset):
+            shutil.copyfile(args.dataset, db_path)
+            dataset = {'path': args.dataset, 'reused': True}
+        else:
+            dataset = generate_in_subprocess(db_path, args.scale, args.seed)
+            if args.dataset:
+                shutil.copyfile(db_path, args.dataset)
+
+        scenarios = [s for s in SCENARIOS if not args.only or re.search(args.only, s.name)]
+        app = create_app({
+            'DATABASE': db_path,
+            'EMBEDDING_DIR': os.path.join(workdir, 'embeddings'),
+            'SNAPSHOT_DIR': os.path.join(workdir, 'snapshots'),
+            'DB_POOL_SIZE': max(5, args.concurrency + 1),
+        })
+        # Failures are counted per route in the status classes; tracebacks would drown the output
+        app.logger.disabled = True
+        ctx = Context(db_path, args.seed)
+        # The peak only grows, so each phase is reported as how far it raised it
+        rss_start = peak_rss_mb()
+        test_client = run_test_client(app, scenarios, ctx, args.requests)
+        rss_test_client = peak_rss_mb()
+        http = run_http(app, scenarios, ctx, args.requests, args.concurrency)
+        rss_http = peak_rss_mb()
+    finally:
+        close_pool(db_path)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'seed': args.seed,
+            'requests_per_route': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'dataset': dataset,
+        'peak_rss_mb': {
+            'start': rss_start,
+            'test_client_growth': round(rss_test_client - rss_start, 1),
+            'http_growth': round(rss_http - rss_test_client, 1),
+            'end': rss_http,
+        },
+        'test_client': test_client,
+        'http': http,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route and client')
+    parser.add_argument('--concurrency', type=int, default=8, help='HTTP client threads')
+    parser.add_argument('--dataset', help='Reuse this generated database, or save the generated one here')
+    parser.add_argument('--only', help='Only run scenarios whose name matches this regex')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    results = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(results + '\n')
+    else:
+        print(results)
+
+if __name__ == '__main__':
+    main()
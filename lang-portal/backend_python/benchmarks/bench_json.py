@@ -0,0 +1,116 @@
+"""Encode time and payload size of API responses per JSON encoder and content coding
+
+Builds the ``{"status": "success", "data": ...}`` envelope for word and
+session lists of several sizes and for a session with its reviews, and times
+the JSON provider producing the response body: Flask's stock provider, this
+app's provider on the stdlib encoder and on orjson (when installed). Each body is then compressed with
+every coding the server can negotiate, recording size and time.
+
+Usage: python -m benchmarks.bench_json [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.compression import ResponseCompressor, available_encodings
+from app.dao.study_session_dao import StudySessionDAO
+from app.dao.word_dao import WordDAO
+from app.db import close_pool
+from app.serialization import FastJSONProvider, orjson
+from migrations.migrate import migrate
+from .bench_row_serialization import best_of, seed_words
+
+def seed_sessions(db_path, sessions, reviews_per_session):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO study_sessions (group_id, study_activity_id, start_time, created_at) "
+            "VALUES (1, 1, datetime('now', ?), datetime('now', ?))",
+            ((f'-{n} minutes', f'-{n} minutes') for n in range(sessions))
+        )
+        conn.executemany(
+            "INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (1, ?, ?)",
+            ((n % 4 + 1, n % 3 != 0) for n in range(reviews_per_session))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def encoders(app):
+    providers = {'flask_default': DefaultJSONProvider(app), 'stdlib': FastJSONProvider(app, 'stdlib')}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app, 'orjson')
+    return providers
+
+def payloads(db_path, rows):
+    words, sessions = WordDAO(db_path), StudySessionDAO(db_path)
+    return {
+        'words_page_50': words.get_words(1, 50)[0],
+        'words_page_1000': words.get_words(1, 1000)[0],
+        f'words_all_{rows}': words.get_words(1, rows + 4)[0],
+        'sessions_page_100': sessions.get_study_sessions(1, 100)[0],
+        # One object with nested reviews and words rather than a list
+        'session_with_500_reviews': sessions.get_study_session_by_id(1, include_reviews=True),
+    }
+
+def compressions(body, repeat):
+    results = {'identity': {'bytes': len(body)}}
+    for encoding in available_encodings():
+        if encoding == 'identity':
+            continue
+        for level in ((1, 6, 9) if encoding == 'gzip' else (4, 9)):
+            compressor = ResponseCompressor(gzip_level=level, brotli_quality=level)
+            seconds, data = best_of(repeat, lambda: compressor.compress(body, encoding))
+            if encoding == 'gzip':
+                assert zlib.decompress(data, 31) == body
+            results[f'{encoding}_{level}'] = {
+                'bytes': len(data),
+                'ratio': round(len(data) / len(body), 3),
+                'compress_ms': round(seconds * 1000, 3),
+            }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='Words in the database')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    try:
+        migrate(db_path, verbose=False)
+        seed_words(db_path, args.rows)
+        seed_sessions(db_path, 100, 500)
+        app = create_app({'DATABASE': db_path, 'METRICS_ENABLED': False})
+        providers = encoders(app)
+        results = {}
+        with app.test_request_context():
+            for name, rows in payloads(db_path, args.rows).items():
+                envelope = {'status': 'success', 'data': rows}
+                encode, bodies = {}, {}
+                for encoder, provider in providers.items():
+                    seconds, response = best_of(args.repeat, lambda: provider.response(envelope))
+                    bodies[encoder] = response.get_data()
+                    encode[encoder] = {'encode_ms': round(seconds * 1000, 3), 'bytes': len(bodies[encoder])}
+                    assert json.loads(bodies[encoder]) == json.loads(bodies['flask_default'])
+                fastest = 'orjson' if 'orjson' in providers else 'stdlib'
+                encode['speedup'] = round(encode['flask_default']['encode_ms'] / encode[fastest]['encode_ms'], 2)
+                results[name] = {
+                    'rows': len(rows) if isinstance(rows, list) else len(rows['reviews']),
+                    'encoders': encode,
+                    'compression': compressions(bodies[fastest], args.repeat),
+                }
+        print(json.dumps({'orjson': orjson is not None, 'payloads': results}, indent=2))
+    finally:
+        close_pool(db_path)
+        os.close(fd)
+        os.unlink(db_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Compare the dataclass round-trip with the row-factory fast path for word lists
+
+Usage: python -m benchmarks.bench_row_serialization [--rows 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from app.dao.word_dao import WordDAO
+from app.db import close_pool
+from app.models.word import Word
+from migrations.migrate import migrate
+
+def seed_words(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    try:
+        now = datetime.utcnow().isoformat()
+        conn.executemany(
+            'INSERT INTO words (kanji, romaji, english, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            ((f'語{i}', f'go{i}', f'word {i}', now, now) for i in range(rows))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def legacy_get_words(db_path, per_page):
+    """The pre-fast-path implementation: dataclass per row, parse then re-serialize timestamps"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, kanji, romaji, english, created_at, updated_at
+            FROM words ORDER BY id LIMIT ? OFFSET 0
+        ''', (per_page,))
+        return [
+            Word(
+                id=row[0],
+                kanji=row[1],
+                romaji=row[2],
+                english=row[3],
+                created_at=datetime.fromisoformat(row[4]) if row[4] else None,
+                updated_at=datetime.fromisoformat(row[5]) if row[5] else None
+            ).to_dict()
+            for row in cursor.fetchall()
+        ]
+    finally:
+        conn.close()
+
+def best_of(repeat, fn):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    try:
+        migrate(db_path, verbose=False)
+        seed_words(db_path, args.rows)
+        total = args.rows + 4
+        dao = WordDAO(db_path)
+
+        legacy_time, legacy_rows = best_of(args.repeat, lambda: legacy_get_words(db_path, total))
+        fast_time, (fast_rows, _) = best_of(args.repeat, lambda: dao.get_words(1, total))
+        assert legacy_rows == fast_rows, "fast path output differs from the dataclass path"
+
+        encode_time, _ = best_of(args.repeat, lambda: json.dumps(fast_rows))
+        print(json.dumps({
+            'rows': len(fast_rows),
+            'dataclass_path_s': round(legacy_time, 4),
+            'row_factory_path_s': round(fast_time, 4),
+            'speedup': round(legacy_time / fast_time, 2),
+            'json_encode_s': round(encode_time, 4),
+        }, indent=2))
+    finally:
+        close_pool(db_path)
+        os.close(fd)
+        os.unlink(db_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compare two bench_endpoints result files route by route
+
+Prints the change of a latency metric per route and client, and exits with
+status 1 when any route got slower than the threshold allows or started
+returning 5xx.
+
+Usage: python -m benchmarks.compare base.json head.json [--metric p95_ms] [--threshold 1.25]
+"""
+import argparse
+import json
+import sys
+
+PHASES = ('test_client', 'http')
+
+def compare(base: dict, head: dict, metric: str, threshold: float):
+    """Yield (phase, route, base value, head value, ratio, regressed) for routes present in both runs"""
+    for phase in PHASES:
+        for route, head_stats in head.get(phase, {}).items():
+            base_stats = base.get(phase, {}).get(route)
+            if base_stats is None:
+                continue
+            before, after = base_stats[metric], head_stats[metric]
+            ratio = after / before if before else None
+            new_errors = head_stats['statuses'].get('5xx', 0) > base_stats['statuses'].get('5xx', 0)
+            regressed = new_errors or (ratio is not None and ratio > threshold)
+            yield phase, route, before, after, ratio, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--metric', default='p95_ms', choices=('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'))
+    parser.add_argument('--threshold', type=float, default=1.25, help='Largest acceptable head/base ratio')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base['meta'].get('scale') != head['meta'].get('scale'):
+        print(f"warning: comparing scale {base['meta'].get('scale')} with {head['meta'].get('scale')}",
+              file=sys.stderr)
+
+    regressions = 0
+    print(f"{'client':<12} {'route':<34} {'base':>10} {'head':>10} {'ratio':>7}")
+    for phase, route, before, after, ratio, regressed in compare(base, head, args.metric, args.threshold):
+        regressions += regressed
+        shown = f'{ratio:.2f}' if ratio is not None else '-'
+        print(f"{phase:<12} {route:<34} {before:>10.3f} {after:>10.3f} {shown:>7}{'  REGRESSED' if regressed else ''}")
+    print(f"{regressions} regression(s) in {args.metric} above x{args.threshold}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Deterministic synthetic datasets for benchmarks
+
+The same scale and seed always produce the same rows, so results from two
+commits are measured against identical data.
+
+Usage: python -m benchmarks.datasets out.db [--scale 100k] [--seed 42]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from app.dao.change_dao import ChangeDAO
+from app.dao.dashboard_dao import DashboardDAO
+from app.dao.schedule_dao import ScheduleDAO
+from app.dao.word_dao import WordDAO
+from app.db import close_pool
+from migrations.migrate import migrate
+
+@dataclass(frozen=True)
+class Scale:
+    words: int
+    groups: int
+    activities: int
+    sessions: int
+    reviews: int
+    # Groups each word belongs to, on average
+    groups_per_word: float = 1.5
+
+SCALES = {
+    '10k': Scale(words=10_000, groups=20, activities=5, sessions=1_000, reviews=50_000),
+    '100k': Scale(words=100_000, groups=100, activities=10, sessions=10_000, reviews=500_000),
+    '1m': Scale(words=1_000_000, groups=500, activities=20, sessions=100_000, reviews=5_000_000),
+}
+
+# Timestamps are spread over a fixed window so the data never depends on today's date
+EPOCH = datetime(2024, 1, 1)
+SPAN = timedelta(days=365)
+
+SYLLABLES = [consonant + vowel for consonant in ('', 'k', 's', 't', 'n', 'h', 'm', 'r', 'g', 'b')
+             for vowel in 'aiueo']
+KANJI = [chr(code) for code in range(0x4E00, 0x4E00 + 400)]
+ENGLISH = ('cat dog bird fish tree river mountain rain snow wind fire water stone flower sun moon star '
+           'book pen desk chair door window house school teacher student friend family mother father '
+           'child name time day night morning evening week month year money food rice tea bread meat '
+           'red blue white black big small new old good bad hot cold fast slow high low long short '
+           'eat drink read write speak listen walk run swim sleep buy sell open close come go see know').split()
+
+def _encode(value: int, alphabet) -> str:
+    """Spell a number in the given alphabet, so every index gets a distinct string"""
+    parts = []
+    while True:
+        value, digit = divmod(value, len(alphabet))
+        parts.append(alphabet[digit])
+        if not value:
+            return ''.join(reversed(parts))
+
+def _timestamp(rng: random.Random) -> str:
+    return (EPOCH + timedelta(seconds=rng.randrange(int(SPAN.total_seconds())))).strftime('%Y-%m-%d %H:%M:%S')
+
+@contextmanager
+def suspended_triggers(conn):
+    """Drop every trigger for the duration of a bulk load and recreate them afterwards"""
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER {name}')
+    try:
+        yield
+    finally:
+        for _, sql in triggers:
+            conn.execute(sql)
+
+def _load(conn, scale: Scale, rng: random.Random):
+    # Words and sessions seeded by the migrations carry 'now' timestamps; reviews only use synthetic ones
+    seeded_words = conn.execute('SELECT COALESCE(MAX(id), 0) FROM words').fetchone()[0]
+    seeded_sessions = conn.execute('SELECT COALESCE(MAX(id), 0) FROM study_sessions').fetchone()[0]
+    words = ((_encode(i, KANJI), _encode(i, SYLLABLES),
+              ' '.join(rng.sample(ENGLISH, rng.randint(1, 2))), _timestamp(rng))
+             for i in range(scale.words))
+    conn.executemany('INSERT INTO words (kanji, romaji, english, created_at, updated_at) VALUES (?, ?, ?, ?, ?4)',
+                     words)
+    word_ids = [row[0] for row in conn.execute('SELECT id FROM words WHERE id > ? ORDER BY id', (seeded_words,))]
+
+    conn.executemany('INSERT INTO groups (name, description, created_at, updated_at) VALUES (?, ?, ?, ?3)',
+                     ((f'Group {i}', f'Synthetic group {i}', _timestamp(rng)) for i in range(scale.groups)))
+    group_ids = [row[0] for row in conn.execute('SELECT id FROM groups ORDER BY id')]
+
+    conn.executemany('INSERT INTO study_activities (name, url, created_at, updated_at) VALUES (?, ?, ?, ?3)',
+                     ((f'Activity {i}', f'http://localhost:8080/activity/{i}', _timestamp(rng))
+                      for i in range(scale.activities)))
+    activity_ids = [row[0] for row in conn.execute('SELECT id FROM study_activities ORDER BY id')]
+
+    members = {group_id: [] for group_id in group_ids}
+    links = []
+    extra = scale.groups_per_word - 1
+    for word_id in word_ids:
+        chosen = {rng.choice(group_ids)}
+        if rng.random() < extra:
+            chosen.add(rng.choice(group_ids))
+        for group_id in chosen:
+            members[group_id].append(word_id)
+            links.append((group_id, word_id, _timestamp(rng)))
+    conn.executemany('INSERT INTO group_words (group_id, word_id, created_at) VALUES (?, ?, ?)', links)
+
+    sessions = []
+    for _ in range(scale.sessions):
+        start = EPOCH + timedelta(seconds=rng.randrange(int(SPAN.total_seconds())))
+        sessions.append((rng.choice(group_ids), rng.choice(activity_ids), start,
+                         start + timedelta(minutes=rng.randint(5, 60))))
+    sessions.sort(key=lambda session: session[2])
+    conn.executemany('''
+        INSERT INTO study_sessions (group_id, study_activity_id, start_time, end_time, created_at)
+        VALUES (?, ?, ?, ?, ?3)
+    ''', ((group_id, activity_id, start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S'))
+          for group_id, activity_id, start, end in sessions))
+    session_rows = conn.execute('SELECT id, group_id, start_time FROM study_sessions WHERE id > ? ORDER BY id',
+                                (seeded_sessions,)).fetchall()
+
+    # Reviews are written session by session in time order, as the app would record them
+    per_session, remainder = divmod(scale.reviews, max(len(session_rows), 1))
+    def reviews():
+        for index, (session_id, group_id, start_time) in enumerate(session_rows):
+            pool = members[group_id] or word_ids
+            start = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
+            for n in range(per_session + (1 if index < remainder else 0)):
+                yield (session_id, rng.choice(pool), rng.random() < 0.7,
+                       (start + timedelta(seconds=10 * n)).strftime('%Y-%m-%d %H:%M:%S'))
+    conn.executemany('INSERT INTO study_reviews (study_session_id, word_id, correct, created_at) VALUES (?, ?, ?, ?)',
+                     reviews())
+
+def generate_dataset(db_path: str, scale: Scale, seed: int = 42) -> dict:
+    """Create a migrated database at ``db_path`` filled with a synthetic dataset
+
+    Triggers are suspended during the load and the tables they maintain
+    (dashboard stats, daily rollups, word stats, search index, review
+    schedules, ETag versions) are rebuilt once at the end. Returns the row
+    counts and load timings.
+    """
+    started = time.perf_counter()
+    migrate(db_path, verbose=False)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA cache_size = -200000')
+        with conn:
+            with suspended_triggers(conn):
+                _load(conn, scale, random.Random(seed))
+        loaded = time.perf_counter()
+
+        with conn:
+            conn.execute("INSERT INTO words_fts(words_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO words_kanji_fts(words_kanji_fts) VALUES ('rebuild')")
+            conn.execute('UPDATE table_versions SET version = version + 1')
+    finally:
+        conn.close()
+    try:
+        DashboardDAO(db_path).rebuild_stats()
+        DashboardDAO(db_path).rebuild_rollups()
+        WordDAO(db_path).rebuild_word_stats()
+        ScheduleDAO(db_path).rebuild_schedules()
+        ChangeDAO(db_path).backfill()
+    finally:
+        close_pool(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('ANALYZE')
+        counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('words', 'groups', 'group_words', 'study_activities',
+                                'study_sessions', 'study_reviews', 'word_schedules')}
+    finally:
+        conn.close()
+    finished = time.perf_counter()
+    return {
+        'seed': seed,
+        'scale': asdict(scale),
+        'rows': counts,
+        'load_seconds': round(loaded - started, 3),
+        'derived_seconds': round(finished - loaded, 3),
+        'db_bytes': os.path.getsize(db_path),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db_path')
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.db_path):
+        parser.error(f'{args.db_path} already exists')
+    print(json.dumps(generate_dataset(args.db_path, SCALES[args.scale], args.seed), indent=2))
+
+if __name__ == '__main__':
+    main()
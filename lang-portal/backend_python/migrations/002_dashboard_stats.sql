@@ -0,0 +1,144 @@
+-- Single-row table of dashboard aggregates, maintained by triggers so every
+-- write updates it in the same transaction
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_words INTEGER NOT NULL DEFAULT 0,
+    total_groups INTEGER NOT NULL DEFAULT 0,
+    total_sessions INTEGER NOT NULL DEFAULT 0,
+    active_groups INTEGER NOT NULL DEFAULT 0,
+    total_reviews INTEGER NOT NULL DEFAULT 0,
+    correct_reviews INTEGER NOT NULL DEFAULT 0,
+    studied_words INTEGER NOT NULL DEFAULT 0,
+    last_session_id INTEGER,
+    last_session_correct INTEGER NOT NULL DEFAULT 0,
+    last_session_incorrect INTEGER NOT NULL DEFAULT 0
+);
+
+-- Needed to decide cheaply whether a word or group is seen for the first time
+CREATE INDEX IF NOT EXISTS idx_study_reviews_word_id ON study_reviews(word_id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_id ON study_sessions(group_id);
+
+-- Seed the row from existing data
+INSERT OR REPLACE INTO dashboard_stats (
+    id, total_words, total_groups, total_sessions, active_groups,
+    total_reviews, correct_reviews, studied_words,
+    last_session_id, last_session_correct, last_session_incorrect
+)
+SELECT
+    1,
+    (SELECT COUNT(*) FROM words),
+    (SELECT COUNT(*) FROM groups),
+    (SELECT COUNT(*) FROM study_sessions),
+    (SELECT COUNT(DISTINCT group_id) FROM study_sessions),
+    (SELECT COUNT(*) FROM study_reviews),
+    (SELECT COUNT(*) FROM study_reviews WHERE correct),
+    (SELECT COUNT(DISTINCT word_id) FROM study_reviews),
+    last.id,
+    (SELECT COUNT(*) FROM study_reviews WHERE study_session_id = last.id AND correct),
+    (SELECT COUNT(*) FROM study_reviews WHERE study_session_id = last.id AND NOT correct)
+FROM (SELECT NULL AS unused) LEFT JOIN (
+    SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1
+) AS last;
+
+-- Words and groups
+CREATE TRIGGER IF NOT EXISTS trg_stats_words_insert AFTER INSERT ON words
+BEGIN
+    UPDATE dashboard_stats SET total_words = total_words + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_words_delete AFTER DELETE ON words
+BEGIN
+    UPDATE dashboard_stats SET total_words = total_words - 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_groups_insert AFTER INSERT ON groups
+BEGIN
+    UPDATE dashboard_stats SET total_groups = total_groups + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_groups_delete AFTER DELETE ON groups
+BEGIN
+    UPDATE dashboard_stats SET total_groups = total_groups - 1 WHERE id = 1;
+END;
+
+-- Study sessions
+CREATE TRIGGER IF NOT EXISTS trg_stats_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE dashboard_stats SET
+        total_sessions = total_sessions + 1,
+        active_groups = active_groups + NOT EXISTS (
+            SELECT 1 FROM study_sessions WHERE group_id = NEW.group_id AND id != NEW.id
+        )
+    WHERE id = 1;
+
+    UPDATE dashboard_stats SET
+        last_session_id = NEW.id,
+        last_session_correct = 0,
+        last_session_incorrect = 0
+    WHERE id = 1 AND (
+        last_session_id IS NULL
+        OR NEW.start_time >= (SELECT start_time FROM study_sessions WHERE id = last_session_id)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_sessions_delete AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE dashboard_stats SET
+        total_sessions = total_sessions - 1,
+        active_groups = active_groups - NOT EXISTS (
+            SELECT 1 FROM study_sessions WHERE group_id = OLD.group_id
+        )
+    WHERE id = 1;
+
+    -- Deleting the latest session promotes the next most recent one
+    UPDATE dashboard_stats SET
+        last_session_id = (
+            SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1
+        ),
+        last_session_correct = (
+            SELECT COUNT(*) FROM study_reviews WHERE correct AND study_session_id = (
+                SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1
+            )
+        ),
+        last_session_incorrect = (
+            SELECT COUNT(*) FROM study_reviews WHERE NOT correct AND study_session_id = (
+                SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1
+            )
+        )
+    WHERE id = 1 AND last_session_id = OLD.id;
+END;
+
+-- Study reviews
+CREATE TRIGGER IF NOT EXISTS trg_stats_reviews_insert AFTER INSERT ON study_reviews
+BEGIN
+    UPDATE dashboard_stats SET
+        total_reviews = total_reviews + 1,
+        correct_reviews = correct_reviews + (CASE WHEN NEW.correct THEN 1 ELSE 0 END),
+        studied_words = studied_words + NOT EXISTS (
+            SELECT 1 FROM study_reviews WHERE word_id = NEW.word_id AND id != NEW.id
+        ),
+        last_session_correct = last_session_correct + (
+            CASE WHEN last_session_id = NEW.study_session_id AND NEW.correct THEN 1 ELSE 0 END
+        ),
+        last_session_incorrect = last_session_incorrect + (
+            CASE WHEN last_session_id = NEW.study_session_id AND NOT NEW.correct THEN 1 ELSE 0 END
+        )
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_reviews_delete AFTER DELETE ON study_reviews
+BEGIN
+    UPDATE dashboard_stats SET
+        total_reviews = total_reviews - 1,
+        correct_reviews = correct_reviews - (CASE WHEN OLD.correct THEN 1 ELSE 0 END),
+        studied_words = studied_words - NOT EXISTS (
+            SELECT 1 FROM study_reviews WHERE word_id = OLD.word_id
+        ),
+        last_session_correct = last_session_correct - (
+            CASE WHEN last_session_id = OLD.study_session_id AND OLD.correct THEN 1 ELSE 0 END
+        ),
+        last_session_incorrect = last_session_incorrect - (
+            CASE WHEN last_session_id = OLD.study_session_id AND NOT OLD.correct THEN 1 ELSE 0 END
+        )
+    WHERE id = 1;
+END;
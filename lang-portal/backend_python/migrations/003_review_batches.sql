@@ -0,0 +1,12 @@
+-- Idempotency keys of review batches already ingested, so client retries
+-- replay the original summary instead of inserting the reviews twice
+CREATE TABLE IF NOT EXISTS review_batches (
+    study_session_id INTEGER NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    reviews_recorded INTEGER NOT NULL,
+    correct_count INTEGER NOT NULL,
+    session_accuracy REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (study_session_id, idempotency_key),
+    FOREIGN KEY (study_session_id) REFERENCES study_sessions(id) ON DELETE CASCADE
+);
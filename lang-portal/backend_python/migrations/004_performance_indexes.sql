@@ -0,0 +1,16 @@
+-- Secondary indexes for the joins, aggregates and FK cascades the DAOs run
+
+-- Reviews of a session (session detail, session stats, review ingestion)
+CREATE INDEX IF NOT EXISTS idx_study_reviews_session_id ON study_reviews(study_session_id);
+
+-- Reviews of a word (studied-word stats, word delete cascade)
+CREATE INDEX IF NOT EXISTS idx_study_reviews_word_id ON study_reviews(word_id);
+
+-- Sessions in time order (session listing, latest session)
+CREATE INDEX IF NOT EXISTS idx_study_sessions_start_time ON study_sessions(start_time);
+
+-- Sessions of an activity (activity session listing, activity delete cascade)
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_id ON study_sessions(study_activity_id);
+
+-- Groups of a word (word delete cascade); (group_id, word_id) is already the primary key
+CREATE INDEX IF NOT EXISTS idx_group_words_word_id ON group_words(word_id);
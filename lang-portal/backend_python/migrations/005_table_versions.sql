@@ -0,0 +1,106 @@
+-- Per-table change counters for conditional GETs. Triggers bump the counter
+-- in the same transaction as the write, so an unchanged version means the
+-- table's rows are unchanged.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Counters start at a random offset so a recreated database never reissues old ETags
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES
+    ('words', abs(random() % 1000000000)),
+    ('groups', abs(random() % 1000000000)),
+    ('group_words', abs(random() % 1000000000)),
+    ('study_activities', abs(random() % 1000000000)),
+    ('study_sessions', abs(random() % 1000000000)),
+    ('study_reviews', abs(random() % 1000000000));
+
+CREATE TRIGGER IF NOT EXISTS trg_version_words_insert AFTER INSERT ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_words_update AFTER UPDATE ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_words_delete AFTER DELETE ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_groups_insert AFTER INSERT ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_groups_update AFTER UPDATE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_groups_delete AFTER DELETE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_group_words_insert AFTER INSERT ON group_words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'group_words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_group_words_update AFTER UPDATE ON group_words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'group_words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_group_words_delete AFTER DELETE ON group_words
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'group_words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_activities_insert AFTER INSERT ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_activities_update AFTER UPDATE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_activities_delete AFTER DELETE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_sessions_update AFTER UPDATE ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_sessions_delete AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_reviews_insert AFTER INSERT ON study_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_reviews_update AFTER UPDATE ON study_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_study_reviews_delete AFTER DELETE ON study_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_reviews';
+END;
@@ -0,0 +1,38 @@
+-- Full-text index over words for search and type-ahead. It is an external
+-- content table, so it stores only the index and reads the text from words;
+-- the triggers below keep it in step with every write.
+-- prefix='1 2 3' adds prefix indexes so short type-ahead prefixes avoid a
+-- scan of the term list.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+    kanji,
+    romaji,
+    english,
+    content='words',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='1 2 3'
+);
+
+-- Index the words that already exist
+INSERT INTO words_fts(words_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS trg_words_fts_insert AFTER INSERT ON words
+BEGIN
+    INSERT INTO words_fts (rowid, kanji, romaji, english)
+    VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_fts_delete AFTER DELETE ON words
+BEGIN
+    INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english)
+    VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+END;
+
+-- Only re-index when the searchable text changes, not on timestamp touches
+CREATE TRIGGER IF NOT EXISTS trg_words_fts_update AFTER UPDATE OF kanji, romaji, english ON words
+BEGIN
+    INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english)
+    VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+    INSERT INTO words_fts (rowid, kanji, romaji, english)
+    VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
@@ -0,0 +1,7 @@
+-- Lookups used by bulk import to match incoming rows against existing data
+
+-- Existing word with the same (kanji, romaji), the import's dedupe key
+CREATE INDEX IF NOT EXISTS idx_words_kanji_romaji ON words(kanji, romaji);
+
+-- Group referenced by name in an import file
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups(name);
@@ -0,0 +1,33 @@
+-- Spaced-repetition state of each word in each group it belongs to. Rows
+-- follow group_words through the triggers below; reviews update them in the
+-- same transaction that records the review.
+CREATE TABLE IF NOT EXISTS word_schedules (
+    group_id INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    ease REAL NOT NULL DEFAULT 2.5,
+    interval_days REAL NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at TEXT NOT NULL,
+    last_reviewed_at TEXT,
+    PRIMARY KEY (group_id, word_id)
+) WITHOUT ROWID;
+
+-- The due queue: a range scan over (group_id, due_at <= now), in due order
+CREATE INDEX IF NOT EXISTS idx_word_schedules_due ON word_schedules(group_id, due_at);
+
+-- New words are due from the moment they join the group
+INSERT OR IGNORE INTO word_schedules (group_id, word_id, due_at)
+SELECT group_id, word_id, datetime(COALESCE(created_at, 'now'))
+FROM group_words;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_schedules_group_words_insert AFTER INSERT ON group_words
+BEGIN
+    INSERT OR IGNORE INTO word_schedules (group_id, word_id, due_at)
+    VALUES (NEW.group_id, NEW.word_id, datetime(COALESCE(NEW.created_at, 'now')));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_schedules_group_words_delete AFTER DELETE ON group_words
+BEGIN
+    DELETE FROM word_schedules WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+END;
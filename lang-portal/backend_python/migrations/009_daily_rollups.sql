@@ -0,0 +1,167 @@
+-- Per-day activity, one row per (UTC day, group, study activity) that saw a
+-- session start or a review. Triggers keep it current in the same transaction
+-- as the write, so time-series queries read O(days) rows instead of scanning
+-- study_reviews. A session's minutes count on the day it started.
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    study_activity_id INTEGER NOT NULL,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    -- Distinct words reviewed that day in this group and activity
+    words INTEGER NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    session_seconds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, group_id, study_activity_id)
+) WITHOUT ROWID;
+
+-- Lets the triggers decide whether a word was already reviewed on a given day;
+-- supersedes the word_id index from 002
+CREATE INDEX IF NOT EXISTS idx_study_reviews_word_created ON study_reviews(word_id, created_at);
+DROP INDEX IF EXISTS idx_study_reviews_word_id;
+
+-- Seed from existing data
+INSERT OR REPLACE INTO daily_rollups (
+    day, group_id, study_activity_id, reviews, correct, words, sessions, session_seconds
+)
+WITH review_days AS (
+    SELECT date(r.created_at) AS day, s.group_id, s.study_activity_id,
+           COUNT(*) AS reviews, SUM(r.correct != 0) AS correct, COUNT(DISTINCT r.word_id) AS words
+    FROM study_reviews r JOIN study_sessions s ON s.id = r.study_session_id
+    GROUP BY 1, 2, 3
+), session_days AS (
+    SELECT date(start_time) AS day, group_id, study_activity_id, COUNT(*) AS sessions,
+           SUM(COALESCE(MAX(0, CAST(round((julianday(end_time) - julianday(start_time)) * 86400) AS INTEGER)), 0))
+               AS session_seconds
+    FROM study_sessions
+    GROUP BY 1, 2, 3
+), cells AS (
+    SELECT day, group_id, study_activity_id FROM review_days
+    UNION
+    SELECT day, group_id, study_activity_id FROM session_days
+)
+SELECT c.day, c.group_id, c.study_activity_id,
+       COALESCE(rd.reviews, 0), COALESCE(rd.correct, 0), COALESCE(rd.words, 0),
+       COALESCE(sd.sessions, 0), COALESCE(sd.session_seconds, 0)
+FROM cells c
+LEFT JOIN review_days rd USING (day, group_id, study_activity_id)
+LEFT JOIN session_days sd USING (day, group_id, study_activity_id)
+WHERE c.day IS NOT NULL;
+
+-- Study reviews. The cell comes from the review's session; reviews removed by
+-- a cascading session delete find no session and are handled by the session
+-- trigger below instead.
+CREATE TRIGGER IF NOT EXISTS trg_rollups_reviews_insert AFTER INSERT ON study_reviews
+BEGIN
+    INSERT OR IGNORE INTO daily_rollups (day, group_id, study_activity_id)
+    SELECT date(NEW.created_at), group_id, study_activity_id FROM study_sessions WHERE id = NEW.study_session_id;
+
+    UPDATE daily_rollups SET
+        reviews = reviews + 1,
+        correct = correct + (NEW.correct != 0),
+        words = words + NOT EXISTS (
+            SELECT 1 FROM study_reviews r JOIN study_sessions s ON s.id = r.study_session_id
+            WHERE r.word_id = NEW.word_id AND r.id != NEW.id
+              AND r.created_at >= daily_rollups.day AND r.created_at < date(daily_rollups.day, '+1 day')
+              AND s.group_id = daily_rollups.group_id AND s.study_activity_id = daily_rollups.study_activity_id
+        )
+    WHERE (day, group_id, study_activity_id) = (
+        SELECT date(NEW.created_at), group_id, study_activity_id FROM study_sessions WHERE id = NEW.study_session_id
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollups_reviews_delete AFTER DELETE ON study_reviews
+BEGIN
+    UPDATE daily_rollups SET
+        reviews = reviews - 1,
+        correct = correct - (OLD.correct != 0),
+        words = words - NOT EXISTS (
+            SELECT 1 FROM study_reviews r JOIN study_sessions s ON s.id = r.study_session_id
+            WHERE r.word_id = OLD.word_id
+              AND r.created_at >= daily_rollups.day AND r.created_at < date(daily_rollups.day, '+1 day')
+              AND s.group_id = daily_rollups.group_id AND s.study_activity_id = daily_rollups.study_activity_id
+        )
+    WHERE (day, group_id, study_activity_id) = (
+        SELECT date(OLD.created_at), group_id, study_activity_id FROM study_sessions WHERE id = OLD.study_session_id
+    );
+
+    DELETE FROM daily_rollups
+    WHERE reviews = 0 AND sessions = 0 AND (day, group_id, study_activity_id) = (
+        SELECT date(OLD.created_at), group_id, study_activity_id FROM study_sessions WHERE id = OLD.study_session_id
+    );
+END;
+
+-- Study sessions
+CREATE TRIGGER IF NOT EXISTS trg_rollups_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+    INSERT OR IGNORE INTO daily_rollups (day, group_id, study_activity_id)
+    VALUES (date(NEW.start_time), NEW.group_id, NEW.study_activity_id);
+
+    UPDATE daily_rollups SET
+        sessions = sessions + 1,
+        session_seconds = session_seconds + COALESCE(
+            MAX(0, CAST(round((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER)), 0)
+    WHERE day = date(NEW.start_time) AND group_id = NEW.group_id AND study_activity_id = NEW.study_activity_id;
+END;
+
+-- Ending a session (or moving its start) moves its minutes. Changing a
+-- session's group or activity is not tracked; run `flask rebuild-rollups`.
+CREATE TRIGGER IF NOT EXISTS trg_rollups_sessions_update AFTER UPDATE OF start_time, end_time ON study_sessions
+BEGIN
+    UPDATE daily_rollups SET
+        sessions = sessions - 1,
+        session_seconds = session_seconds - COALESCE(
+            MAX(0, CAST(round((julianday(OLD.end_time) - julianday(OLD.start_time)) * 86400) AS INTEGER)), 0)
+    WHERE day = date(OLD.start_time) AND group_id = OLD.group_id AND study_activity_id = OLD.study_activity_id;
+
+    INSERT OR IGNORE INTO daily_rollups (day, group_id, study_activity_id)
+    VALUES (date(NEW.start_time), OLD.group_id, OLD.study_activity_id);
+
+    UPDATE daily_rollups SET
+        sessions = sessions + 1,
+        session_seconds = session_seconds + COALESCE(
+            MAX(0, CAST(round((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER)), 0)
+    WHERE day = date(NEW.start_time) AND group_id = OLD.group_id AND study_activity_id = OLD.study_activity_id;
+
+    DELETE FROM daily_rollups
+    WHERE day = date(OLD.start_time) AND group_id = OLD.group_id AND study_activity_id = OLD.study_activity_id
+      AND reviews = 0 AND sessions = 0;
+END;
+
+-- Runs before the delete so the session's reviews, about to be removed by the
+-- cascade, can still be counted out day by day
+CREATE TRIGGER IF NOT EXISTS trg_rollups_sessions_delete BEFORE DELETE ON study_sessions
+BEGIN
+    UPDATE daily_rollups SET
+        reviews = reviews - gone.removed_reviews,
+        correct = correct - gone.removed_correct,
+        words = words - gone.removed_words
+    FROM (
+        SELECT date(r.created_at) AS removed_day, COUNT(*) AS removed_reviews,
+               SUM(r.correct != 0) AS removed_correct,
+               COUNT(DISTINCT CASE WHEN NOT EXISTS (
+                   SELECT 1 FROM study_reviews o JOIN study_sessions s ON s.id = o.study_session_id
+                   WHERE o.word_id = r.word_id AND o.study_session_id != OLD.id
+                     AND o.created_at >= date(r.created_at) AND o.created_at < date(r.created_at, '+1 day')
+                     AND s.group_id = OLD.group_id AND s.study_activity_id = OLD.study_activity_id
+               ) THEN r.word_id END) AS removed_words
+        FROM study_reviews r
+        WHERE r.study_session_id = OLD.id
+        GROUP BY 1
+    ) AS gone
+    WHERE daily_rollups.day = gone.removed_day
+      AND daily_rollups.group_id = OLD.group_id AND daily_rollups.study_activity_id = OLD.study_activity_id;
+
+    UPDATE daily_rollups SET
+        sessions = sessions - 1,
+        session_seconds = session_seconds - COALESCE(
+            MAX(0, CAST(round((julianday(OLD.end_time) - julianday(OLD.start_time)) * 86400) AS INTEGER)), 0)
+    WHERE day = date(OLD.start_time) AND group_id = OLD.group_id AND study_activity_id = OLD.study_activity_id;
+
+    DELETE FROM daily_rollups
+    WHERE group_id = OLD.group_id AND study_activity_id = OLD.study_activity_id
+      AND reviews = 0 AND sessions = 0
+      AND (day = date(OLD.start_time) OR day IN (
+          SELECT date(created_at) FROM study_reviews WHERE study_session_id = OLD.id
+      ));
+END;
@@ -0,0 +1,91 @@
+-- Review totals per word, one row per word that has been reviewed. Triggers
+-- keep it current in the same transaction as the review, so /api/words can
+-- sort and filter by them without aggregating study_reviews. Reviews are
+-- ordered by (created_at, id); the streak counts the correct answers since
+-- the word's latest wrong one. Reviews edited in place are not tracked; run
+-- `flask rebuild-word-stats` after changing them.
+CREATE TABLE IF NOT EXISTS word_stats (
+    word_id INTEGER PRIMARY KEY REFERENCES words(id) ON DELETE CASCADE,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    wrong INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0,
+    last_reviewed_at TEXT,
+    -- correct / reviews, from 0.0 to 1.0. Stored rather than generated:
+    -- SQLite never treats an index over a generated column as covering.
+    accuracy REAL NOT NULL DEFAULT 0
+);
+
+-- One covering index per sort order. word_id follows the sort key so ties
+-- come out in keyset order, and reviews is carried along for min_reviews.
+CREATE INDEX IF NOT EXISTS idx_word_stats_accuracy ON word_stats(accuracy, word_id, reviews);
+CREATE INDEX IF NOT EXISTS idx_word_stats_last_reviewed ON word_stats(last_reviewed_at, word_id, reviews);
+CREATE INDEX IF NOT EXISTS idx_word_stats_reviews ON word_stats(reviews, word_id);
+
+-- Seed from existing reviews. wrong_since counts the wrong answers from a
+-- review to the word's latest one, so the streak is the rows where it is 0.
+INSERT OR REPLACE INTO word_stats (word_id, reviews, correct, wrong, streak, last_reviewed_at, accuracy)
+WITH ordered AS (
+    SELECT word_id, correct, created_at,
+           SUM(correct = 0) OVER (
+               PARTITION BY word_id ORDER BY created_at DESC, id DESC ROWS UNBOUNDED PRECEDING
+           ) AS wrong_since
+    FROM study_reviews
+)
+SELECT word_id, COUNT(*), SUM(correct != 0), SUM(correct = 0), SUM(wrong_since = 0), MAX(created_at),
+       CAST(SUM(correct != 0) AS REAL) / COUNT(*)
+FROM ordered
+GROUP BY word_id;
+
+-- A review newer than the word's last one extends or resets the streak; an
+-- older one (a backfill) recounts it from the word's reviews
+CREATE TRIGGER IF NOT EXISTS trg_word_stats_reviews_insert AFTER INSERT ON study_reviews
+BEGIN
+    INSERT OR IGNORE INTO word_stats (word_id) VALUES (NEW.word_id);
+
+    UPDATE word_stats SET
+        reviews = reviews + 1,
+        correct = correct + (NEW.correct != 0),
+        wrong = wrong + (NEW.correct = 0),
+        accuracy = CAST(correct + (NEW.correct != 0) AS REAL) / (reviews + 1),
+        streak = CASE
+            WHEN last_reviewed_at IS NULL OR NEW.created_at >= last_reviewed_at
+                THEN CASE WHEN NEW.correct THEN streak + 1 ELSE 0 END
+            ELSE (
+                SELECT COUNT(*) FROM study_reviews r
+                WHERE r.word_id = NEW.word_id AND NOT EXISTS (
+                    SELECT 1 FROM study_reviews w
+                    WHERE w.word_id = NEW.word_id AND NOT w.correct
+                      AND (w.created_at > r.created_at OR (w.created_at = r.created_at AND w.id >= r.id))
+                )
+            )
+        END,
+        last_reviewed_at = CASE
+            WHEN last_reviewed_at IS NULL OR NEW.created_at > last_reviewed_at THEN NEW.created_at
+            ELSE last_reviewed_at
+        END
+    WHERE word_id = NEW.word_id;
+END;
+
+-- Removing a review recounts the streak and last review from the word's
+-- remaining reviews (an index range on word_id, created_at)
+CREATE TRIGGER IF NOT EXISTS trg_word_stats_reviews_delete AFTER DELETE ON study_reviews
+BEGIN
+    UPDATE word_stats SET
+        reviews = reviews - 1,
+        correct = correct - (OLD.correct != 0),
+        wrong = wrong - (OLD.correct = 0),
+        accuracy = CASE WHEN reviews > 1 THEN CAST(correct - (OLD.correct != 0) AS REAL) / (reviews - 1) ELSE 0 END,
+        streak = (
+            SELECT COUNT(*) FROM study_reviews r
+            WHERE r.word_id = OLD.word_id AND NOT EXISTS (
+                SELECT 1 FROM study_reviews w
+                WHERE w.word_id = OLD.word_id AND NOT w.correct
+                  AND (w.created_at > r.created_at OR (w.created_at = r.created_at AND w.id >= r.id))
+            )
+        ),
+        last_reviewed_at = (SELECT MAX(created_at) FROM study_reviews WHERE word_id = OLD.word_id)
+    WHERE word_id = OLD.word_id;
+
+    DELETE FROM word_stats WHERE word_id = OLD.word_id AND reviews = 0;
+END;
@@ -0,0 +1,94 @@
+-- Append-only log of changes to words, groups, group memberships and study
+-- sessions, written by triggers in the same transaction as the change, so
+-- clients can sync incrementally with /api/changes?since=<seq>. Deletes leave
+-- a tombstone. seq is AUTOINCREMENT so it never goes backwards or gets
+-- reused, even after compaction removes the newest rows.
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    -- word_id for group_words (row_id is the group_id), 0 for the other tables
+    related_id INTEGER NOT NULL DEFAULT 0,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+-- Finds the later entries of the same row, which supersede an entry
+CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id, related_id, seq);
+
+-- Compaction drops superseded entries, which changes nothing for any client,
+-- and tombstones past the retention period. A client that synced before the
+-- newest dropped tombstone may have missed a delete and has to start over.
+CREATE TABLE IF NOT EXISTS change_log_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    compacted_through INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO change_log_state (id, compacted_through) VALUES (1, 0);
+
+-- Every existing row starts out as an upsert, so since=0 is a full sync
+INSERT INTO change_log (table_name, row_id, related_id, op)
+SELECT 'words', id, 0, 'upsert' FROM words ORDER BY id;
+INSERT INTO change_log (table_name, row_id, related_id, op)
+SELECT 'groups', id, 0, 'upsert' FROM groups ORDER BY id;
+INSERT INTO change_log (table_name, row_id, related_id, op)
+SELECT 'group_words', group_id, word_id, 'upsert' FROM group_words ORDER BY group_id, word_id;
+INSERT INTO change_log (table_name, row_id, related_id, op)
+SELECT 'study_sessions', id, 0, 'upsert' FROM study_sessions ORDER BY id;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_words_insert AFTER INSERT ON words
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('words', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_words_update AFTER UPDATE ON words
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('words', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_words_delete AFTER DELETE ON words
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('words', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_groups_insert AFTER INSERT ON groups
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('groups', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_groups_update AFTER UPDATE ON groups
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('groups', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_groups_delete AFTER DELETE ON groups
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('groups', OLD.id, 'delete');
+END;
+
+-- Memberships removed by a word or group delete cascade through here too
+CREATE TRIGGER IF NOT EXISTS trg_changes_group_words_insert AFTER INSERT ON group_words
+BEGIN
+    INSERT INTO change_log (table_name, row_id, related_id, op)
+    VALUES ('group_words', NEW.group_id, NEW.word_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_group_words_delete AFTER DELETE ON group_words
+BEGIN
+    INSERT INTO change_log (table_name, row_id, related_id, op)
+    VALUES ('group_words', OLD.group_id, OLD.word_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_study_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('study_sessions', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_study_sessions_update AFTER UPDATE ON study_sessions
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('study_sessions', NEW.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_study_sessions_delete AFTER DELETE ON study_sessions
+BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('study_sessions', OLD.id, 'delete');
+END;
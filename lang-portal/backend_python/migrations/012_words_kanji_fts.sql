@@ -0,0 +1,29 @@
+-- unicode61 keeps a run of kana or kanji as one token, so words_fts cannot
+-- find one character of a compound (本 in 日本語). This trigram index over
+-- kanji answers substring queries of three characters or more; shorter ones
+-- have no trigram to look up and are matched against words.kanji directly.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_kanji_fts USING fts5(
+    kanji,
+    content='words',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- Index the words that already exist
+INSERT INTO words_kanji_fts(words_kanji_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS trg_words_kanji_fts_insert AFTER INSERT ON words
+BEGIN
+    INSERT INTO words_kanji_fts (rowid, kanji) VALUES (NEW.id, NEW.kanji);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_kanji_fts_delete AFTER DELETE ON words
+BEGIN
+    INSERT INTO words_kanji_fts (words_kanji_fts, rowid, kanji) VALUES ('delete', OLD.id, OLD.kanji);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_kanji_fts_update AFTER UPDATE OF kanji ON words
+BEGIN
+    INSERT INTO words_kanji_fts (words_kanji_fts, rowid, kanji) VALUES ('delete', OLD.id, OLD.kanji);
+    INSERT INTO words_kanji_fts (rowid, kanji) VALUES (NEW.id, NEW.kanji);
+END;
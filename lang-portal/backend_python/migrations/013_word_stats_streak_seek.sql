@@ -0,0 +1,65 @@
+-- The streak recounts in 010 tested every review of the word against every
+-- wrong one (NOT EXISTS per row), quadratic in the word's reviews. They now
+-- find the latest wrong review with one descending step on
+-- idx_study_reviews_word_created and count the reviews after it with a range
+-- seek on the same index; a word with no wrong review has all its reviews in
+-- the streak.
+DROP TRIGGER IF EXISTS trg_word_stats_reviews_insert;
+DROP TRIGGER IF EXISTS trg_word_stats_reviews_delete;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_stats_reviews_insert AFTER INSERT ON study_reviews
+BEGIN
+    INSERT OR IGNORE INTO word_stats (word_id) VALUES (NEW.word_id);
+
+    UPDATE word_stats SET
+        reviews = reviews + 1,
+        correct = correct + (NEW.correct != 0),
+        wrong = wrong + (NEW.correct = 0),
+        accuracy = CAST(correct + (NEW.correct != 0) AS REAL) / (reviews + 1),
+        streak = CASE
+            WHEN last_reviewed_at IS NULL OR NEW.created_at >= last_reviewed_at
+                THEN CASE WHEN NEW.correct THEN streak + 1 ELSE 0 END
+            WHEN NOT EXISTS (SELECT 1 FROM study_reviews w WHERE w.word_id = NEW.word_id AND NOT w.correct)
+                THEN reviews + 1
+            ELSE (
+                SELECT COUNT(*) FROM study_reviews r
+                WHERE r.word_id = NEW.word_id AND (r.created_at, r.id) > (
+                    SELECT w.created_at, w.id FROM study_reviews w
+                    WHERE w.word_id = NEW.word_id AND NOT w.correct
+                    ORDER BY w.created_at DESC, w.id DESC
+                    LIMIT 1
+                )
+            )
+        END,
+        last_reviewed_at = CASE
+            WHEN last_reviewed_at IS NULL OR NEW.created_at > last_reviewed_at THEN NEW.created_at
+            ELSE last_reviewed_at
+        END
+    WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_stats_reviews_delete AFTER DELETE ON study_reviews
+BEGIN
+    UPDATE word_stats SET
+        reviews = reviews - 1,
+        correct = correct - (OLD.correct != 0),
+        wrong = wrong - (OLD.correct = 0),
+        accuracy = CASE WHEN reviews > 1 THEN CAST(correct - (OLD.correct != 0) AS REAL) / (reviews - 1) ELSE 0 END,
+        streak = CASE
+            WHEN NOT EXISTS (SELECT 1 FROM study_reviews w WHERE w.word_id = OLD.word_id AND NOT w.correct)
+                THEN reviews - 1
+            ELSE (
+                SELECT COUNT(*) FROM study_reviews r
+                WHERE r.word_id = OLD.word_id AND (r.created_at, r.id) > (
+                    SELECT w.created_at, w.id FROM study_reviews w
+                    WHERE w.word_id = OLD.word_id AND NOT w.correct
+                    ORDER BY w.created_at DESC, w.id DESC
+                    LIMIT 1
+                )
+            )
+        END,
+        last_reviewed_at = (SELECT MAX(created_at) FROM study_reviews WHERE word_id = OLD.word_id)
+    WHERE word_id = OLD.word_id;
+
+    DELETE FROM word_stats WHERE word_id = OLD.word_id AND reviews = 0;
+END;
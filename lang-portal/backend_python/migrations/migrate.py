@@ -1,29 +1,108 @@
 import sqlite3
 import os
+import re
 import sys
+import glob
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def get_migration_files():
+    """Return (version, name, path) for every numbered migration, in order"""
+    migrations = []
+    for path in glob.glob(os.path.join(MIGRATIONS_DIR, '[0-9][0-9][0-9]_*.sql')):
+        match = re.match(r'(\d+)_(.+)\.sql$', os.path.basename(path))
+        migrations.append((int(match.group(1)), match.group(2), path))
+    return sorted(migrations)
+
+def _ensure_version_table(conn):
+    """Create schema_migrations, baselining databases built before it existed"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+    ).fetchone()
+    if exists:
+        return
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words'"
+    ).fetchone()
+    conn.execute('''
+        CREATE TABLE schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    if legacy:
+        # The old runner always applied the initial schema; its seed data must not run twice
+        conn.execute("INSERT INTO schema_migrations (version, name) VALUES (1, 'initial_schema')")
+    conn.commit()
+
+def get_applied_versions(conn):
+    """Return the set of migration versions already applied"""
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+
+def migrate(db_path, verbose=True):
+    """Apply every pending migration in order, then refresh planner statistics
+
+    Each migration runs in its own transaction together with its
+    schema_migrations row. Returns the list of versions applied.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        applied = get_applied_versions(conn)
+        newly_applied = []
+        for version, name, path in get_migration_files():
+            if version in applied:
+                continue
+            if verbose:
+                print(f"Applying migration {version:03d}_{name}")
+            with open(path, 'r') as f:
+                script = f.read()
+            try:
+                conn.executescript(
+                    'BEGIN;\n' + script +
+                    f"\nINSERT INTO schema_migrations (version, name) VALUES ({version}, '{name}');\nCOMMIT;"
+                )
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            newly_applied.append(version)
+
+        if newly_applied:
+            conn.execute('ANALYZE')
+            conn.commit()
+        return newly_applied
+    finally:
+        conn.close()
+
+def print_status(db_path):
+    """Print which migrations are applied and which are pending"""
+    conn = sqlite3.connect(db_path)
+    try:
+        applied = get_applied_versions(conn)
+    finally:
+        conn.close()
+    for version, name, _ in get_migration_files():
+        state = 'applied' if version in applied else 'pending'
+        print(f"{version:03d}_{name}: {state}")
 
 def init_db(db_path):
     """Initialize the database with schema"""
     print(f"Initializing database at {db_path}")
-    
-    # Read schema file
-    schema_path = os.path.join(os.path.dirname(__file__), '001_initial_schema.sql')
-    with open(schema_path, 'r') as f:
-        schema = f.read()
-    
-    # Connect to database and execute schema
-    conn = sqlite3.connect(db_path)
+
     try:
-        conn.executescript(schema)
-        conn.commit()
-        print("Database initialized successfully!")
+        applied = migrate(db_path)
+        print(f"Database initialized successfully! ({len(applied)} migration(s) applied)")
     except Exception as e:
         print(f"Error initializing database: {e}")
         sys.exit(1)
-    finally:
-        conn.close()
 
 if __name__ == '__main__':
     # Get database path from command line or use default
-    db_path = sys.argv[1] if len(sys.argv) > 1 else '../../lang_portal.db'
-    init_db(db_path)
+    args = [arg for arg in sys.argv[1:] if arg != '--status']
+    db_path = args[0] if args else '../../lang_portal.db'
+    if '--status' in sys.argv[1:]:
+        print_status(db_path)
+    else:
+        init_db(db_path)
@@ -1,17 +1,26 @@
 import os
+import shutil
 import tempfile
 import pytest
 from app import create_app
+from app.db import close_pool
+from migrations.migrate import migrate
 
 @pytest.fixture
 def app():
     """Create and configure a new app instance for each test"""
     # Create a temporary file to isolate the database for each test
     db_fd, db_path = tempfile.mkstemp()
+    embedding_dir = tempfile.mkdtemp()
+    snapshot_dir = tempfile.mkdtemp()
     
     app = create_app({
         'TESTING': True,
         'DATABASE': db_path,
+        'EMBEDDING_DIR': embedding_dir,
+        'SNAPSHOT_DIR': snapshot_dir,
+        # Snapshot tests start the watcher themselves so it does not build behind other tests
+        'SNAPSHOT_WATCH_INTERVAL': 0,
     })
     
     # Initialize the test database
@@ -20,9 +29,14 @@ def app():
     
     yield app
     
+    # Release pooled connections before removing the database
+    close_pool(db_path)
+    
     # Clean up the temporary file
     os.close(db_fd)
     os.unlink(db_path)
+    shutil.rmtree(embedding_dir)
+    shutil.rmtree(snapshot_dir)
 
 @pytest.fixture
 def client(app):
@@ -35,18 +49,5 @@ def db_path(app):
     return app.config['DATABASE']
 
 def init_db(db_path):
-    """Initialize the test database with schema"""
-    import sqlite3
-    
-    # Read schema file
-    schema_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations', '001_initial_schema.sql')
-    with open(schema_path, 'r') as f:
-        schema = f.read()
-    
-    # Create tables
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.executescript(schema)
-        conn.commit()
-    finally:
-        conn.close()
+    """Initialize the test database by applying every migration"""
+    migrate(db_path, verbose=False)
@@ -0,0 +1,66 @@
+import sqlite3
+from app.dao.dashboard_dao import DashboardDAO
+from app.dao.word_dao import WordDAO
+from app.db import close_pool
+from benchmarks.bench_endpoints import SCENARIOS, Context, generate_in_subprocess, percentile, run_test_client
+from benchmarks.datasets import Scale, generate_dataset
+
+TINY = Scale(words=300, groups=4, activities=2, sessions=20, reviews=200)
+
+def dump(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_scenarios_cover_every_api_route(app):
+    routes = {(rule.rule, method) for rule in app.url_map.iter_rules()
+              if rule.rule.startswith('/api/') and not rule.rule.startswith('/api/docs')
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    assert {(s.rule, s.method) for s in SCENARIOS} == routes
+
+def test_dataset_is_deterministic_and_consistent(tmp_path):
+    first, second = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+    report = generate_dataset(first, TINY, seed=7)
+    generate_dataset(second, TINY, seed=7)
+    assert report['rows']['words'] == TINY.words + 4
+    assert report['rows']['study_reviews'] == TINY.reviews + 2
+    # Rows seeded by the migrations are stamped with the current time and excluded
+    for sql in ('SELECT * FROM words WHERE id > 4', 'SELECT * FROM study_reviews WHERE id > 2',
+                'SELECT * FROM word_schedules'):
+        assert dump(first, sql) == dump(second, sql)
+
+    # Derived tables are rebuilt after the trigger-free load
+    assert DashboardDAO(first).verify_stats() == {}
+    assert DashboardDAO(first).verify_rollups() == []
+    assert WordDAO(first).verify_word_stats() == []
+    assert dump(first, "SELECT rowid FROM words_fts WHERE words_fts MATCH 'cat' LIMIT 1")
+    assert dump(first, "SELECT COUNT(*) FROM words_kanji_fts_docsize") == [(TINY.words + 4,)]
+    assert len(dump(first, "SELECT name FROM sqlite_master WHERE type = 'trigger'")) >= 47
+    # Every loaded row is in the change log, so since=0 is still a full sync
+    assert dump(first, "SELECT COUNT(*) FROM change_log WHERE table_name = 'words'") == [(TINY.words + 4,)]
+    close_pool(first)
+
+def test_every_scenario_runs(app, db_path):
+    generate_dataset(db_path, TINY)
+    # Count server errors the way a real run does instead of raising them here
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    app.logger.disabled = True
+    results = run_test_client(app, SCENARIOS, Context(db_path, seed=1), count=3)
+    assert set(results) == {s.name for s in SCENARIOS}
+    for name, stats in results.items():
+        assert stats['requests'] == 3
+        assert sum(stats['statuses'].values()) == 3
+        assert stats['p50_ms'] <= stats['p99_ms']
+
+def test_dataset_is_generated_in_a_child_process(tmp_path):
+    db_path = str(tmp_path / 'bench.db')
+    report = generate_in_subprocess(db_path, '10k', seed=1)
+    assert report['rows']['words'] == 10_000 + 4
+    assert dump(db_path, 'SELECT COUNT(*) FROM words') == [(report['rows']['words'],)]
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)) == (50, 95, 99)
+    assert percentile([], 0.5) == 0.0
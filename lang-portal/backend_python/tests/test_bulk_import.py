@@ -0,0 +1,152 @@
+import io
+import json
+import sqlite3
+import threading
+import time
+import pytest
+from app.dao.import_dao import ImportDAO
+from app.services.import_service import ImportService
+from app.writer import register_writer
+
+def import_body(client, body, query='', content_type='text/csv'):
+    response = client.post(f'/api/words/import{query}', data=body, content_type=content_type)
+    return response.status_code, response.get_json()
+
+def words_in_group(db_path, name):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute('''
+            SELECT w.romaji FROM words w
+            JOIN group_words gw ON gw.word_id = w.id
+            JOIN groups g ON g.id = gw.group_id
+            WHERE g.name = ?
+        ''', (name,)))
+    finally:
+        conn.close()
+
+def test_csv_import_inserts_and_links_groups(client, db_path):
+    body = 'kanji,romaji,english,groups\n本,hon,book,JLPT N5;Objects\n水,mizu,water,JLPT N5\n'
+    status, payload = import_body(client, body)
+    assert status == 200, payload
+    report = payload['data']
+    assert report['rows'] == 2 and report['inserted'] == 2 and report['group_links'] == 3
+    assert report['rows_per_second'] > 0
+    assert words_in_group(db_path, 'JLPT N5') == ['hon', 'mizu']
+    assert words_in_group(db_path, 'Objects') == ['hon']
+
+def test_jsonl_import_reports_per_row_errors(client):
+    body = '\n'.join([
+        json.dumps({'kanji': '本', 'romaji': 'hon', 'english': 'book'}),
+        '{not json',
+        json.dumps({'kanji': '水', 'romaji': 'mizu'}),
+        '[1, 2]',
+    ])
+    status, payload = import_body(client, body, content_type='application/x-ndjson')
+    report = payload['data']
+    assert status == 200
+    assert report['inserted'] == 1 and report['failed'] == 3
+    assert [e['line'] for e in report['errors']] == [2, 3, 4]
+    assert report['errors'][1]['errors'] == ['English is required']
+
+def test_conflict_policies(client, db_path):
+    # The seed data already has 犬 / inu / dog
+    assert import_body(client, '犬,inu,hound\n', '?format=csv&on_conflict=skip',
+                       content_type='text/plain')[0] == 400  # no header row
+
+    body = 'kanji,romaji,english\n犬,inu,hound\n犬,inu,doggo\n'
+    report = import_body(client, body)[1]['data']
+    assert (report['inserted'], report['unchanged'], report['duplicates']) == (0, 1, 1)
+
+    report = import_body(client, body, '?on_conflict=update')[1]['data']
+    assert report['updated'] == 1
+    assert client.get('/api/words/2').get_json()['data']['english'] == 'doggo'
+
+    report = import_body(client, body, '?on_conflict=error')[1]['data']
+    assert report['failed'] == 1 and report['errors'][0]['errors'] == ['Word already exists']
+
+def test_existing_word_joins_group_and_count_stays(client, db_path):
+    total_before = client.get('/api/words').get_json()['data']['pagination']['total_items']
+    report = import_body(client, 'kanji,romaji,english\n犬,inu,dog\n', '?group=Animals')[1]['data']
+    assert report['group_links'] == 1
+    assert words_in_group(db_path, 'Animals') == ['inu']
+    assert client.get('/api/words').get_json()['data']['pagination']['total_items'] == total_before
+
+def test_unknown_group_without_create(client):
+    report = import_body(client, 'kanji,romaji,english,groups\n本,hon,book,Nope\n', '?create_groups=false')[1]['data']
+    assert report['inserted'] == 0
+    assert report['errors'][0]['errors'] == ['Unknown group: Nope']
+
+def test_multipart_upload(client):
+    data = {'file': (io.BytesIO('kanji,romaji,english\n本,hon,book\n'.encode('utf-8-sig')), 'words.csv')}
+    response = client.post('/api/words/import', data=data, content_type='multipart/form-data')
+    assert response.get_json()['data']['inserted'] == 1
+
+def test_unknown_format_rejected(client):
+    assert import_body(client, 'x', content_type='application/octet-stream')[0] == 400
+
+def test_chunks_are_consumed_lazily(db_path):
+    consumed = []
+
+    def records():
+        for i in range(25):
+            consumed.append(i)
+            yield i + 1, {'kanji': f'k{i}', 'romaji': f'r{i}', 'english': f'e{i}'}
+
+    service = ImportService(db_path)
+    original = service.import_dao.import_words
+    seen = []
+
+    def spy(words, on_conflict):
+        seen.append(len(consumed))
+        return original(words, on_conflict)
+
+    service.import_dao.import_words = spy
+    report = service.import_words(records(), chunk_size=10)
+    assert report['inserted'] == 25
+    assert seen == [10, 20, 25]
+
+def test_import_words_command(app, tmp_path):
+    path = tmp_path / 'n5.jsonl'
+    path.write_text('{"kanji": "本", "romaji": "hon", "english": "book"}\n', encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['import-words', str(path), '--group', 'JLPT N5'])
+    assert result.exit_code == 0, result.output
+    assert '1 inserted' in result.output and '1 group links' in result.output
+
+@pytest.mark.parametrize('writer', [True, False])
+def test_overlapping_imports_do_not_duplicate(db_path, monkeypatch, writer):
+    if not writer:
+        # Each process has its own writer thread; without one, imports write on pooled connections
+        register_writer(db_path, None)
+    lookup_words, lookup_groups = ImportDAO._lookup_word_ids, ImportDAO._lookup_group_ids
+
+    # Widen the gap between looking the keys up and inserting them
+    def slow_words(self, conn, keys):
+        found = lookup_words(self, conn, keys)
+        time.sleep(0.1)
+        return found
+
+    def slow_groups(conn, names):
+        found = lookup_groups(conn, names)
+        time.sleep(0.1)
+        return found
+    monkeypatch.setattr(ImportDAO, '_lookup_word_ids', slow_words)
+    monkeypatch.setattr(ImportDAO, '_lookup_group_ids', staticmethod(slow_groups))
+
+    records = [(1, {'kanji': '本', 'romaji': 'hon', 'english': 'book', 'groups': ['Objects']}),
+               (2, {'kanji': '水', 'romaji': 'mizu', 'english': 'water', 'groups': ['Objects']})]
+    reports = []
+    threads = [threading.Thread(target=lambda: reports.append(
+        ImportService(db_path).import_words(iter(records), create_groups=True))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(report['inserted'] for report in reports) == [0, 2]
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM words WHERE romaji IN ('hon', 'mizu')").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM groups WHERE name = 'Objects'").fetchone()[0] == 1
+    finally:
+        conn.close()
+    assert words_in_group(db_path, 'Objects') == ['hon', 'mizu']
@@ -0,0 +1,109 @@
+import json
+import threading
+import pytest
+from app import create_app
+from app.cache import EntityCache
+from app.db import close_pool
+from migrations.migrate import migrate
+from test_metrics import sample
+from test_timeseries import execute
+
+@pytest.fixture
+def cache(app):
+    cache = app.extensions['entity_cache']
+    # Look for writes made elsewhere on every lookup
+    cache.poll_interval = 0
+    return cache
+
+def english_of(client, word_id):
+    return client.get(f'/api/words/{word_id}').get_json()['data']['english']
+
+def test_repeated_reads_are_served_from_cache(client, cache):
+    for _ in range(3):
+        assert client.get('/api/words/1').get_json()['data']['english'] == 'cat'
+        assert client.get('/api/groups/1').status_code == 200
+        assert client.get('/api/study_activities/1').status_code == 200
+    stats = cache.stats()
+    assert stats['tables'] == {table: {'hits': 2, 'misses': 1} for table in ('words', 'groups', 'study_activities')}
+    assert stats['hit_rate'] == pytest.approx(2 / 3, abs=1e-4)
+    # Missing rows are looked up every time and never stored
+    assert client.get('/api/words/999').status_code == 404
+    assert cache.stats()['size'] == 3
+
+def test_writes_invalidate_only_their_rows(client, cache):
+    assert english_of(client, 1) == 'cat' and english_of(client, 2) == 'dog'
+    response = client.put('/api/words/1', json={'kanji': '猫', 'romaji': 'neko', 'english': 'kitty'})
+    assert response.get_json()['data']['english'] == 'kitty'
+
+    assert english_of(client, 1) == 'kitty'
+    assert english_of(client, 2) == 'dog'
+    stats = cache.stats()
+    # The update was accounted for, so word 2 stayed cached through the poll
+    assert stats['invalidations'] == 1 and stats['flushes'] == 0
+    # Hits: the update's existence check and word 2; misses: both first reads and word 1 after the write
+    assert stats['tables']['words'] == {'hits': 2, 'misses': 3}
+
+    client.delete('/api/words/2')
+    assert client.get('/api/words/2').status_code == 404
+    client.post('/api/words/import?format=jsonl&on_conflict=update', content_type='application/x-ndjson',
+                data=json.dumps({'kanji': '猫', 'romaji': 'neko', 'english': 'cat'}, ensure_ascii=False))
+    assert english_of(client, 1) == 'cat'
+    assert cache.stats()['flushes'] == 0
+
+def test_writes_from_other_processes_flush_the_table(client, cache, db_path):
+    assert english_of(client, 1) == 'cat'
+    assert client.get('/api/groups/1').status_code == 200
+    execute(db_path, "UPDATE words SET english = 'feline' WHERE id = 1")
+
+    assert english_of(client, 1) == 'feline'
+    stats = cache.stats()
+    assert stats['flushes'] == 1
+    # Groups did not change and stay cached
+    assert client.get('/api/groups/1').status_code == 200
+    assert cache.stats()['tables']['groups']['hits'] == 1
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = EntityCache(lambda tables: dict.fromkeys(tables, 1), maxsize=10)
+    loading, written = threading.Event(), threading.Event()
+
+    def slow_load():
+        loading.set()
+        written.wait(5)
+        return {'english': 'stale'}
+    reader = threading.Thread(target=cache.get, args=('words', 1, slow_load))
+    reader.start()
+    loading.wait(5)
+    cache.invalidate('words', (1,))
+    written.set()
+    reader.join()
+    assert cache.get('words', 1, lambda: {'english': 'fresh'}) == {'english': 'fresh'}
+
+def test_least_recently_used_rows_are_evicted():
+    cache = EntityCache(lambda tables: dict.fromkeys(tables, 1), maxsize=2)
+    for key in (1, 2, 1, 3):
+        cache.get('words', key, lambda: {'id': key})
+    assert cache.get('words', 1, lambda: None) == {'id': 1}
+    assert cache.get('words', 2, lambda: None) is None
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_metrics(client, cache):
+    client.get('/api/words/1')
+    client.get('/api/words/1')
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert sample(text, 'langportal_entity_cache_hits_total', table='words') == 1
+    assert sample(text, 'langportal_entity_cache_misses_total', table='words') == 1
+    assert sample(text, 'langportal_entity_cache_size') == 1
+
+def test_cache_can_be_disabled(tmp_path):
+    db_path = str(tmp_path / 'nocache.db')
+    migrate(db_path, verbose=False)
+    app = create_app({'TESTING': True, 'DATABASE': db_path, 'ENTITY_CACHE_SIZE': 0})
+    try:
+        assert 'entity_cache' not in app.extensions
+        client = app.test_client()
+        assert english_of(client, 1) == 'cat'
+        execute(db_path, "UPDATE words SET english = 'feline' WHERE id = 1")
+        assert english_of(client, 1) == 'feline'
+        assert 'langportal_entity_cache' not in client.get('/api/metrics').get_data(as_text=True)
+    finally:
+        close_pool(db_path)
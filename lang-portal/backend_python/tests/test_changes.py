@@ -0,0 +1,166 @@
+import json
+import pytest
+from app.services.change_service import ChangeService
+from test_benchmarks import dump
+from test_timeseries import execute
+
+@pytest.fixture
+def fast_polls(app):
+    app.config.update(CHANGES_POLL_MS=10.0, CHANGES_KEEPALIVE_SECONDS=0.05)
+
+def latest(client):
+    return client.get('/api/changes?since=0&limit=1').get_json()['data']['latest']
+
+def changes_since(client, since, limit=1000):
+    response = client.get(f'/api/changes?since={since}&limit={limit}')
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+def update_word(client, word_id, english):
+    word = client.get(f'/api/words/{word_id}').get_json()['data']
+    response = client.put(f'/api/words/{word_id}', json=dict(word, english=english))
+    assert response.status_code == 200
+
+def events(body):
+    """Parse a Server-Sent Events body into (fields) dicts, skipping comments and the retry line"""
+    parsed = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append(fields)
+    return parsed
+
+def test_since_zero_is_a_full_sync(client):
+    data = changes_since(client, 0)
+    assert not data['has_more'] and data['next_since'] == data['latest']
+    words = {c['key']['id']: c['data'] for c in data['changes'] if c['table'] == 'words'}
+    assert sorted(words) == [1, 2, 3, 4]
+    # Upserts carry the row as the table's own endpoint serves it
+    assert words[1] == client.get('/api/words/1').get_json()['data']
+    assert {c['table'] for c in data['changes']} >= {'words', 'groups', 'study_sessions'}
+
+def test_writes_and_deletes_are_logged(client):
+    since = latest(client)
+    word = client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'}).get_json()['data']
+    update_word(client, word['id'], 'books')
+    update_word(client, 1, 'kitty')
+    assert client.post('/api/groups/1/words', json={'word_id': word['id']}).status_code == 201
+
+    data = changes_since(client, since)
+    # The new word appears once, as it is now, however often it changed
+    assert [(c['table'], c['op'], c['key']) for c in data['changes']] == [
+        ('words', 'upsert', {'id': word['id']}),
+        ('words', 'upsert', {'id': 1}),
+        ('group_words', 'upsert', {'group_id': 1, 'word_id': word['id']}),
+    ]
+    assert data['changes'][0]['data']['english'] == 'books'
+    assert data['changes'][2]['data'] == {'group_id': 1, 'word_id': word['id']}
+    seqs = [c['seq'] for c in data['changes']]
+    assert seqs == sorted(seqs) and data['next_since'] == seqs[-1] == data['latest']
+
+    # Deletes leave tombstones, including for rows removed by cascades
+    assert client.delete(f"/api/words/{word['id']}").status_code == 200
+    tombstones = changes_since(client, data['next_since'])['changes']
+    assert {(c['table'], c['op'], json.dumps(c['key'])) for c in tombstones} == {
+        ('words', 'delete', json.dumps({'id': word['id']})),
+        ('group_words', 'delete', json.dumps({'group_id': 1, 'word_id': word['id']})),
+    }
+    assert all(c['data'] is None for c in tombstones)
+    assert client.get(f"/api/changes?since={latest(client)}").get_json()['data']['changes'] == []
+
+def test_session_deletes_are_logged(client, db_path):
+    since = latest(client)
+    execute(db_path, 'DELETE FROM study_sessions WHERE id = 2')
+    [change] = changes_since(client, since)['changes']
+    assert (change['table'], change['op'], change['key']) == ('study_sessions', 'delete', {'id': 2})
+
+def test_pages_follow_next_since(client):
+    for n in range(5):
+        client.post('/api/words', json={'kanji': f'字{n}', 'romaji': f'ji{n}', 'english': f'letter {n}'})
+    since, seen = 0, []
+    while True:
+        data = changes_since(client, since, limit=3)
+        assert len(data['changes']) <= 3
+        seen += [c['seq'] for c in data['changes']]
+        since = data['next_since']
+        if not data['has_more']:
+            break
+    assert seen == sorted(set(seen))
+    assert seen == [c['seq'] for c in changes_since(client, 0)['changes']]
+    assert since == data['latest']
+
+@pytest.mark.parametrize('query', ['since=-1', 'since=x', 'limit=0', 'limit=1001'])
+def test_invalid_parameters(client, query):
+    assert client.get(f'/api/changes?{query}').status_code == 400
+
+def test_compaction(app, client, db_path):
+    update_word(client, 1, 'kitty')
+    update_word(client, 1, 'cat')
+    client.delete('/api/words/3')
+    before = latest(client)
+    execute(db_path, "UPDATE change_log SET changed_at = '2000-01-01T00:00:00.000' WHERE op = 'delete'")
+    [(tombstone,)] = dump(db_path, "SELECT MAX(seq) FROM change_log WHERE op = 'delete'")
+
+    result = ChangeService(db_path).compact(retention_days=30)
+    assert result['superseded'] >= 2 and result['expired'] >= 1
+    # One entry per live row is left
+    assert result['remaining'] == len(changes_since(client, 0)['changes'])
+    assert result['compacted_through'] >= tombstone
+
+    # Clients behind a dropped tombstone must resync; everyone else carries on
+    response = client.get('/api/changes?since=1')
+    assert response.status_code == 410
+    assert client.get('/api/changes/stream?since=1').status_code == 410
+    assert changes_since(client, before)['changes'] == []
+    assert latest(client) == before
+    full = changes_since(client, 0)['changes']
+    assert 3 not in [c['key'].get('id') for c in full if c['table'] == 'words']
+    assert [c['data']['english'] for c in full if c['key'] == {'id': 1} and c['table'] == 'words'] == ['cat']
+
+def test_recent_tombstones_are_kept(client, db_path):
+    client.delete('/api/words/3')
+    result = ChangeService(db_path).compact(retention_days=30)
+    assert result['expired'] == 0 and result['compacted_through'] == 0
+    assert client.get('/api/changes?since=1').status_code == 200
+
+def test_compact_command(app, client, db_path):
+    update_word(client, 1, 'kitty')
+    result = app.test_cli_runner().invoke(args=['compact-changes', '--retention-days', '0'])
+    assert result.exit_code == 0, result.output
+    assert 'Dropped 1 superseded entries' in result.output
+
+def test_stream_sends_the_backlog(client):
+    since = latest(client)
+    update_word(client, 1, 'kitty')
+    client.delete('/api/words/2')
+    response = client.get(f'/api/changes/stream?since={since}&timeout=0')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    sent = events(response.get_data(as_text=True))
+    assert [e['event'] for e in sent] == ['change', 'change']
+    assert [int(e['id']) for e in sent] == [json.loads(e['data'])['seq'] for e in sent]
+    assert json.loads(sent[0]['data'])['data']['english'] == 'kitty'
+    assert json.loads(sent[1]['data'])['op'] == 'delete'
+
+    # A reconnecting client resumes after the last event it saw
+    resumed = client.get('/api/changes/stream?since=0&timeout=0', headers={'Last-Event-ID': sent[0]['id']})
+    assert [e['id'] for e in events(resumed.get_data(as_text=True))] == [sent[1]['id']]
+
+def test_stream_follows_new_changes(client, fast_polls):
+    response = client.get('/api/changes/stream?timeout=5', buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry: ')
+    update_word(client, 4, 'fishes')
+    received = b''
+    for chunk in chunks:
+        received += chunk
+        if b'event: change' in received:
+            break
+    response.close()
+    [event] = events(received.decode('utf-8'))
+    assert json.loads(event['data'])['key'] == {'id': 4}
+
+def test_idle_stream_sends_keepalives(client, fast_polls):
+    body = client.get('/api/changes/stream?timeout=0.3').get_data(as_text=True)
+    assert ': keepalive' in body and events(body) == []
@@ -0,0 +1,110 @@
+import gzip
+import json
+import zlib
+import pytest
+from datetime import datetime
+from app import compression, create_app
+from app.db import close_pool
+from app.models.study_session import StudyReview
+from app.models.word import Word
+from app.serialization import FastJSONProvider, orjson
+from migrations.migrate import migrate
+from test_streaming import add_reviews, small_chunks
+from test_timeseries import execute
+
+def add_words(db_path, count):
+    for n in range(count):
+        execute(db_path, 'INSERT INTO words (kanji, romaji, english) VALUES (?, ?, ?)',
+                (f'語{n}', f'go{n}', f'word number {n}'))
+
+def gzipped(client, path, **headers):
+    return client.get(path, headers={'Accept-Encoding': 'gzip', **headers})
+
+def test_models_and_datetimes_encode_natively(app):
+    review = StudyReview(id=1, study_session_id=2, word_id=3, correct=True,
+                         created_at=datetime(2025, 3, 1, 10, 0, 0, 123456),
+                         word=Word(id=3, kanji='鳥', romaji='tori', english='bird'))
+    with app.app_context():
+        encoded = json.loads(app.json.dumps({'review': review}))
+    # Same shape and timestamp format as the models' to_dict()
+    assert encoded['review'] == json.loads(json.dumps(review.to_dict()))
+    assert encoded['review']['created_at'] == '2025-03-01T10:00:00.123456'
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_encoders_produce_the_same_documents(app, client, db_path):
+    assert app.json.encoder == 'orjson'
+    add_reviews(db_path, 5)
+    stdlib = FastJSONProvider(app, 'stdlib')
+    for path in ('/api/words?per_page=50', '/api/study_sessions/1', '/api/groups/summary',
+                 '/api/study_activities/1'):
+        fast = client.get(path).get_data()
+        app.json = stdlib
+        try:
+            assert client.get(path).get_json() == json.loads(fast), path
+        finally:
+            app.json = FastJSONProvider(app)
+    # orjson leaves Japanese text unescaped, which is a third of the bytes
+    assert '猫'.encode('utf-8') in client.get('/api/words/1').get_data()
+
+def test_invalid_request_bodies_are_rejected(client):
+    response = client.post('/api/words', data='{"kanji": ', content_type='application/json')
+    assert response.status_code == 400
+
+def test_unknown_encoder_is_refused(app):
+    with pytest.raises(ValueError):
+        FastJSONProvider(app, 'simplejson')
+
+def test_large_responses_are_gzipped(client, db_path):
+    add_words(db_path, 100)
+    plain = client.get('/api/words?per_page=100')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = gzipped(client, '/api/words?per_page=100')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    assert int(response.headers['Content-Length']) == len(response.data) < len(plain.data) / 3
+    # The ETag is weakened for the compressed bytes and still answers conditional requests
+    assert response.headers['ETag'] == 'W/' + plain.headers['ETag']
+    assert gzipped(client, '/api/words?per_page=100',
+                   **{'If-None-Match': response.headers['ETag']}).status_code == 304
+
+def test_small_and_refused_responses_stay_plain(client, db_path):
+    assert 'Content-Encoding' not in gzipped(client, '/api/words/1').headers
+    add_words(db_path, 100)
+    refused = client.get('/api/words?per_page=100', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in refused.headers
+    assert 'Content-Encoding' not in gzipped(client, '/api/words/999').headers
+
+def test_streamed_lists_are_compressed_per_chunk(client, db_path, small_chunks):
+    add_reviews(db_path, 50)
+    plain = client.get('/api/study_sessions/1/reviews?format=ndjson').get_data()
+    response = client.get('/api/study_sessions/1/reviews?format=ndjson',
+                          headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    # Every chunk is flushed, so the first rows decode before the stream ends
+    decoder = zlib.decompressobj(31)
+    first = decoder.decompress(next(response.response))
+    assert json.loads(first.splitlines()[0])['word_id'] == 1
+    rest = b''.join(response.response)
+    assert first + decoder.decompress(rest) + decoder.flush() == plain
+
+@pytest.mark.skipif(compression.brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred(client, db_path):
+    add_words(db_path, 100)
+    response = client.get('/api/words?per_page=100', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert compression.brotli.decompress(response.data) == client.get('/api/words?per_page=100').data
+
+def test_compression_can_be_disabled(tmp_path):
+    db_path = str(tmp_path / 'plain.db')
+    migrate(db_path, verbose=False)
+    add_words(db_path, 100)
+    app = create_app({'TESTING': True, 'DATABASE': db_path, 'COMPRESS_MIN_SIZE': None})
+    try:
+        response = gzipped(app.test_client(), '/api/words?per_page=100')
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
+    finally:
+        close_pool(db_path)
@@ -0,0 +1,47 @@
+import pytest
+
+@pytest.mark.parametrize('url', [
+    '/api/words',
+    '/api/words/1',
+    '/api/groups',
+    '/api/study_activities',
+    '/api/dashboard/quick_stats',
+    '/api/dashboard/study_progress',
+    '/api/dashboard/last_study_session',
+])
+def test_unchanged_resource_returns_304(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/')
+
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert second.headers['Vary'] == first.headers['Vary'] == 'Accept-Encoding'
+    assert second.data == b''
+
+def test_write_changes_etag(client):
+    etag = client.get('/api/words').headers['ETag']
+    client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    response = client.get('/api/words', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_unrelated_write_keeps_etag(client):
+    etag = client.get('/api/groups').headers['ETag']
+    client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    assert client.get('/api/groups', headers={'If-None-Match': etag}).status_code == 304
+
+def test_query_string_is_part_of_etag(client):
+    assert client.get('/api/words?page=1').headers['ETag'] != client.get('/api/words?page=2').headers['ETag']
+
+def test_review_changes_dashboard_etag(client):
+    etag = client.get('/api/dashboard/study_progress').headers['ETag']
+    client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    assert client.get('/api/dashboard/study_progress', headers={'If-None-Match': etag}).status_code == 200
+
+def test_errors_have_no_etag(client):
+    response = client.get('/api/words/999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
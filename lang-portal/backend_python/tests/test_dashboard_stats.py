@@ -0,0 +1,64 @@
+from app.dao.dashboard_dao import DashboardDAO
+from app.dao.study_session_dao import StudySessionDAO
+from app.dao.word_dao import WordDAO
+from app.dao.group_dao import GroupDAO
+from test_timeseries import execute
+
+def test_seeded_stats_match_recomputation(db_path):
+    dao = DashboardDAO(db_path)
+    assert dao.verify_stats() == {}
+    stats = dao.get_stats()
+    assert stats['total_words'] == 4
+    assert stats['total_reviews'] == 2
+    assert stats['studied_words'] == 2
+
+def test_writes_keep_stats_consistent(db_path):
+    dashboard = DashboardDAO(db_path)
+    sessions = StudySessionDAO(db_path)
+    word = WordDAO(db_path).create_word('本', 'hon', 'book')
+    group = GroupDAO(db_path).create_group('Objects')
+
+    session = sessions.create_study_session(group['id'], 1)
+    sessions.add_review(session['id'], word['id'], True)
+    sessions.add_review(session['id'], word['id'], False)
+    sessions.add_review(session['id'], 3, True)
+
+    assert dashboard.verify_stats() == {}
+    last = dashboard.get_last_study_session()
+    assert last['session_id'] == session['id']
+    assert (last['correct_words'], last['incorrect_words']) == (2, 1)
+    assert dashboard.get_quick_stats() == {'active_groups': 3, 'total_sessions': 3}
+
+    # Cascading deletes go through the same triggers
+    WordDAO(db_path).delete_word(word['id'])
+    GroupDAO(db_path).delete_group(group['id'])
+    assert dashboard.verify_stats() == {}
+    assert dashboard.get_last_study_session()['session_id'] in (1, 2)
+
+def test_rebuild_command_repairs_drift(app, db_path):
+    dao = DashboardDAO(db_path)
+    with dao._get_connection() as conn:
+        conn.execute('UPDATE dashboard_stats SET total_words = 999, studied_words = 0')
+        conn.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-stats', '--verify-only'])
+    assert result.exit_code != 0
+    assert 'total_words: stored=999 expected=4' in result.output
+
+    result = runner.invoke(args=['rebuild-stats'])
+    assert result.exit_code == 0, result.output
+    assert dao.verify_stats() == {}
+
+def test_dashboard_endpoints_read_stats(client, db_path):
+    progress = client.get('/api/dashboard/study_progress').get_json()['data']
+    assert progress == {'studied_words': 2, 'total_words': 4}
+    # Both seeded sessions start at the same time; the later id wins and has no reviews
+    last = client.get('/api/dashboard/last_study_session').get_json()['data']
+    assert (last['session_id'], last['correct_words'], last['incorrect_words']) == (2, 0, 0)
+
+    for word_id, correct in ((1, 1), (2, 1), (3, 0)):
+        execute(db_path, 'INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (2, ?, ?)',
+                (word_id, correct))
+    last = client.get('/api/dashboard/last_study_session').get_json()['data']
+    assert (last['session_id'], last['correct_words'], last['incorrect_words']) == (2, 2, 1)
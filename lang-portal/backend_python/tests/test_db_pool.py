@@ -0,0 +1,60 @@
+import threading
+import pytest
+from app.db import ConnectionPool, PoolTimeoutError
+from app.services.word_service import WordService
+from app.utils.services import get_service
+
+def test_pool_applies_pragmas(app):
+    pool = app.extensions['db_pool']
+    with pool.connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+
+def test_nested_borrow_reuses_connection(app):
+    pool = app.extensions['db_pool']
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+    assert pool.stats()['checkouts'] == 1
+
+def test_pool_waits_and_times_out(db_path):
+    pool = ConnectionPool(db_path, size=1, timeout=0.05)
+    try:
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.connection():
+                held.set()
+                release.wait()
+
+        worker = threading.Thread(target=hold)
+        worker.start()
+        held.wait()
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+        release.set()
+        worker.join()
+
+        with pool.connection():
+            pass
+        stats = pool.stats()
+        assert stats['timeouts'] == 1
+        assert stats['created'] == 1
+        assert stats['in_use'] == 0
+    finally:
+        pool.close()
+
+def test_services_are_shared_per_app(app):
+    with app.app_context():
+        assert get_service(WordService) is get_service(WordService)
+
+def test_create_word_uses_one_checkout(app, client):
+    pool = app.extensions['db_pool']
+    before = pool.stats()['checkouts']
+    response = client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['english'] == 'book'
+    assert pool.stats()['checkouts'] - before == 1
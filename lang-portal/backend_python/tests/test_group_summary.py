@@ -0,0 +1,44 @@
+import pytest
+
+def add_words(client, group_id, word_ids):
+    for word_id in word_ids:
+        assert client.post(f'/api/groups/{group_id}/words', json={'word_id': word_id}).status_code == 201
+
+def test_summary_aggregates_words_and_reviews(client):
+    add_words(client, 1, [1, 2, 3])
+    data = client.get('/api/groups/summary').get_json()['data']
+    assert data['pagination']['total_items'] == 2
+    first, second = data['items']
+    assert first['word_count'] == 3
+    assert first['reviewed_word_count'] == 2
+    assert first['review_count'] == 2
+    assert first['accuracy'] == 50.0
+    assert first['last_studied_at'] and 'T' in first['last_studied_at']
+    assert (second['word_count'], second['review_count'], second['accuracy']) == (0, 0, 0)
+
+def test_summary_is_one_statement_per_page(client):
+    client.post('/api/groups', json={'name': 'Unstudied'})
+    items = client.get('/api/groups/summary?page=2&per_page=2').get_json()['data']['items']
+    assert [g['name'] for g in items] == ['Unstudied']
+    assert items[0]['last_studied_at'] is None
+
+def test_group_words_paginate_and_sort(client):
+    add_words(client, 1, [1, 2, 3, 4])
+    data = client.get('/api/groups/1/words?per_page=3&sort_by=english').get_json()['data']
+    assert [w['english'] for w in data['items']] == ['bird', 'cat', 'dog']
+    assert data['pagination']['total_items'] == 4
+    assert data['items'][0]['added_at']
+
+    data = client.get('/api/groups/1/words?page=2&per_page=3&sort_by=english&order=desc').get_json()['data']
+    assert [w['english'] for w in data['items']] == ['bird']
+
+@pytest.mark.parametrize('query', ['sort_by=meaning', 'order=up'])
+def test_group_words_rejects_bad_sort(client, query):
+    assert client.get(f'/api/groups/1/words?{query}').status_code == 400
+
+def test_add_word_errors(client):
+    assert client.post('/api/groups/999/words', json={'word_id': 1}).status_code == 404
+    assert client.post('/api/groups/1/words', json={'word_id': 999}).status_code == 404
+    add_words(client, 1, [1])
+    assert client.post('/api/groups/1/words', json={'word_id': 1}).status_code == 200
+    assert client.get('/api/groups/999/words').status_code == 404
@@ -0,0 +1,77 @@
+import os
+import re
+import tempfile
+from app import create_app
+from app.db import close_pool
+from app.metrics import Histogram, InstrumentedConnection
+
+def sample(text, name, **labels):
+    """Value of one sample in Prometheus text output"""
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = '^' + re.escape(name + ('{' + selector + '}' if selector else '')) + r' (\S+)$'
+    match = re.search(pattern, text, re.MULTILINE)
+    assert match, f'{name} {labels} missing'
+    return float(match.group(1))
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('h', 'help', (1, 5), ('endpoint',))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(('e',), value)
+    text = '\n'.join(histogram.render())
+    assert sample(text, 'h_bucket', endpoint='e', le='1') == 2
+    assert sample(text, 'h_bucket', endpoint='e', le='5') == 3
+    assert sample(text, 'h_bucket', endpoint='e', le='+Inf') == 4
+    assert sample(text, 'h_sum', endpoint='e') == 14.5
+    assert sample(text, 'h_count', endpoint='e') == 4
+
+def test_requests_are_measured_per_endpoint(client):
+    client.get('/api/words?per_page=3')
+    client.get('/api/words?per_page=3')
+    client.get('/api/words/1')
+    client.get('/api/words/999')
+
+    response = client.get('/api/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert sample(text, 'langportal_http_requests_total', endpoint='words.get_words', method='GET', status='200') == 2
+    assert sample(text, 'langportal_http_requests_total', endpoint='words.get_word', method='GET', status='404') == 1
+    assert sample(text, 'langportal_http_request_duration_seconds_count', endpoint='words.get_words') == 2
+    # The ETag versions, the total count and the page itself, per request
+    assert sample(text, 'langportal_db_statements_per_request_sum', endpoint='words.get_words') >= 6
+    assert sample(text, 'langportal_db_rows_per_request_sum', endpoint='words.get_words') >= 6
+    assert sample(text, 'langportal_db_time_seconds_per_request_sum', endpoint='words.get_words') > 0
+    assert sample(text, 'langportal_serialization_seconds_per_request_sum', endpoint='words.get_words') > 0
+    assert sample(text, 'langportal_db_pool_size', pool='read_write') == 5
+    # Reads borrow from the read-only pool
+    assert sample(text, 'langportal_db_pool_checkouts_total', pool='read_only') >= 4
+
+def test_trigger_programs_count_as_statements(client):
+    client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    text = client.get('/api/metrics').get_data(as_text=True)
+    statements = sample(text, 'langportal_db_statements_per_request_sum', endpoint='study_sessions.record_word_reviews')
+    assert statements > 10
+
+def test_slow_query_log_captures_plans(app, client):
+    app.extensions['metrics'].slow_query_seconds = 0
+    client.get('/api/words/1')
+    data = client.get('/api/metrics/slow_queries').get_json()['data']
+    lookup = next(q for q in data['queries'] if q['sql'].startswith('SELECT id, kanji'))
+    assert lookup['endpoint'] == 'words.get_word'
+    assert lookup['plan'] == ['SEARCH words USING INTEGER PRIMARY KEY (rowid=?)']
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert sample(text, 'langportal_db_slow_queries_total', endpoint='words.get_word') >= 1
+
+def test_slow_query_log_is_off_by_default(client):
+    client.get('/api/words/1')
+    assert client.get('/api/metrics/slow_queries').get_json()['data']['queries'] == []
+
+def test_metrics_can_be_disabled():
+    fd, db_path = tempfile.mkstemp()
+    try:
+        app = create_app({'TESTING': True, 'DATABASE': db_path, 'METRICS_ENABLED': False})
+        assert not isinstance(app.extensions['db_pool']._connect(), InstrumentedConnection)
+        assert app.test_client().get('/api/metrics').status_code == 404
+    finally:
+        close_pool(db_path)
+        os.close(fd)
+        os.unlink(db_path)
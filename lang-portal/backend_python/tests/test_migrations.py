@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import pytest
+from app.dao.change_dao import SUPERSEDED
+from app.dao.dashboard_dao import TIMESERIES_BUCKETS
+from app.dao.study_session_dao import StudySessionDAO
+from app.dao.group_dao import GroupDAO
+from app.dao.schedule_dao import ScheduleDAO
+from app.dao.word_dao import WordDAO
+from migrations.migrate import migrate, get_migration_files
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def populated_conn(conn):
+    """Spread reviews over many sessions and words so planner stats resemble production"""
+    conn.executemany('INSERT INTO words (kanji, romaji, english) VALUES (?, ?, ?)',
+                     [(f'k{i}', f'r{i}', f'e{i}') for i in range(200)])
+    conn.executemany('INSERT INTO study_sessions (group_id, study_activity_id, start_time) VALUES (?, ?, ?)',
+                     [(1 + i % 2, 1 + i % 2, f'2025-01-01 00:{i // 60:02d}:{i % 60:02d}') for i in range(100)])
+    conn.executemany('INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (?, ?, ?)',
+                     [(1 + i % 100, 1 + i % 200, i % 3 == 0) for i in range(2000)])
+    conn.commit()
+    conn.execute('ANALYZE')
+    return conn
+
+def query_plan(conn, sql, params=()):
+    return ' | '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+def test_all_migrations_recorded(conn):
+    versions = [row[0] for row in conn.execute('SELECT version FROM schema_migrations ORDER BY version')]
+    assert versions == [version for version, _, _ in get_migration_files()]
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0] == 1
+
+def test_rerun_is_noop(db_path, conn):
+    assert migrate(db_path, verbose=False) == []
+    assert conn.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 4
+
+def test_legacy_database_is_baselined():
+    fd, path = tempfile.mkstemp()
+    try:
+        legacy = sqlite3.connect(path)
+        with open(get_migration_files()[0][2]) as f:
+            legacy.executescript(f.read())
+        legacy.close()
+
+        applied = migrate(path, verbose=False)
+        assert 1 not in applied and applied
+
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 4
+        conn.close()
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+@pytest.mark.parametrize('sql,index', [
+    # StudySessionDAO.get_study_session_by_id(include_reviews=True)
+    ('''SELECT sr.id, sr.word_id, sr.correct, sr.created_at, w.kanji, w.romaji, w.english
+        FROM study_reviews sr JOIN words w ON sr.word_id = w.id
+        WHERE sr.study_session_id = ?''', 'idx_study_reviews_session_id'),
+    # StudySessionDAO.get_session_stats / add_reviews
+    ('''SELECT COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
+        FROM study_reviews WHERE study_session_id = ?''', 'idx_study_reviews_session_id'),
+    # dashboard_stats triggers: first review of a word
+    ('SELECT 1 FROM study_reviews WHERE word_id = ?', 'idx_study_reviews_word_created'),
+    # daily_rollups triggers: first review of a word that day in a group and activity
+    ('''SELECT 1 FROM study_reviews r JOIN study_sessions s ON s.id = r.study_session_id
+        WHERE r.word_id = ? AND r.id != ? AND r.created_at >= ? AND r.created_at < date(?, '+1 day')
+          AND s.group_id = ? AND s.study_activity_id = ?''',
+     'idx_study_reviews_word_created (word_id=? AND created_at>? AND created_at<?)'),
+    # DashboardDAO.get_timeseries
+    (f'''SELECT {TIMESERIES_BUCKETS['week']} AS date, SUM(reviews) FROM daily_rollups
+        WHERE day BETWEEN ? AND ? AND group_id = ? GROUP BY 1 ORDER BY 1''',
+     'SEARCH daily_rollups USING PRIMARY KEY (day>? AND day<?)'),
+    # StudySessionDAO.get_study_sessions_after
+    (f'''SELECT {StudySessionDAO.SESSION_COLUMNS} FROM study_sessions
+        WHERE (start_time, id) > (?, ?) ORDER BY study_sessions.start_time, id LIMIT 10''',
+     'idx_study_sessions_start_time'),
+    # dashboard_stats triggers: latest session
+    ('SELECT id FROM study_sessions ORDER BY start_time DESC, id DESC LIMIT 1', 'idx_study_sessions_start_time'),
+    # study_activities delete cascade
+    ('SELECT id FROM study_sessions WHERE study_activity_id = ?', 'idx_study_sessions_activity_id'),
+    # words delete cascade
+    ('SELECT group_id FROM group_words WHERE word_id = ?', 'idx_group_words_word_id'),
+    # ChangeDAO.get_changes / compact: is an entry superseded
+    (f'SELECT seq FROM change_log WHERE seq > ? AND NOT {SUPERSEDED} ORDER BY seq LIMIT 10',
+     'COVERING INDEX idx_change_log_row'),
+    # GroupDAO.get_group_summaries
+    (GroupDAO.GROUP_SUMMARY_SQL, 'SEARCH r USING INDEX idx_study_reviews_session_id'),
+    (GroupDAO.GROUP_SUMMARY_SQL, 'SEARCH s USING INDEX idx_study_sessions_group_id'),
+    # ScheduleDAO.get_due_words
+    (ScheduleDAO.DUE_WORDS_SQL, 'SEARCH ws USING INDEX idx_word_schedules_due (group_id=? AND due_at<?)'),
+    # WordDAO.get_reviewed_words: the page comes off the sort column's index alone
+    (WordDAO._reviewed_words_query('accuracy', 'asc', 1)[0], 'SCAN ws USING COVERING INDEX idx_word_stats_accuracy'),
+    (WordDAO._reviewed_words_query('last_reviewed', 'desc', 1, ('2025-01-01', 1))[0],
+     'SEARCH ws USING COVERING INDEX idx_word_stats_last_reviewed (last_reviewed_at<?)'),
+    (WordDAO._reviewed_words_query('reviews', 'desc', 1)[0], 'SEARCH ws USING COVERING INDEX idx_word_stats_reviews (reviews>?)'),
+    ('SELECT COUNT(*) FROM word_stats WHERE reviews >= ?', 'COVERING INDEX idx_word_stats_reviews'),
+    # word_stats triggers: recounting a word's streak from its latest wrong review
+    ('''SELECT COUNT(*) FROM study_reviews r WHERE r.word_id = ? AND (r.created_at, r.id) > (
+          SELECT w.created_at, w.id FROM study_reviews w WHERE w.word_id = ? AND NOT w.correct
+          ORDER BY w.created_at DESC, w.id DESC LIMIT 1)''',
+     'SEARCH r USING COVERING INDEX idx_study_reviews_word_created (word_id=? AND created_at>?)'),
+])
+def test_hot_queries_use_indexes(populated_conn, sql, index):
+    params = tuple(1 for _ in range(sql.count('?')))
+    plan = query_plan(populated_conn, sql, params)
+    assert index in plan, plan
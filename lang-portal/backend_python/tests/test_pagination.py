@@ -0,0 +1,70 @@
+import pytest
+from app.dao.study_session_dao import StudySessionDAO
+from app.utils.pagination import encode_cursor, decode_cursor
+from test_timeseries import execute
+
+def collect(client, url):
+    """Follow next_cursor links until exhausted, returning every item"""
+    items = []
+    response = client.get(url)
+    while True:
+        body = response.get_json()
+        assert response.status_code == 200, body
+        data = body['data']
+        items.extend(data['items'])
+        next_link = data['pagination']['links']['next']
+        if not next_link:
+            return items, data['pagination']
+        response = client.get(next_link)
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(('2025-01-01 10:00:00', 7))) == ('2025-01-01 10:00:00', 7)
+
+@pytest.mark.parametrize('token', ['not-base64!', encode_cursor(('x', 'y')), 'WzFd'])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+def test_words_cursor_walks_every_row(client):
+    for i in range(7):
+        client.post('/api/words', json={'kanji': f'k{i}', 'romaji': f'r{i}', 'english': f'e{i}'})
+    items, pagination = collect(client, '/api/words?cursor=&per_page=3')
+    assert [w['id'] for w in items] == list(range(1, 12))
+    assert 'total_items' not in pagination
+
+def test_words_cursor_include_total(client):
+    data = client.get('/api/words?cursor=&per_page=2&include_total=true').get_json()['data']
+    assert data['pagination']['total_items'] == 4
+    assert len(data['items']) == 2
+
+def test_page_mode_still_works_and_links_to_cursor(client):
+    data = client.get('/api/words?page=1&per_page=3').get_json()['data']
+    assert data['pagination']['total_pages'] == 2
+    assert data['pagination']['current_page'] == 1
+    rest = client.get(data['pagination']['links']['next']).get_json()['data']
+    assert [w['id'] for w in rest['items']] == [4]
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get('/api/words?cursor=bogus').status_code == 400
+    assert client.get('/api/groups?cursor=bogus').status_code == 400
+
+@pytest.mark.parametrize('url,expected', [
+    ('/api/groups?cursor=&per_page=1', [1, 2]),
+    ('/api/study_activities?cursor=&per_page=1', [1, 2]),
+    ('/api/study_sessions?cursor=&per_page=1', [1, 2]),
+])
+def test_other_lists_support_cursors(client, url, expected):
+    items, _ = collect(client, url)
+    assert [item['id'] for item in items] == expected
+
+def test_groups_page_mode_unchanged(client):
+    data = client.get('/api/groups?page=1&per_page=10').get_json()['data']
+    assert [g['name'] for g in data] == ['Animals', 'Fruits']
+
+def test_session_page_mode_keeps_id_order(client, db_path):
+    # Session 3 starts first; only cursors seek on (start_time, id)
+    execute(db_path, "INSERT INTO study_sessions (group_id, study_activity_id, start_time) VALUES (1, 1, '2000-01-01 00:00:00')")
+    sessions, total = StudySessionDAO(db_path).get_study_sessions(1, 10)
+    assert [s['id'] for s in sessions] == [1, 2, 3] and total == 3
+    items, _ = collect(client, '/api/study_sessions?cursor=&per_page=2')
+    assert [item['id'] for item in items] == [3, 1, 2]
@@ -0,0 +1,55 @@
+import sqlite3
+
+def review_count(db_path, session_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM study_reviews WHERE study_session_id = ?', (session_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_batch_is_recorded_with_summary(client, db_path):
+    response = client.post('/api/study_sessions/2/review', json={'reviews': [
+        {'word_id': 1, 'correct': True},
+        {'word_id': '2', 'correct': True},
+        {'word_id': 3, 'correct': False},
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data == {
+        'session_id': 2,
+        'reviews_recorded': 3,
+        'correct_count': 2,
+        'session_accuracy': 2 / 3 * 100,
+        'replayed': False,
+    }
+    assert review_count(db_path, 2) == 3
+
+def test_invalid_item_rejects_whole_batch(client, db_path):
+    response = client.post('/api/study_sessions/2/review', json={'reviews': [
+        {'word_id': 1, 'correct': True},
+        {'word_id': 999, 'correct': True},
+        {'correct': 'yes'},
+    ]})
+    assert response.status_code == 400
+    errors = response.get_json()['errors']
+    assert any(e.startswith('reviews[2]') for e in errors)
+    assert review_count(db_path, 2) == 0
+
+    response = client.post('/api/study_sessions/2/review', json={'reviews': [{'word_id': 999, 'correct': True}]})
+    assert response.get_json()['errors'] == ['reviews[0]: word 999 not found']
+    assert review_count(db_path, 2) == 0
+
+def test_idempotency_key_prevents_double_insert(client, db_path):
+    payload = {'reviews': [{'word_id': 1, 'correct': True}, {'word_id': 2, 'correct': False}]}
+    headers = {'Idempotency-Key': 'batch-1'}
+    first = client.post('/api/study_sessions/1/review', json=payload, headers=headers).get_json()['data']
+    retry = client.post('/api/study_sessions/1/review', json=payload, headers=headers).get_json()['data']
+    assert first['replayed'] is False
+    assert retry['replayed'] is True
+    assert retry['reviews_recorded'] == first['reviews_recorded'] == 2
+    assert retry['session_accuracy'] == first['session_accuracy']
+    assert review_count(db_path, 1) == 4
+
+def test_unknown_session_is_404(client):
+    response = client.post('/api/study_sessions/999/review', json={'reviews': [{'word_id': 1, 'correct': True}]})
+    assert response.status_code == 404
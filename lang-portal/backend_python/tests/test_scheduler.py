@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime, timedelta
+from app.dao.schedule_dao import ScheduleDAO
+from app.utils.scheduler import MIN_EASE, RELEARN_DELAY, ScheduleState, review
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+def schedule(db_path, group_id, word_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('''
+            SELECT interval_days, repetitions, lapses, due_at FROM word_schedules
+            WHERE group_id = ? AND word_id = ?
+        ''', (group_id, word_id)).fetchone()
+    finally:
+        conn.close()
+
+def due_ids(client, group_id, as_of):
+    response = client.get(f'/api/groups/{group_id}/due?as_of={as_of.isoformat()}')
+    assert response.status_code == 200
+    return [w['id'] for w in response.get_json()['data']['words']]
+
+def test_sm2_intervals_grow_and_reset():
+    state = ScheduleState()
+    intervals = []
+    for _ in range(4):
+        state = review(state, True, NOW)
+        intervals.append(state.interval_days)
+    assert intervals == [1, 6, 15, 38]
+
+    state = review(state, False, NOW)
+    assert (state.repetitions, state.lapses, state.interval_days) == (0, 1, 0)
+    assert state.due_at == NOW + RELEARN_DELAY
+
+    for _ in range(20):
+        state = review(state, False, NOW)
+    assert state.ease == MIN_EASE
+
+def test_new_group_word_is_due_immediately(client, db_path):
+    client.post('/api/groups/1/words', json={'word_id': 3})
+    assert schedule(db_path, 1, 3)[:3] == (0, 0, 0)
+    assert due_ids(client, 1, datetime.utcnow() + timedelta(seconds=1)) == [3]
+    assert due_ids(client, 2, datetime.utcnow() + timedelta(seconds=1)) == []
+
+def test_reviews_move_due_dates(client, db_path):
+    for word_id in (3, 4):
+        client.post('/api/groups/1/words', json={'word_id': word_id})
+    response = client.post('/api/study_sessions/1/review', json={'reviews': [
+        {'word_id': 3, 'correct': True}, {'word_id': 4, 'correct': False}]})
+    assert response.status_code == 200
+
+    assert schedule(db_path, 1, 3)[:3] == (1, 1, 0)
+    assert schedule(db_path, 1, 4)[:3] == (0, 0, 1)
+    now = datetime.utcnow()
+    assert due_ids(client, 1, now) == []
+    assert due_ids(client, 1, now + timedelta(minutes=11)) == [4]
+    assert due_ids(client, 1, now + timedelta(days=1, minutes=1)) == [4, 3]
+
+def test_rebuild_replays_to_the_same_state(client, app, db_path):
+    client.post('/api/groups/1/words', json={'word_id': 3})
+    for correct in (True, True, False, True):
+        client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': correct}]})
+    before = schedule(db_path, 1, 3)
+
+    result = app.test_cli_runner().invoke(args=['rebuild-schedules'])
+    assert result.exit_code == 0, result.output
+    assert schedule(db_path, 1, 3) == before
+    assert ScheduleDAO(db_path).rebuild_schedules() == {
+        'schedules': 1, 'reviews_replayed': 4, 'schedules_reviewed': 1}
+
+def test_schedule_follows_group_membership(client, db_path):
+    client.post('/api/groups/1/words', json={'word_id': 3})
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM group_words WHERE group_id = 1 AND word_id = 3')
+    conn.commit()
+    conn.close()
+    assert schedule(db_path, 1, 3) is None
+
+def test_due_endpoint_errors(client):
+    assert client.get('/api/groups/999/due').status_code == 404
+    assert client.get('/api/groups/1/due?as_of=tomorrow').status_code == 400
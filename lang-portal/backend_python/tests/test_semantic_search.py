@@ -0,0 +1,96 @@
+import threading
+import numpy as np
+from app.embeddings import EmbeddingIndex, HashingEmbedder, get_index
+from test_timeseries import execute
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder that records how many texts it embedded"""
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(len(texts))
+        return super().embed(texts)
+
+def test_semantic_search_ranks_closest_word_first(client):
+    response = client.get('/api/words/semantic_search?q=dog&limit=2')
+    assert response.status_code == 200
+    items = response.get_json()['data']['items']
+    assert len(items) == 2
+    assert items[0]['english'] == 'dog'
+    assert items[0]['score'] >= items[1]['score']
+    assert set(items[0]) >= {'id', 'kanji', 'romaji', 'english', 'score'}
+
+def test_semantic_search_requires_query(client):
+    assert client.get('/api/words/semantic_search').status_code == 400
+
+def test_semantic_search_sees_new_words(client):
+    client.get('/api/words/semantic_search?q=dog')
+    client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    items = client.get('/api/words/semantic_search?q=book&limit=1').get_json()['data']['items']
+    assert items[0]['english'] == 'book'
+
+def test_refresh_only_embeds_changed_rows(tmp_path):
+    embedder = CountingEmbedder()
+    index = EmbeddingIndex(str(tmp_path), embedder, batch_size=2)
+    rows = [(1, 't1', 'dog'), (2, 't1', 'cat'), (3, 't1', 'bird')]
+    assert index.refresh(rows) == {'embedded': 3, 'reused': 0, 'removed': 0}
+    assert embedder.calls == [2, 1]
+
+    rows = [(1, 't1', 'dog'), (3, 't2', 'fish'), (4, 't1', 'horse')]
+    assert index.refresh(rows) == {'embedded': 2, 'reused': 1, 'removed': 1}
+    assert index.refresh(rows) == {'embedded': 0, 'reused': 3, 'removed': 0}
+    assert embedder.calls == [2, 1, 2]
+    assert index.search('fish', 1)[0][0] == 3
+
+def test_index_is_memory_mapped_and_reloads(tmp_path):
+    rows = [(1, 't1', 'dog'), (2, 't1', 'cat')]
+    EmbeddingIndex(str(tmp_path), HashingEmbedder(64)).refresh(rows, source_version=7)
+
+    reopened = EmbeddingIndex(str(tmp_path), HashingEmbedder(64))
+    _, _, matrix = reopened._state
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32 and matrix.shape == (2, 64)
+    assert reopened.source_version == 7
+    assert reopened.search('cat', 1)[0][0] == 2
+
+def test_embed_words_command(app):
+    result = app.test_cli_runner().invoke(args=['embed-words'])
+    assert result.exit_code == 0, result.output
+    assert 'Embedded 4 words' in result.output
+    assert len(get_index(app)) == 4
+
+def test_new_word_without_updated_at_is_embedded(client, db_path):
+    client.get('/api/words/semantic_search?q=dog')
+    execute(db_path, "INSERT INTO words (kanji, romaji, english, updated_at) VALUES ('本', 'hon', 'book', NULL)")
+    response = client.get('/api/words/semantic_search?q=book&limit=1')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data']['items'][0]['english'] == 'book'
+
+def test_refresh_never_runs_on_the_request_thread(app, client):
+    client.get('/api/words/semantic_search?q=dog')
+    index = get_index(app)
+    release = threading.Event()
+    embed = index.embedder.embed
+
+    def slow_embed(texts):
+        if len(texts) == 1 and texts[0].startswith('book'):
+            release.wait(5)
+        return embed(texts)
+
+    index.embedder.embed = slow_embed
+    app.config['EMBEDDING_REFRESH_TIMEOUT'] = 0
+    try:
+        client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+        stale = client.get('/api/words/semantic_search?q=dog')
+        assert stale.status_code == 200
+        assert stale.get_json()['data']['index_current'] is False
+        # Results from the old vectors are not cached under the new words version
+        assert 'ETag' not in stale.headers and stale.headers['Cache-Control'] == 'no-store'
+    finally:
+        release.set()
+    app.config['EMBEDDING_REFRESH_TIMEOUT'] = 5
+    fresh = client.get('/api/words/semantic_search?q=book&limit=1')
+    assert fresh.get_json()['data']['index_current'] is True and 'ETag' in fresh.headers
+    assert fresh.get_json()['data']['items'][0]['english'] == 'book'
@@ -0,0 +1,40 @@
+import sqlite3
+from datetime import datetime
+from app.dao.word_dao import WordDAO
+from app.dao.study_session_dao import StudySessionDAO
+from app.models.word import Word
+from app.models.study_session import StudySession
+
+def parse(value):
+    return datetime.fromisoformat(value) if value else None
+
+def raw_rows(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_word_fast_path_matches_model(db_path):
+    WordDAO(db_path).create_word('本', 'hon', 'book')
+    words, _ = WordDAO(db_path).get_words(1, 100)
+    expected = [
+        Word(id=r[0], kanji=r[1], romaji=r[2], english=r[3], created_at=parse(r[4]), updated_at=parse(r[5])).to_dict()
+        for r in raw_rows(db_path, 'SELECT id, kanji, romaji, english, created_at, updated_at FROM words ORDER BY id')
+    ]
+    assert words == expected
+
+def test_session_fast_path_matches_model(db_path):
+    StudySessionDAO(db_path).create_study_session(1, 2)
+    sessions, total = StudySessionDAO(db_path).get_study_sessions(1, 100)
+    expected = [
+        StudySession(id=r[0], group_id=r[1], study_activity_id=r[2], start_time=parse(r[3]),
+                     end_time=parse(r[4]), created_at=parse(r[5])).to_dict()
+        for r in raw_rows(db_path, '''SELECT id, group_id, study_activity_id, start_time, end_time, created_at
+                                      FROM study_sessions ORDER BY start_time, id''')
+    ]
+    assert total == 3
+    assert sessions == expected
+
+def test_models_use_slots():
+    assert not hasattr(Word(kanji='犬'), '__dict__')
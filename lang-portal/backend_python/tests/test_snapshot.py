@@ -0,0 +1,186 @@
+import gzip
+import json
+import os
+import threading
+import time
+import pytest
+from app import snapshot as snapshot_module
+from app.snapshot import SnapshotStore, get_store
+from test_timeseries import execute
+
+def current_info(client):
+    # Rebuilds run in the background; let the one the last write started finish
+    get_store(client.application).refresh(timeout=None)
+    response = client.get('/api/snapshot')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+def download(client, url, encoding='identity', **headers):
+    return client.get(url, headers={'Accept-Encoding': encoding, **headers})
+
+def test_snapshot_contains_words_and_memberships(client, db_path):
+    execute(db_path, 'INSERT INTO group_words (group_id, word_id) VALUES (1, 1), (1, 3), (2, 4)')
+    info = current_info(client)
+    assert info['words'] == 4 and info['groups'] == 2 and info['group_words'] == 3
+    assert info['url'] == f"/api/snapshot/{info['version']}"
+
+    response = download(client, info['url'])
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == str(info['sizes']['identity'])
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Content-Encoding' not in response.headers
+    body = response.get_json()
+    assert body['words'][0] == {'id': 1, 'kanji': '猫', 'romaji': 'neko', 'english': 'cat'}
+    assert [(group['id'], group['word_ids']) for group in body['groups']] == [(1, [1, 3]), (2, [4])]
+
+def test_encodings_are_negotiated(client):
+    info = current_info(client)
+    response = download(client, info['url'], 'gzip, deflate')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert len(response.data) == info['sizes']['gzip'] < info['sizes']['identity']
+    identity = download(client, info['url']).data
+    assert gzip.decompress(response.data) == identity
+    # Refusing gzip falls back to the plain body
+    assert download(client, info['url'], 'gzip;q=0').data == identity
+    assert response.headers['ETag'] != download(client, info['url']).headers['ETag']
+
+@pytest.mark.skipif(snapshot_module.brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred(client):
+    info = current_info(client)
+    response = download(client, info['url'], 'gzip, br')
+    assert response.headers['Content-Encoding'] == 'br'
+    assert snapshot_module.brotli.decompress(response.data) == download(client, info['url']).data
+
+def test_ranges_and_etags(client):
+    info = current_info(client)
+    full = download(client, info['url'])
+    assert full.headers['Accept-Ranges'] == 'bytes'
+
+    part = download(client, info['url'], Range='bytes=10-19')
+    assert part.status_code == 206
+    assert part.data == full.data[10:20]
+    assert part.headers['Content-Range'] == f"bytes 10-19/{info['sizes']['identity']}"
+    tail = download(client, info['url'], Range='bytes=-5')
+    assert tail.data == full.data[-5:]
+    assert download(client, info['url'], Range=f"bytes={info['sizes']['identity']}-").status_code == 416
+
+    assert download(client, info['url'], **{'If-None-Match': full.headers['ETag']}).status_code == 304
+    # A range against a stale validator gets the whole body
+    stale = download(client, info['url'], Range='bytes=0-9', **{'If-Range': '"other"'})
+    assert stale.status_code == 200 and stale.data == full.data
+
+def test_changes_rebuild_a_new_version(client, db_path):
+    first = current_info(client)
+    # Reviews are not part of the snapshot
+    client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    assert current_info(client)['version'] == first['version']
+
+    client.put('/api/words/1', json={'kanji': '猫', 'romaji': 'neko', 'english': 'kitty'})
+    second = current_info(client)
+    assert second['version'] != first['version']
+    assert download(client, second['url']).get_json()['words'][0]['english'] == 'kitty'
+    # Clients that fetched the previous metadata can still download it
+    assert download(client, first['url']).get_json()['words'][0]['english'] == 'cat'
+
+    # Reverting the change gives back the first version's bytes and URL
+    client.put('/api/words/1', json={'kanji': '猫', 'romaji': 'neko', 'english': 'cat'})
+    execute(db_path, "INSERT INTO group_words (group_id, word_id) VALUES (2, 2)")
+    execute(db_path, "DELETE FROM group_words WHERE group_id = 2")
+    assert current_info(client)['version'] == first['version']
+
+def test_old_versions_are_removed(app, client):
+    versions = []
+    for english in ('one', 'two', 'three'):
+        client.put('/api/words/1', json={'kanji': '猫', 'romaji': 'neko', 'english': english})
+        versions.append(current_info(client)['version'])
+    # SNAPSHOT_KEEP defaults to two
+    assert download(client, f'/api/snapshot/{versions[0]}').status_code == 404
+    assert download(client, f'/api/snapshot/{versions[1]}').status_code == 200
+    files = os.listdir(app.config['SNAPSHOT_DIR'])
+    assert not [name for name in files if versions[0] in name]
+    assert not [name for name in files if name.endswith('.tmp')]
+
+def test_versions_built_elsewhere_are_served(app, client, db_path):
+    other = SnapshotStore(db_path, app.config['SNAPSHOT_DIR'])
+    built = other.build()
+    # This process has built nothing yet, but finds the files in the shared directory
+    assert get_store(app).current() is None
+    response = download(client, f'/api/snapshot/{built.version}')
+    assert response.status_code == 200
+    assert json.loads(response.data)['words'][3]['english'] == 'fish'
+
+def test_unknown_version(client):
+    current_info(client)
+    for version in ('0123456789abcdef', 'not-a-version', '../../etc/passwd'):
+        assert download(client, f'/api/snapshot/{version}').status_code == 404
+
+def test_background_rebuild_keeps_serving_current(app, client):
+    current_info(client)
+    client.post('/api/words', json={'kanji': '馬', 'romaji': 'uma', 'english': 'horse'})
+    store = get_store(app)
+    # Without waiting, a snapshot is returned right away: the previous one until the build finishes
+    assert store.refresh(timeout=0).info['words'] in (4, 5)
+    assert store.refresh(timeout=None).info['words'] == 5
+
+def test_stale_metadata_gets_no_etag(app, client):
+    first = client.get('/api/snapshot')
+    assert first.headers['ETag']
+    store = get_store(app)
+    release = threading.Event()
+    build = store.build
+
+    def held_build():
+        release.wait(5)
+        return build()
+    store.build = held_build
+    app.config['SNAPSHOT_BUILD_TIMEOUT'] = 0
+    client.post('/api/words', json={'kanji': '馬', 'romaji': 'uma', 'english': 'horse'})
+
+    # The rebuild is pending, so the old snapshot is served without the new tables' ETag
+    stale = client.get('/api/snapshot')
+    assert stale.get_json()['data']['words'] == 4
+    assert 'ETag' not in stale.headers and stale.headers['Cache-Control'] == 'no-store'
+    assert client.get('/api/snapshot', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+    release.set()
+    store.refresh(timeout=None)
+    fresh = client.get('/api/snapshot')
+    assert fresh.get_json()['data']['words'] == 5
+    assert fresh.headers['ETag'] not in (None, first.headers['ETag'])
+
+def test_requests_do_not_wait_for_rebuilds(app, client):
+    current_info(client)
+    store = get_store(app)
+    release = threading.Event()
+    build = store.build
+
+    def held_build():
+        release.wait(5)
+        return build()
+    store.build = held_build
+    client.post('/api/words', json={'kanji': '馬', 'romaji': 'uma', 'english': 'horse'})
+
+    # Only a process without any snapshot waits SNAPSHOT_BUILD_TIMEOUT
+    started = time.perf_counter()
+    response = client.get('/api/snapshot')
+    assert time.perf_counter() - started < app.config['SNAPSHOT_BUILD_TIMEOUT'] / 2
+    assert response.get_json()['data']['words'] == 4
+    assert response.headers['Cache-Control'] == 'no-store'
+    release.set()
+
+def test_watcher_rebuilds_after_writes(app, client, db_path):
+    store = get_store(app)
+    store.watch(0.01)
+    execute(db_path, "INSERT INTO words (kanji, romaji, english) VALUES ('馬', 'uma', 'horse')")
+
+    # Picked up from table_versions, with no snapshot request and from outside the app
+    deadline = time.monotonic() + 5
+    while (store.current() is None or store.current().info['words'] != 5) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.current().info['words'] == 5
+    response = client.get('/api/snapshot')
+    assert response.get_json()['data']['words'] == 5 and response.headers['ETag']
+
+    store.close()
+    assert not store._watcher.is_alive()
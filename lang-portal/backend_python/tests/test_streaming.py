@@ -0,0 +1,86 @@
+import json
+import sqlite3
+import pytest
+from app.db import register_pool
+
+@pytest.fixture
+def small_chunks(app):
+    """Stream one row per chunk so every chunk boundary gets exercised"""
+    app.config['STREAM_CHUNK_SIZE'] = 1
+    return app
+
+def add_reviews(db_path, count):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (1, ?, ?)',
+                     [(n % 4 + 1, n % 2) for n in range(count)])
+    conn.commit()
+    conn.close()
+
+def test_session_list_streams_the_usual_envelope(client, small_chunks):
+    response = client.get('/api/study_sessions', buffered=False)
+    assert response.is_streamed
+    body = json.loads(response.get_data())
+    assert body['status'] == 'success'
+    assert [s['id'] for s in body['data']] == [1, 2]
+    assert body['data'][0]['start_time'] and 'T' in body['data'][0]['start_time']
+
+def test_session_list_as_ndjson(client, small_chunks):
+    response = client.get('/api/study_sessions?format=ndjson')
+    assert response.content_type == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [1, 2]
+
+    accepted = client.get('/api/study_sessions', headers={'Accept': 'application/x-ndjson'})
+    assert accepted.content_type == 'application/x-ndjson'
+
+def test_review_export(client, db_path, small_chunks):
+    add_reviews(db_path, 25)
+    response = client.get('/api/study_sessions/1/reviews?format=ndjson')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 27
+    assert rows[0] == {'id': 1, 'word_id': 1, 'kanji': '猫', 'romaji': 'neko', 'english': 'cat',
+                       'correct': True, 'created_at': rows[0]['created_at']}
+    assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+
+    data = client.get('/api/study_sessions/1/reviews').get_json()['data']
+    assert data == rows
+
+def test_empty_exports_are_valid(client):
+    assert client.get('/api/study_sessions/2/reviews').get_json() == {'status': 'success', 'data': []}
+    assert client.get('/api/study_sessions/2/reviews?format=ndjson').get_data() == b''
+    assert client.get('/api/groups/1/words/export').get_json()['data'] == []
+
+def test_group_word_export(client, small_chunks):
+    for word_id in (3, 1, 2):
+        client.post('/api/groups/1/words', json={'word_id': word_id})
+    words = client.get('/api/groups/1/words/export').get_json()['data']
+    assert [w['id'] for w in words] == [1, 2, 3]
+    assert set(words[0]) == {'id', 'kanji', 'romaji', 'english', 'added_at'}
+
+def test_export_errors(client):
+    assert client.get('/api/study_sessions/999/reviews').status_code == 404
+    assert client.get('/api/groups/999/words/export').status_code == 404
+    assert client.get('/api/study_sessions?format=xml').status_code == 400
+
+def test_abandoned_stream_is_not_an_error(client):
+    client.get('/api/study_sessions', buffered=False).close()
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert 'endpoint="study_sessions.list_study_sessions",method="GET",status="200"} 1' in text
+    assert 'status="500"' not in text
+
+@pytest.mark.parametrize('url', ['/api/study_sessions?format=ndjson', '/api/study_sessions/1/reviews?format=ndjson',
+                                 '/api/groups/1/words/export?format=ndjson'])
+def test_exports_hold_no_connection_between_chunks(client, db_path, small_chunks, url):
+    add_reviews(db_path, 3)
+    for word_id in (1, 2, 3):
+        client.post('/api/groups/1/words', json={'word_id': word_id})
+    # One read connection: a stalled export must not starve other requests
+    pool = register_pool(db_path, read_only=True, size=1, timeout=0.2)
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    received = next(chunks)
+    assert pool.stats()['in_use'] == 0
+    assert client.get('/api/words/1').status_code == 200
+    received += b''.join(chunks)
+    response.close()
+    assert len(received.decode('utf-8').splitlines()) >= 2
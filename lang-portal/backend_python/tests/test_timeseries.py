@@ -0,0 +1,106 @@
+import sqlite3
+from app.dao.dashboard_dao import DashboardDAO
+
+def execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    try:
+        cursor = conn.execute(sql, params)
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def add_session(db_path, group_id, activity_id, start, end=None):
+    return execute(db_path, 'INSERT INTO study_sessions (group_id, study_activity_id, start_time, end_time) '
+                            'VALUES (?, ?, ?, ?)', (group_id, activity_id, start, end))
+
+def add_review(db_path, session_id, word_id, correct, created_at):
+    return execute(db_path, 'INSERT INTO study_reviews (study_session_id, word_id, correct, created_at) '
+                            'VALUES (?, ?, ?, ?)', (session_id, word_id, correct, created_at))
+
+def series(client, query):
+    response = client.get(f'/api/dashboard/timeseries?{query}')
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+def test_rollups_track_reviews_and_sessions(client, db_path):
+    session = add_session(db_path, 1, 1, '2025-03-03 09:00:00', '2025-03-03 09:30:00')
+    add_review(db_path, session, 1, True, '2025-03-03 09:01:00')
+    add_review(db_path, session, 1, False, '2025-03-03 09:02:00')
+    add_review(db_path, session, 2, True, '2025-03-03T09:03:00.123456')
+    add_review(db_path, session, 1, True, '2025-03-04 00:10:00')
+
+    data = series(client, 'from=2025-03-02&to=2025-03-05')
+    assert [point['date'] for point in data['series']] == ['2025-03-02', '2025-03-03', '2025-03-04', '2025-03-05']
+    assert data['series'][0] == {'date': '2025-03-02', 'reviews': 0, 'correct': 0, 'accuracy': 0, 'words': 0,
+                                 'sessions': 0, 'session_minutes': 0}
+    day = data['series'][1]
+    assert (day['reviews'], day['correct'], day['words'], day['sessions'], day['session_minutes']) == (3, 2, 2, 1, 30)
+    assert data['series'][2]['words'] == 1 and data['series'][2]['sessions'] == 0
+    assert data['totals']['reviews'] == 4
+    assert DashboardDAO(db_path).verify_rollups() == []
+
+def test_rollups_follow_session_end_and_deletes(client, db_path):
+    session = add_session(db_path, 2, 2, '2025-03-03 09:00:00')
+    other = add_session(db_path, 2, 2, '2025-03-03 18:00:00', '2025-03-03 18:15:00')
+    for session_id, word_id in ((session, 3), (session, 4), (other, 3)):
+        add_review(db_path, session_id, word_id, True, '2025-03-03 19:00:00')
+    execute(db_path, "UPDATE study_sessions SET end_time = '2025-03-03 09:45:00' WHERE id = ?", (session,))
+    assert series(client, 'from=2025-03-03&to=2025-03-03')['series'][0]['session_minutes'] == 60
+
+    # The session's reviews go with it by cascade; word 3 is still reviewed in the other one
+    execute(db_path, 'DELETE FROM study_sessions WHERE id = ?', (session,))
+    day = series(client, 'from=2025-03-03&to=2025-03-03')['series'][0]
+    assert (day['reviews'], day['words'], day['sessions'], day['session_minutes']) == (1, 1, 1, 15)
+    execute(db_path, 'DELETE FROM words WHERE id = 3')
+    assert DashboardDAO(db_path).verify_rollups() == []
+
+    execute(db_path, 'DELETE FROM groups WHERE id = 2')
+    assert series(client, 'from=2025-03-03&to=2025-03-03')['totals']['sessions'] == 0
+    assert DashboardDAO(db_path).verify_rollups() == []
+
+def test_weekly_buckets_and_filters(client, db_path):
+    # 2025-03-05 is a Wednesday and 2025-03-11 the Tuesday after
+    first = add_session(db_path, 1, 1, '2025-03-05 10:00:00')
+    second = add_session(db_path, 2, 1, '2025-03-11 10:00:00')
+    add_review(db_path, first, 1, True, '2025-03-05 10:01:00')
+    add_review(db_path, second, 1, True, '2025-03-11 10:01:00')
+    add_review(db_path, second, 2, False, '2025-03-11 10:02:00')
+
+    data = series(client, 'from=2025-03-05&to=2025-03-11&bucket=week')
+    assert (data['from'], data['to']) == ('2025-03-03', '2025-03-16')
+    assert [(p['date'], p['reviews']) for p in data['series']] == [('2025-03-03', 1), ('2025-03-10', 2)]
+    assert data['series'][1]['accuracy'] == 50
+
+    assert series(client, 'from=2025-03-01&to=2025-03-31&group_id=2')['totals']['reviews'] == 2
+    assert series(client, 'from=2025-03-01&to=2025-03-31&study_activity_id=2')['totals']['reviews'] == 0
+
+def test_default_range_and_errors(client):
+    data = series(client, '')
+    assert len(data['series']) == 30
+    # The seeded sessions and reviews happened today
+    assert data['series'][-1]['reviews'] == 2 and data['series'][-1]['sessions'] == 2
+
+    for query in ('from=2025-13-01', 'to=yesterday', 'from=2025-02-01&to=2025-01-01',
+                  'from=2000-01-01&to=2025-01-01', 'bucket=month'):
+        assert client.get(f'/api/dashboard/timeseries?{query}').status_code == 400
+
+def test_rebuild_rollups_command(app, db_path):
+    execute(db_path, "UPDATE daily_rollups SET reviews = 99")
+    execute(db_path, "INSERT INTO daily_rollups (day, group_id, study_activity_id, reviews) "
+                     "VALUES ('2020-01-01', 1, 1, 5)")
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-rollups', '--verify-only'])
+    assert result.exit_code != 0
+    assert '2020-01-01 group=1 activity=1' in result.output
+
+    # A bounded backfill leaves other days alone
+    result = runner.invoke(args=['rebuild-rollups', '--from', '2020-01-01', '--to', '2020-12-31'])
+    assert result.exit_code == 0, result.output
+    remaining = DashboardDAO(db_path).verify_rollups()
+    assert remaining and all(m['day'] != '2020-01-01' and m['stored'][0] == 99 for m in remaining)
+
+    result = runner.invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0, result.output
+    assert DashboardDAO(db_path).verify_rollups() == []
@@ -0,0 +1,86 @@
+import pytest
+from app.dao.word_dao import WordDAO
+
+def search(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+def test_prefix_match_for_type_ahead(client):
+    data = search(client, '/api/words/search?q=do')
+    assert [w['english'] for w in data['items']] == ['dog']
+    assert data['pagination']['total_items'] == 1
+
+def test_whole_term_match_without_prefix(client):
+    assert search(client, '/api/words/search?q=do&prefix=false')['items'] == []
+    assert len(search(client, '/api/words/search?q=dog&prefix=false')['items']) == 1
+
+def test_highlight_marks_matched_terms(client):
+    word = search(client, '/api/words/search?q=inu')['items'][0]
+    assert word['highlight']['romaji'] == '<mark>inu</mark>'
+    assert word['highlight']['english'] == 'dog'
+    assert set(word) >= {'id', 'kanji', 'romaji', 'english', 'created_at', 'updated_at'}
+
+def test_bm25_ranks_denser_match_first(client):
+    client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    client.post('/api/words', json={'kanji': '本棚', 'romaji': 'hondana', 'english': 'book shelf for storing a book'})
+    items = search(client, '/api/words/search?q=book&prefix=false')['items']
+    assert [w['romaji'] for w in items] == ['hon', 'hondana']
+
+def test_index_follows_updates_and_deletes(client):
+    word = client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'}).get_json()['data']
+    client.put(f"/api/words/{word['id']}", json={'kanji': '本', 'romaji': 'hon', 'english': 'volume'})
+    assert search(client, '/api/words/search?q=book')['items'] == []
+    assert len(search(client, '/api/words/search?q=volume')['items']) == 1
+
+    client.delete(f"/api/words/{word['id']}")
+    assert search(client, '/api/words/search?q=volume')['items'] == []
+
+def test_search_paginates(client):
+    for i in range(5):
+        client.post('/api/words', json={'kanji': f'k{i}', 'romaji': f'neko{i}', 'english': f'cat {i}'})
+    data = search(client, '/api/words/search?q=cat&per_page=2&page=3')
+    assert data['pagination']['total_items'] == 6
+    assert len(data['items']) == 2
+
+def test_search_requires_query(client):
+    assert client.get('/api/words/search?q=%20').status_code == 400
+
+@pytest.mark.parametrize('text, expected', [
+    ('dog', '"dog"*'),
+    ('big dog', '"big" "dog"*'),
+    ('say "hi" OR', '"say" """hi""" "OR"*'),
+])
+def test_fts_query_quotes_terms(text, expected):
+    assert WordDAO.fts_query(text) == expected
+
+def test_broad_queries_fall_back_to_id_order(client, monkeypatch):
+    client.post('/api/words', json={'kanji': '本棚', 'romaji': 'hondana', 'english': 'book shelf for storing a book'})
+    client.post('/api/words', json={'kanji': '本', 'romaji': 'hon', 'english': 'book'})
+    monkeypatch.setattr(WordDAO, 'SEARCH_RANK_LIMIT', 1)
+    items = search(client, '/api/words/search?q=book')['items']
+    assert [w['romaji'] for w in items] == ['hondana', 'hon']
+
+def test_kanji_substrings(client):
+    for kanji, romaji, english in [('日本語', 'nihongo', 'japanese'), ('日曜日', 'nichiyoubi', 'sunday'),
+                                   ('日本語学校', 'nihongo gakkou', 'language school')]:
+        client.post('/api/words', json={'kanji': kanji, 'romaji': romaji, 'english': english})
+    # One character of a compound, a pair, and a term long enough for the trigram index
+    assert [w['kanji'] for w in search(client, '/api/words/search?q=本')['items']] == ['日本語', '日本語学校']
+    assert [w['kanji'] for w in search(client, '/api/words/search?q=曜日')['items']] == ['日曜日']
+    data = search(client, '/api/words/search?q=本語学')
+    assert [w['kanji'] for w in data['items']] == ['日本語学校']
+    assert data['pagination']['total_items'] == 1
+    assert data['items'][0]['highlight'] == {'kanji': '日<mark>本語学</mark>校', 'romaji': 'nihongo gakkou',
+                                             'english': 'language school'}
+    # Every term must match
+    assert [w['kanji'] for w in search(client, '/api/words/search?q=日本語%20学')['items']] == ['日本語学校']
+
+def test_kanji_index_follows_updates_and_deletes(client):
+    word = client.post('/api/words', json={'kanji': '日本語', 'romaji': 'nihongo', 'english': 'japanese'}).get_json()['data']
+    client.put(f"/api/words/{word['id']}", json={'kanji': '英語', 'romaji': 'eigo', 'english': 'english'})
+    assert search(client, '/api/words/search?q=日本語')['items'] == []
+    assert len(search(client, '/api/words/search?q=英語')['items']) == 1
+
+    client.delete(f"/api/words/{word['id']}")
+    assert search(client, '/api/words/search?q=英語')['items'] == []
@@ -0,0 +1,115 @@
+import sqlite3
+from app.dao.word_dao import WordDAO
+from test_timeseries import add_review, execute
+
+def stats_of(db_path, word_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT reviews, correct, wrong, streak, last_reviewed_at FROM word_stats '
+                            'WHERE word_id = ?', (word_id,)).fetchone()
+    finally:
+        conn.close()
+
+def listing(client, query):
+    response = client.get(f'/api/words?{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+def test_triggers_track_counts_and_streaks(app, db_path):
+    for correct, created_at in ((True, '2025-03-01 10:00:00'), (False, '2025-03-02 10:00:00'),
+                                (True, '2025-03-03 10:00:00'), (True, '2025-03-03 10:00:00')):
+        add_review(db_path, 1, 3, correct, created_at)
+    assert stats_of(db_path, 3) == (4, 3, 1, 2, '2025-03-03 10:00:00')
+
+    # A backfilled wrong answer after the last one recounts the streak
+    add_review(db_path, 1, 3, False, '2025-03-02 12:00:00')
+    assert stats_of(db_path, 3) == (5, 3, 2, 2, '2025-03-03 10:00:00')
+    wrong = execute(db_path, "INSERT INTO study_reviews (study_session_id, word_id, correct, created_at) "
+                             "VALUES (1, 3, 0, '2025-03-03 10:00:00')")
+    assert stats_of(db_path, 3)[3] == 0
+
+    # Deleting it restores the streak; deleting the newest reviews moves last_reviewed_at back
+    execute(db_path, 'DELETE FROM study_reviews WHERE id = ?', (wrong,))
+    assert stats_of(db_path, 3)[3] == 2
+    execute(db_path, "DELETE FROM study_reviews WHERE word_id = 3 AND created_at >= '2025-03-03'")
+    assert stats_of(db_path, 3) == (3, 1, 2, 0, '2025-03-02 12:00:00')
+    assert WordDAO(db_path).verify_word_stats() == []
+
+    # The row goes with the word's last review, and with the word itself
+    execute(db_path, 'DELETE FROM study_reviews WHERE word_id = 3')
+    assert stats_of(db_path, 3) is None
+    execute(db_path, 'DELETE FROM words WHERE id = 1')
+    assert stats_of(db_path, 1) is None
+    assert WordDAO(db_path).verify_word_stats() == []
+
+def test_recount_without_wrong_reviews(app, db_path):
+    for created_at in ('2025-03-02 10:00:00', '2025-03-03 10:00:00'):
+        add_review(db_path, 1, 3, True, created_at)
+    # A backfill and a delete recount a streak that no wrong answer has broken
+    add_review(db_path, 1, 3, True, '2025-03-01 10:00:00')
+    assert stats_of(db_path, 3)[3] == 3
+    execute(db_path, "DELETE FROM study_reviews WHERE word_id = 3 AND created_at = '2025-03-03 10:00:00'")
+    assert stats_of(db_path, 3) == (2, 2, 0, 2, '2025-03-02 10:00:00')
+    assert WordDAO(db_path).verify_word_stats() == []
+
+def test_sort_and_filter_by_stats(client, db_path):
+    # Seeded: word 1 once correct, word 2 once wrong, both reviewed today
+    for word_id, correct in ((3, True), (3, True), (3, False), (4, True), (4, True)):
+        add_review(db_path, 1, word_id, correct, '2025-03-01 10:00:00')
+
+    data = listing(client, 'sort=accuracy')
+    assert [word['id'] for word in data['items']] == [2, 3, 1, 4]
+    assert data['items'][1]['stats'] == {'reviews': 3, 'correct': 2, 'wrong': 1, 'streak': 0,
+                                         'accuracy': 66.7, 'last_reviewed_at': '2025-03-01T10:00:00'}
+    assert data['items'][1]['kanji'] == '鳥'
+
+    data = listing(client, 'sort=reviews&order=desc&min_reviews=2')
+    assert [word['id'] for word in data['items']] == [3, 4]
+    assert data['pagination']['total_items'] == 2
+    assert [w['id'] for w in listing(client, 'sort=last_reviewed')['items']] == [3, 4, 1, 2]
+    # min_reviews alone lists reviewed words in id order
+    assert [w['id'] for w in listing(client, 'min_reviews=1')['items']] == [1, 2, 3, 4]
+
+def test_cursor_pages_match_offset_pages(client, db_path):
+    for word_id in range(1, 5):
+        for n in range(word_id):
+            add_review(db_path, 1, word_id, n % 2 == 0, f'2025-03-0{n + 1} 10:00:00')
+
+    for query in ('sort=accuracy', 'sort=accuracy&order=desc', 'sort=last_reviewed&order=desc', 'sort=reviews'):
+        expected = [w['id'] for w in listing(client, f'{query}&per_page=100')['items']]
+        seen, cursor = [], ''
+        while cursor is not None:
+            data = listing(client, f'{query}&per_page=3&cursor={cursor}')
+            seen += [w['id'] for w in data['items']]
+            cursor = data['pagination']['next_cursor']
+        assert seen == expected, query
+        # Page-based responses hand out the cursor of the following page too
+        first = listing(client, f'{query}&per_page=3')
+        assert listing(client, f"{query}&per_page=3&cursor={first['pagination']['next_cursor']}")['items'] \
+            == listing(client, f'{query}&per_page=3&page=2')['items']
+
+def test_invalid_stats_params(client):
+    for query in ('sort=kanji', 'sort=accuracy&order=up', 'min_reviews=0', 'min_reviews=abc'):
+        response = client.get(f'/api/words?{query}')
+        assert response.status_code == 400, query
+        assert response.get_json()['status'] == 'error'
+
+def test_etag_follows_reviews_for_stats_listings(client):
+    plain, stats = client.get('/api/words'), client.get('/api/words?sort=accuracy')
+    client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    assert client.get('/api/words', headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+    assert client.get('/api/words?sort=accuracy',
+                      headers={'If-None-Match': stats.headers['ETag']}).status_code == 200
+
+def test_rebuild_word_stats_command(app, db_path):
+    execute(db_path, 'UPDATE word_stats SET streak = 7 WHERE word_id = 1')
+    execute(db_path, 'DELETE FROM word_stats WHERE word_id = 2')
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-word-stats', '--verify-only'])
+    assert result.exit_code != 0
+    assert 'word 1: stored=(1, 1, 0, 7' in result.output and 'word 2: stored=None' in result.output
+
+    result = runner.invoke(args=['rebuild-word-stats'])
+    assert result.exit_code == 0, result.output
+    assert 'Word stats rebuilt (2 words)' in result.output
+    assert WordDAO(db_path).verify_word_stats() == []
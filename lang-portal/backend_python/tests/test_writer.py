@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import pytest
+from app import create_app
+from app.dao.study_session_dao import StudySessionDAO
+from app.db import close_pool
+from app.writer import DatabaseWriter, WriteQueueFullError, WriterStoppedError, WriteTimeoutError
+from migrations.migrate import migrate
+from test_metrics import sample
+
+@pytest.fixture
+def make_app():
+    """Build migrated apps with a given DB_WRITE_MODE"""
+    paths = []
+
+    def make(mode):
+        fd, db_path = tempfile.mkstemp()
+        os.close(fd)
+        paths.append(db_path)
+        migrate(db_path, verbose=False)
+        return create_app({'TESTING': True, 'DATABASE': db_path, 'DB_WRITE_MODE': mode})
+
+    yield make
+    for db_path in paths:
+        close_pool(db_path)
+        os.unlink(db_path)
+
+def count_reviews(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM study_reviews').fetchone()[0]
+    finally:
+        conn.close()
+
+def blocked(writer):
+    """Hold the writer thread inside a batch until the returned event is set"""
+    release, started = threading.Event(), threading.Event()
+
+    def wait(conn):
+        started.set()
+        release.wait(5)
+    future = writer.submit(wait)
+    started.wait(5)
+    return release, future
+
+def test_concurrent_writes_share_commits(app, db_path):
+    writer = app.extensions['db_writer']
+    writer.window = 0.05
+    results = []
+
+    def review(word_id):
+        results.append(StudySessionDAO(db_path).add_reviews(1, [(word_id, True)]))
+    threads = [threading.Thread(target=review, args=(n % 4 + 1,)) for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 16 and all(r['reviews_recorded'] == 1 for r in results)
+    assert count_reviews(db_path) == 2 + 16
+    stats = writer.stats()
+    assert stats['jobs'] == 16 and stats['commits'] < 16
+
+def test_failed_write_is_rolled_back_alone(app, db_path):
+    writer = app.extensions['db_writer']
+    release, first = blocked(writer)
+    good = writer.submit(lambda conn: conn.execute(
+        'INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (1, 3, 1)').lastrowid)
+    bad = writer.submit(lambda conn: conn.execute(
+        'INSERT INTO study_reviews (study_session_id, word_id, correct) VALUES (999, 3, 1)'))
+    release.set()
+
+    first.result(5)
+    assert good.result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result(5)
+    assert count_reviews(db_path) == 3
+    assert writer.stats()['failed_jobs'] == 1
+
+def test_full_queue_rejects_writes(app):
+    writer = DatabaseWriter(app.extensions['db_pool'], queue_size=1, timeout=0.01)
+    release, _ = blocked(writer)
+    queued = writer.submit(lambda conn: None)
+    with pytest.raises(WriteQueueFullError):
+        writer.submit(lambda conn: None)
+    release.set()
+    queued.result(5)
+    writer.close()
+    assert writer.stats()['rejected'] == 1
+
+class UnrecoverableConnection:
+    """A writer connection whose COMMIT and ROLLBACK both fail"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def commit(self):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    def rollback(self):
+        raise sqlite3.OperationalError('cannot rollback')
+
+def test_every_future_is_resolved(app):
+    writer = DatabaseWriter(app.extensions['db_pool'])
+
+    def broken_listener(jobs, elapsed, waits):
+        raise ValueError('listener bug')
+    writer.commit_listeners.append(broken_listener)
+    assert writer.submit(lambda conn: 1).result(5) == 1
+
+    # A failing rollback still fails the batch instead of leaving it pending
+    conn, writer._conn = writer._conn, UnrecoverableConnection(writer._conn)
+    with pytest.raises(sqlite3.OperationalError, match='disk I/O'):
+        writer.submit(lambda conn: None).result(5)
+    writer._conn = conn
+    conn.rollback()
+    assert writer.submit(lambda conn: 2).result(5) == 2
+    writer.close()
+    assert writer.stats()['failed_commits'] == 1
+
+class Crash(BaseException):
+    pass
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_stopped_writer_fails_fast(app):
+    writer = DatabaseWriter(app.extensions['db_pool'])
+    release, _ = blocked(writer)
+
+    def crash(conn):
+        raise Crash()
+    crashed = writer.submit(crash)
+    queued = writer.submit(lambda conn: None)
+    release.set()
+    # The crash kills the thread; its batch and the jobs still queued are failed
+    for future in (crashed, queued):
+        with pytest.raises(WriterStoppedError):
+            future.result(5)
+    writer._thread.join(5)
+    with pytest.raises(WriterStoppedError):
+        writer.submit(lambda conn: None)
+
+def test_execute_times_out(app):
+    writer = DatabaseWriter(app.extensions['db_pool'], timeout=0.05)
+    release, _ = blocked(writer)
+    with pytest.raises(WriteTimeoutError):
+        writer.execute(lambda conn: None)
+    release.set()
+    writer.close()
+
+def test_reads_cannot_write(app, db_path):
+    dao = StudySessionDAO(db_path)
+    with dao._get_read_connection() as conn:
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            conn.execute('DELETE FROM words')
+
+def test_writer_metrics(client):
+    client.post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert sample(text, 'langportal_db_write_queue_depth', mode='sync') == 0
+    assert sample(text, 'langportal_db_write_commits_total', mode='sync') == 1
+    assert sample(text, 'langportal_db_commit_batch_size_count') == 1
+    # The review's SQL still counts towards the request that queued it
+    assert sample(text, 'langportal_db_statements_per_request_sum', endpoint='study_sessions.record_word_reviews') > 10
+
+def test_async_mode_acknowledges_queued_reviews(make_app):
+    app = make_app('async')
+    response = app.test_client().post('/api/study_sessions/1/review',
+                                      json={'reviews': [{'word_id': 3, 'correct': True}, {'word_id': 4, 'correct': False}]})
+    assert response.status_code == 202
+    assert response.get_json()['data'] == {'session_id': 1, 'reviews_recorded': 2, 'correct_count': 1, 'queued': True}
+    # Writes are applied in order, so once a later one commits the reviews are in
+    app.extensions['db_writer'].submit(lambda conn: None).result(5)
+    assert count_reviews(app.config['DATABASE']) == 4
+
+def test_direct_mode_writes_on_pooled_connections(make_app):
+    app = make_app('direct')
+    assert 'db_writer' not in app.extensions and 'db_read_pool' not in app.extensions
+    response = app.test_client().post('/api/study_sessions/1/review', json={'reviews': [{'word_id': 3, 'correct': True}]})
+    assert response.status_code == 200
+    assert response.get_json()['data']['session_accuracy'] == pytest.approx(200 / 3)
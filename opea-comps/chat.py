@@ -1,18 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import os
 import requests
 from comps import MicroService, ServiceOrchestrator, ServiceType
+from llm_client import LLMBusyError, LLMClient
+from response_cache import ResponseCache, cache_key
+from streaming import StreamMetrics, relay_chat_stream, replay_cached_stream, sse_event
 
 # Set default environment variables
 EMBEDDING_SERVICE_HOST_IP = os.getenv("EMBEDDING_SERVICE_HOST_IP", "0.0.0.0")
 EMBEDDING_SERVICE_PORT = os.getenv("EMBEDDING_SERVICE_PORT", 6000)
 LLM_SERVICE_HOST_IP = os.getenv("LLM_SERVICE_HOST_IP", "0.0.0.0")
 LLM_SERVICE_PORT = os.getenv("LLM_SERVICE_PORT", 8008)
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2:1b")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 10))
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 8))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 3.05))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 120))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 30))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 1024))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 3600))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")
+
+# Optional request fields forwarded to the LLM; they are part of the cache key
+SAMPLING_PARAMS = ("temperature", "top_p", "top_k", "max_tokens", "seed", "stop")
 
 app = Flask(__name__)
 
-import requests
-
 
 class ExampleService:
     def __init__(self, host="0.0.0.0", port=8000):
@@ -20,6 +33,15 @@ class ExampleService:
         self.port = port
         self.megaservice = ServiceOrchestrator()  # The orchestrator that manages services
         self.services = {}  # Dictionary to store service references
+        self.llm_client = LLMClient(
+            f"http://{LLM_SERVICE_HOST_IP}:{LLM_SERVICE_PORT}",
+            pool_size=LLM_POOL_SIZE,
+            max_in_flight=LLM_MAX_IN_FLIGHT,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            queue_timeout=LLM_QUEUE_TIMEOUT,
+        )
+        self.cache = ResponseCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_DB or None) if LLM_CACHE_SIZE > 0 else None
 
     def add_remote_service(self):
         """Define and add remote services to the orchestrator."""
@@ -73,32 +95,56 @@ class ExampleService:
 
         print("All services stopped.")
 
-    def chat(self, prompt):
+    LLM_PATH = "/v1/chat/completions"
+
+    def _build_payload(self, prompt, stream=False, params=None):
+        """Build the OpenAI-compatible chat completion payload."""
+        payload = {
+            "model": LLM_MODEL,  # Include the model field
+            "messages": [{"role": "user", "content": prompt}],  # LLM expects 'messages' in this structure
+        }
+        payload.update(params or {})
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _cache_for(self, use_cache):
+        if self.cache is not None and not use_cache:
+            self.cache.record_bypass()
+        return self.cache if use_cache else None
+
+    def chat(self, prompt, params=None, use_cache=True):
         """Interact with the LLM service to generate a response."""
+        payload = self._build_payload(prompt, params=params)
+        cache = self._cache_for(use_cache)
+        key = cache_key(payload) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached["message"]
+
         try:
             # Ensure that the LLM service is stored correctly
             llm_service = self.services.get("llm")
             if not llm_service:
                 raise ValueError("LLM service not found in orchestrator.")
 
-            # Build the valid payload structure with the model
-            messages = [{"role": "user", "content": prompt}]  # LLM expects 'messages' in this structure
-            model = "llama3.2:1b"  # Or any other model name you need, e.g., "gpt-4"
-
             # Send prompt to the LLM service
-            response = requests.post(
-                f"http://{LLM_SERVICE_HOST_IP}:{LLM_SERVICE_PORT}/v1/chat/completions",
-                json={
-                    "model": model,  # Include the model field
-                    "messages": messages,  # Include the messages
-                },
-            )
+            # Raises LLMBusyError when every request slot stays taken
+            response = self.llm_client.post(self.LLM_PATH, payload)
 
             if response.status_code == 200:
                 result = response.json()
                 # Directly return the response content to the user
                 if 'choices' in result and len(result['choices']) > 0:
-                    return result['choices'][0].get('message', 'No message field found.')
+                    message = result['choices'][0].get('message')
+                    if not message:
+                        return 'No message field found.'
+                    if cache:
+                        completion_tokens = (result.get('usage') or {}).get('completion_tokens')
+                        cache.put(key, {"message": message, "completion_tokens": completion_tokens})
+                    return message
                 else:
                     return 'No valid response from LLM service.'
             else:
@@ -107,11 +153,53 @@ class ExampleService:
             print(f"Error in chatting with LLM service: {e}")
             return "An error occurred while trying to chat with the LLM service."
 
+    def chat_stream(self, prompt, params=None, use_cache=True):
+        """Stream the LLM completion to the client as Server-Sent Events.
+
+        Emits one ``data: {"delta": ...}`` event per token delta, then an
+        ``event: done`` carrying time-to-first-token and tokens/sec. A cache
+        hit is sent as a single delta; only fully relayed streams are cached.
+        """
+        metrics = StreamMetrics()
+        payload = self._build_payload(prompt, stream=True, params=params)
+        cache = self._cache_for(use_cache)
+        key = cache_key(payload) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                yield from replay_cached_stream(cached, metrics)
+                return
+
+        completed = False
+        collected = []
+        try:
+            with self.llm_client.stream(self.LLM_PATH, payload) as upstream:
+                if upstream.status_code != 200:
+                    yield sse_event({"error": f"{upstream.status_code} - {upstream.text}"}, event="error")
+                    return
+                completed = yield from relay_chat_stream(upstream, metrics, collected)
+            if cache and completed:
+                message = {"role": "assistant", "content": "".join(collected)}
+                cache.put(key, {"message": message, "completion_tokens": metrics.tokens})
+        except LLMBusyError as e:
+            yield sse_event({"error": str(e)}, event="error")
+        except requests.exceptions.RequestException as e:
+            print(f"Error in streaming from LLM service: {e}")
+            yield sse_event({"error": "An error occurred while trying to chat with the LLM service."}, event="error")
+        finally:
+            if metrics.tokens or completed:
+                state = "completed" if completed else "cancelled"
+                print(f"Chat stream {state}: {metrics.to_dict()}")
+
 
 # Initialize service
 service = ExampleService()
 
 
+def _sampling_params(data):
+    return {name: data[name] for name in SAMPLING_PARAMS if name in data}
+
+
 @app.route('/api/chat', methods=['POST'])
 def handle_chat():
     """Handle incoming chat requests."""
@@ -122,12 +210,51 @@ def handle_chat():
     prompt = data['prompt']
 
     # Call chat method
-    response = service.chat(prompt)
+    try:
+        response = service.chat(prompt, _sampling_params(data), use_cache=data.get('cache') != 'bypass')
+    except LLMBusyError as e:
+        return jsonify({"error": str(e)}), 503
 
     # Return the response to the client
     return jsonify({"response": response})
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def handle_chat_stream():
+    """Stream the chat response as Server-Sent Events."""
+    data = request.get_json()
+    if not data or 'prompt' not in data:
+        return jsonify({"error": "No prompt provided."}), 400
+
+    return Response(
+        service.chat_stream(data['prompt'], _sampling_params(data), use_cache=data.get('cache') != 'bypass'),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route('/api/chat/stats', methods=['GET'])
+def chat_stats():
+    """Report upstream client counters: pool reuse, queue wait and latency."""
+    return jsonify(service.llm_client.stats())
+
+
+@app.route('/api/chat/cache', methods=['GET'])
+def chat_cache_stats():
+    """Report response cache hits, misses and evictions."""
+    if service.cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(service.cache.stats(), enabled=True))
+
+
+@app.route('/api/chat/cache', methods=['DELETE'])
+def clear_chat_cache():
+    """Drop every cached response."""
+    if service.cache is not None:
+        service.cache.clear()
+    return jsonify({"status": "success", "message": "Cache cleared."}), 200
+
+
 @app.route('/api/connect', methods=['GET'])
 def check_services():
     """Check if the remote services (LLM and embedding) are reachable."""
@@ -0,0 +1,86 @@
+"""Deterministic stand-in for an OpenAI-compatible LLM server.
+
+Answers /v1/chat/completions (blocking and ``stream: true``) by echoing the
+last user message word by word, so the gateway can be exercised locally:
+
+    python fake_llm_server.py --port 8008 --token-delay 0.05
+    LLM_SERVICE_HOST_IP=127.0.0.1 LLM_SERVICE_PORT=8008 python chat.py
+"""
+import argparse
+import json
+import threading
+import time
+
+from flask import Flask, Response, request, jsonify
+
+app = Flask(__name__)
+app.config["TOKEN_DELAY"] = 0.0
+# Answer every request with this status instead of a completion (tests of upstream errors)
+app.config["ERROR_STATUS"] = None
+# Send a line that is not JSON after this many streamed tokens
+app.config["MALFORMED_AFTER"] = None
+
+# How streams ended: "completed" ran to [DONE], "aborted" lost their client first
+stream_counts = {"completed": 0, "aborted": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _counts_lock:
+        stream_counts[outcome] += 1
+
+
+def _reply_tokens(messages):
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = prompt.split() or ["..."]
+    return [f"{word} " for word in ["You", "said:"] + words]
+
+
+@app.route("/v1/chat/completions", methods=["POST"])
+def chat_completions():
+    if app.config["ERROR_STATUS"]:
+        return jsonify({"error": {"message": "fake upstream failure"}}), app.config["ERROR_STATUS"]
+    body = request.get_json()
+    tokens = _reply_tokens(body.get("messages", []))
+    model = body.get("model", "fake-model")
+
+    if not body.get("stream"):
+        return jsonify({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": {"completion_tokens": len(tokens)},
+        })
+
+    def generate():
+        finished = False
+        try:
+            for index, token in enumerate(tokens):
+                if index == app.config["MALFORMED_AFTER"]:
+                    yield "data: {not json\n\n"
+                time.sleep(app.config["TOKEN_DELAY"])
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": token}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                usage = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                         "choices": [], "usage": {"completion_tokens": len(tokens)}}
+                yield f"data: {json.dumps(usage)}\n\n"
+            yield "data: [DONE]\n\n"
+            finished = True
+        finally:
+            # The server closes this generator early when writing to a gone client fails
+            _count("completed" if finished else "aborted")
+
+    return Response(generate(), mimetype="text/event-stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds to wait before each streamed token")
+    args = parser.parse_args()
+    app.config["TOKEN_DELAY"] = args.token_delay
+    app.run(host=args.host, port=args.port, threaded=True)
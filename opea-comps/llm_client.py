@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when no request slot frees up within the queue timeout."""
+
+
+class LLMClient:
+    """Shared keep-alive HTTP client for the upstream LLM service.
+
+    One ``requests.Session`` holds a bounded urllib3 pool, so repeated calls
+    reuse TCP connections instead of handshaking each time. A bounded
+    semaphore caps outstanding upstream requests: callers beyond the cap wait
+    up to ``queue_timeout`` seconds for a slot and then get ``LLMBusyError``,
+    so a burst queues in the gateway rather than opening a socket per request.
+    """
+
+    def __init__(self, base_url, pool_size=10, max_in_flight=8,
+                 connect_timeout=3.05, read_timeout=120.0, queue_timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.queue_timeout = queue_timeout
+        self.max_in_flight = max_in_flight
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._admitted = 0
+        self._requests = 0
+        self._errors = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @contextmanager
+    def _slot(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise LLMBusyError(f"LLM service busy: {self.max_in_flight} requests already in flight")
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_flight += 1
+            self._admitted += 1
+            self._queue_wait_total += waited
+            self._queue_wait_max = max(self._queue_wait_max, waited)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _send(self, path, payload, stream):
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.base_url + path, json=payload,
+                                         timeout=self.timeout, stream=stream)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._requests += 1
+                self._errors += 1
+            raise
+        # For streamed responses this is the time to response headers
+        latency = time.perf_counter() - started
+        with self._lock:
+            self._requests += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        return response
+
+    def post(self, path, payload):
+        """POST ``payload`` as JSON and return the fully read response."""
+        with self._slot():
+            response = self._send(path, payload, stream=False)
+            # Reading the body here returns the connection to the pool
+            response.content
+            return response
+
+    @contextmanager
+    def stream(self, path, payload):
+        """POST ``payload`` and yield the streaming response.
+
+        The request slot is held until the block exits, so a long generation
+        counts against ``max_in_flight`` for as long as it is being relayed.
+        """
+        with self._slot():
+            response = self._send(path, payload, stream=True)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    async def post_async(self, path, payload):
+        """asyncio entry point for :meth:`post`.
+
+        Runs on the default executor so the event loop never blocks on the
+        semaphore or the socket, while sharing the same pool and limits as
+        synchronous callers.
+        """
+        return await asyncio.to_thread(self.post, path, payload)
+
+    def _pool_counters(self):
+        connections = requests_sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+        return connections, requests_sent
+
+    def stats(self):
+        connections, requests_sent = self._pool_counters()
+        with self._lock:
+            completed = self._requests - self._errors
+            return {
+                "requests": self._requests,
+                "errors": self._errors,
+                "rejected": self._rejected,
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "connections_opened": connections,
+                "pool_hits": max(requests_sent - connections, 0),
+                "queue_wait_ms_avg": round(self._queue_wait_total / self._admitted * 1000, 2) if self._admitted else 0.0,
+                "queue_wait_ms_max": round(self._queue_wait_max * 1000, 2),
+                "upstream_latency_ms_avg": round(self._latency_total / completed * 1000, 2) if completed else 0.0,
+                "upstream_latency_ms_max": round(self._latency_max * 1000, 2),
+            }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,103 @@
+import json
+import time
+
+
+class StreamMetrics:
+    """Time-to-first-token and throughput of one streamed completion."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.tokens = 0
+
+    def record_token(self, count=1):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += count
+
+    def finish(self, completion_tokens=None):
+        self.finished_at = time.perf_counter()
+        if completion_tokens:
+            # Prefer the upstream's own count when it reports usage
+            self.tokens = completion_tokens
+
+    def to_dict(self):
+        end = self.finished_at or time.perf_counter()
+        ttft = (self.first_token_at - self.started_at) if self.first_token_at else None
+        generation_time = (end - self.first_token_at) if self.first_token_at else 0
+        return {
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "total_ms": round((end - self.started_at) * 1000, 1),
+            "tokens": self.tokens,
+            "tokens_per_sec": round(self.tokens / generation_time, 2) if generation_time > 0 else None,
+        }
+
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+def iter_chat_chunks(lines):
+    """Yield the decoded JSON chunks of an OpenAI-compatible SSE stream."""
+    for line in lines:
+        if not line:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        yield json.loads(payload)
+
+
+def relay_chat_stream(upstream, metrics, collected=None):
+    """Relay token deltas from a streaming upstream response as SSE.
+
+    Upstream data is only read when the client has taken the previous event,
+    so a slow client slows the upstream read instead of filling memory. If the
+    client disconnects, the WSGI server closes this generator and the
+    ``finally`` closes the upstream connection, cancelling the generation.
+    Deltas are appended to ``collected`` when a list is given. A line that is
+    not valid JSON ends the stream with an ``error`` event. Returns True when
+    the upstream stream ran to the end.
+    """
+    completion_tokens = None
+    try:
+        for chunk in iter_chat_chunks(upstream.iter_lines(chunk_size=None)):
+            usage = chunk.get("usage")
+            if usage:
+                completion_tokens = usage.get("completion_tokens")
+            for choice in chunk.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    metrics.record_token()
+                    if collected is not None:
+                        collected.append(content)
+                    yield sse_event({"delta": content})
+    except json.JSONDecodeError as e:
+        yield sse_event({"error": f"Malformed chunk from the LLM service: {e}"}, event="error")
+        return False
+    finally:
+        upstream.close()
+    metrics.finish(completion_tokens)
+    yield sse_event(metrics.to_dict(), event="done")
+    return True
+
+
+def replay_cached_stream(cached, metrics):
+    """Send a cached completion in the same event shape as a live stream.
+
+    The ``done`` event is marked ``cached`` and leaves ``tokens_per_sec``
+    out (null): it would time the replay, not the model.
+    """
+    content = cached["message"].get("content", "")
+    if content:
+        metrics.record_token()
+        yield sse_event({"delta": content})
+    metrics.finish(cached.get("completion_tokens"))
+    yield sse_event(dict(metrics.to_dict(), tokens_per_sec=None, cached=True), event="done")
@@ -0,0 +1,22 @@
+import os
+import sys
+import threading
+import pytest
+from werkzeug.serving import make_server
+
+# The gateway modules are scripts next to this directory, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_llm_server
+
+@pytest.fixture
+def fake_llm():
+    """Run fake_llm_server on a free local port for one test and yield its base URL"""
+    fake_llm_server.app.config.update(TOKEN_DELAY=0.0, ERROR_STATUS=None, MALFORMED_AFTER=None)
+    fake_llm_server.stream_counts.update(completed=0, aborted=0)
+    server = make_server('127.0.0.1', 0, fake_llm_server.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    thread.join()
@@ -0,0 +1,122 @@
+import pytest
+
+# chat.py builds its orchestrator from the OPEA comps package
+pytest.importorskip('comps')
+
+import chat
+import fake_llm_server
+from llm_client import LLMClient
+from response_cache import ResponseCache
+from test_chat_stream import parse_events, wait_for
+
+@pytest.fixture
+def gateway(fake_llm):
+    """chat.py's app with its service pointed at the fake LLM server and no cache"""
+    service = chat.service
+    service.llm_client = LLMClient(fake_llm, max_in_flight=2, queue_timeout=0.1)
+    service.cache = None
+    if not service.services:
+        service.add_remote_service()
+    yield chat.app.test_client()
+    service.llm_client.close()
+
+@pytest.fixture
+def cache(gateway):
+    chat.service.cache = ResponseCache(max_entries=16, ttl=60)
+    return chat.service.cache
+
+def upstream_requests():
+    return chat.service.llm_client.stats()['requests']
+
+def stream(client, prompt, **body):
+    response = client.post('/api/chat/stream', json=dict(body, prompt=prompt))
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return parse_events([response.get_data(as_text=True)])
+
+def test_stream_relays_deltas_then_metrics(gateway):
+    events = stream(gateway, 'hello there')
+    assert [data['delta'] for _, data in events[:-1]] == ['You ', 'said: ', 'hello ', 'there ']
+    event, metrics = events[-1]
+    assert event == 'done' and metrics['tokens'] == 4 and 'cached' not in metrics
+
+def test_blocking_chat(gateway):
+    response = gateway.post('/api/chat', json={'prompt': 'hello'})
+    assert response.get_json() == {'response': {'role': 'assistant', 'content': 'You said: hello '}}
+
+def test_client_disconnect_closes_upstream(gateway):
+    fake_llm_server.app.config['TOKEN_DELAY'] = 0.02
+    response = gateway.post('/api/chat/stream', json={'prompt': ' '.join(f'w{n}' for n in range(100))},
+                            buffered=False)
+    chunks = iter(response.response)
+    assert b'"delta"' in next(chunks)
+    response.close()
+    assert wait_for(lambda: fake_llm_server.stream_counts['aborted'] == 1)
+    assert chat.service.llm_client.stats()['in_flight'] == 0
+
+def test_upstream_errors_are_reported(gateway):
+    fake_llm_server.app.config['ERROR_STATUS'] = 500
+    [(event, data)] = stream(gateway, 'hello')
+    assert event == 'error' and data['error'].startswith('500 - ')
+    assert gateway.post('/api/chat', json={'prompt': 'hello'}).get_json()['response'].startswith('Error: 500')
+
+def test_malformed_upstream_chunk_is_an_error_event(gateway):
+    fake_llm_server.app.config['MALFORMED_AFTER'] = 2
+    events = stream(gateway, 'hello there')
+    assert [data['delta'] for event, data in events if event is None] == ['You ', 'said: ']
+    assert events[-1][0] == 'error'
+
+def test_missing_prompt_is_rejected(gateway):
+    assert gateway.post('/api/chat/stream', json={}).status_code == 400
+
+def test_busy_upstream_client_maps_to_503(gateway, fake_llm):
+    chat.service.llm_client = LLMClient(fake_llm, max_in_flight=1, queue_timeout=0.05)
+    payload = chat.service._build_payload('hold', stream=True)
+    with chat.service.llm_client.stream(chat.service.LLM_PATH, payload):
+        response = gateway.post('/api/chat', json={'prompt': 'hello'})
+        assert response.status_code == 503 and 'busy' in response.get_json()['error']
+        [(event, data)] = stream(gateway, 'hello')
+        assert event == 'error' and 'busy' in data['error']
+    assert chat.service.llm_client.stats()['rejected'] == 2
+    assert gateway.post('/api/chat', json={'prompt': 'hello'}).status_code == 200
+
+def test_gateway_reuses_one_upstream_session(gateway):
+    session = chat.service.llm_client.session
+    for n in range(3):
+        assert gateway.post('/api/chat', json={'prompt': f'hello {n}'}).status_code == 200
+    assert chat.service.llm_client.session is session
+    assert chat.service.llm_client.stats()['connections_opened'] == 1
+
+def test_repeated_chat_is_served_from_cache(gateway, cache):
+    first = gateway.post('/api/chat', json={'prompt': 'hello'}).get_json()
+    assert gateway.post('/api/chat', json={'prompt': 'hello'}).get_json() == first
+    assert upstream_requests() == 1
+    # Different sampling parameters are a different request
+    gateway.post('/api/chat', json={'prompt': 'hello', 'temperature': 0.2})
+    assert upstream_requests() == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['stores'] == 2
+
+def test_streams_and_blocking_calls_share_entries(gateway, cache):
+    live = stream(gateway, 'hello there')
+    assert live[-1][1]['tokens_per_sec'] is not None
+    replayed = stream(gateway, 'hello there')
+    assert replayed == [(None, {'delta': 'You said: hello there '}), ('done', replayed[-1][1])]
+    assert replayed[-1][1]['cached'] is True and replayed[-1][1]['tokens_per_sec'] is None
+    assert gateway.post('/api/chat', json={'prompt': 'hello there'}).get_json()['response']['content'] == \
+        'You said: hello there '
+    assert upstream_requests() == 1
+
+def test_bypass_skips_the_cache(gateway, cache):
+    gateway.post('/api/chat', json={'prompt': 'hello'})
+    gateway.post('/api/chat', json={'prompt': 'hello', 'cache': 'bypass'})
+    events = stream(gateway, 'hello', cache='bypass')
+    assert 'cached' not in events[-1][1]
+    assert upstream_requests() == 3
+    assert cache.stats()['bypassed'] == 2 and cache.stats()['hits'] == 0
+
+def test_failed_streams_are_not_cached(gateway, cache):
+    fake_llm_server.app.config['MALFORMED_AFTER'] = 2
+    stream(gateway, 'hello there')
+    assert cache.stats()['stores'] == 0
+    fake_llm_server.app.config['MALFORMED_AFTER'] = None
+    assert 'cached' not in stream(gateway, 'hello there')[-1][1]
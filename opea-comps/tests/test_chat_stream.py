@@ -0,0 +1,74 @@
+import json
+import time
+import pytest
+import requests
+import fake_llm_server
+from streaming import StreamMetrics, relay_chat_stream
+
+def parse_events(chunks):
+    """Split SSE text into (event, data) pairs; event is None for plain data events"""
+    events = []
+    for block in ''.join(chunks).strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields.get('event'), json.loads(fields['data'])))
+    return events
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def open_stream(base_url, prompt):
+    return requests.post(base_url + '/v1/chat/completions', stream=True, json={
+        'model': 'fake', 'messages': [{'role': 'user', 'content': prompt}],
+        'stream': True, 'stream_options': {'include_usage': True},
+    })
+
+def run(generator):
+    """Drain a generator, returning (items, return value)"""
+    items = []
+    while True:
+        try:
+            items.append(next(generator))
+        except StopIteration as stop:
+            return items, stop.value
+
+def test_deltas_are_relayed_in_order_then_metrics(fake_llm):
+    collected = []
+    chunks, completed = run(relay_chat_stream(open_stream(fake_llm, 'hello there'), StreamMetrics(), collected))
+    events = parse_events(chunks)
+    assert completed
+    assert [data['delta'] for event, data in events[:-1]] == ['You ', 'said: ', 'hello ', 'there ']
+    assert all(event is None for event, _ in events[:-1])
+    assert ''.join(collected) == 'You said: hello there '
+
+    event, metrics = events[-1]
+    assert event == 'done'
+    # The upstream's usage count wins over the deltas seen
+    assert metrics['tokens'] == 4
+    assert metrics['ttft_ms'] is not None and metrics['total_ms'] >= metrics['ttft_ms']
+
+def test_client_disconnect_closes_upstream(fake_llm):
+    fake_llm_server.app.config['TOKEN_DELAY'] = 0.02
+    upstream = open_stream(fake_llm, ' '.join(f'word{n}' for n in range(100)))
+    relay = relay_chat_stream(upstream, StreamMetrics())
+    assert parse_events([next(relay)]) == [(None, {'delta': 'You '})]
+    # What the WSGI server does when the client goes away
+    relay.close()
+    assert upstream.raw.closed
+    assert wait_for(lambda: fake_llm_server.stream_counts['aborted'] == 1)
+    assert fake_llm_server.stream_counts['completed'] == 0
+
+def test_malformed_chunk_ends_the_stream_with_an_error(fake_llm):
+    fake_llm_server.app.config['MALFORMED_AFTER'] = 1
+    upstream = open_stream(fake_llm, 'hello there')
+    chunks, completed = run(relay_chat_stream(upstream, StreamMetrics()))
+    events = parse_events(chunks)
+    assert not completed
+    assert events[0] == (None, {'delta': 'You '})
+    assert events[-1][0] == 'error' and 'Malformed chunk' in events[-1][1]['error']
+    assert 'done' not in [event for event, _ in events]
+    assert upstream.raw.closed
@@ -0,0 +1,69 @@
+import threading
+import pytest
+import requests
+from llm_client import LLMBusyError, LLMClient
+
+PATH = '/v1/chat/completions'
+
+def payload(prompt='hello', stream=False):
+    return {'model': 'fake', 'messages': [{'role': 'user', 'content': prompt}], 'stream': stream}
+
+@pytest.fixture
+def client(fake_llm):
+    client = LLMClient(fake_llm, pool_size=2, max_in_flight=1, queue_timeout=0.05)
+    yield client
+    client.close()
+
+def test_connections_are_reused(client, fake_llm):
+    session = client.session
+    for n in range(3):
+        response = client.post(PATH, payload(f'hello {n}'))
+        assert response.json()['choices'][0]['message']['content'] == f'You said: hello {n} '
+    assert client.session is session
+    assert session.get_adapter(fake_llm) is client._adapter
+    stats = client.stats()
+    assert stats['requests'] == 3 and stats['errors'] == 0
+    # One TCP connection carried all three requests
+    assert stats['connections_opened'] == 1 and stats['pool_hits'] == 2
+
+def test_busy_when_every_slot_is_taken(client):
+    with client.stream(PATH, payload(stream=True)) as upstream:
+        assert upstream.status_code == 200
+        assert client.stats()['in_flight'] == 1
+        with pytest.raises(LLMBusyError):
+            client.post(PATH, payload())
+    stats = client.stats()
+    assert stats['rejected'] == 1 and stats['in_flight'] == 0
+    # The slot is free again once the stream is closed
+    assert client.post(PATH, payload()).status_code == 200
+
+def test_waiting_callers_get_the_slot_when_it_frees(fake_llm):
+    client = LLMClient(fake_llm, max_in_flight=1, queue_timeout=5)
+    try:
+        started, results = threading.Event(), []
+
+        def hold():
+            with client.stream(PATH, payload(stream=True)):
+                started.set()
+                threading.Event().wait(0.1)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        started.wait(5)
+        results.append(client.post(PATH, payload()).status_code)
+        holder.join()
+        stats = client.stats()
+        assert results == [200] and stats['rejected'] == 0 and stats['queue_wait_ms_max'] > 0
+    finally:
+        client.close()
+
+def test_connection_errors_release_the_slot():
+    client = LLMClient('http://127.0.0.1:9', max_in_flight=1, connect_timeout=0.5, queue_timeout=0.05)
+    try:
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                client.post(PATH, payload())
+        stats = client.stats()
+        assert stats['errors'] == 2 and stats['rejected'] == 0 and stats['in_flight'] == 0
+    finally:
+        client.close()
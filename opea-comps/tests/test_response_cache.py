@@ -0,0 +1,74 @@
+import pytest
+import response_cache
+from response_cache import ResponseCache, cache_key
+from streaming import StreamMetrics, replay_cached_stream
+from test_chat_stream import parse_events
+
+MESSAGE = {'message': {'role': 'assistant', 'content': 'hi'}, 'completion_tokens': 1}
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's wall clock with one the test moves by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+    return now
+
+def payload(**extra):
+    return dict({'model': 'm', 'messages': [{'role': 'user', 'content': 'hello'}]}, **extra)
+
+def test_key_ignores_transport_fields():
+    assert cache_key(payload()) == cache_key(payload(stream=True, stream_options={'include_usage': True}))
+    assert cache_key(payload()) != cache_key(payload(temperature=0.5))
+    assert cache_key(payload(temperature=0.5)) == cache_key(payload(temperature=0.5))
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['size'] == 2
+    assert stats['hits'] == 3 and stats['misses'] == 1 and stats['hit_ratio'] == 0.75
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put('a', 1)
+    clock[0] += 59
+    assert cache.get('a') == 1
+    clock[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1 and cache.stats()['size'] == 0
+
+def test_sqlite_tier_survives_restarts(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    ResponseCache(max_entries=10, ttl=60, db_path=db_path).put('a', MESSAGE)
+
+    cache = ResponseCache(max_entries=10, ttl=60, db_path=db_path)
+    assert cache.get('a') == MESSAGE
+    # The disk hit refills the memory tier
+    assert cache.get('a') == MESSAGE
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['disk_size']) == (1, 1, 1)
+
+    cache.clear()
+    assert ResponseCache(db_path=db_path).get('a') is None
+
+def test_sqlite_tier_expires_entries(tmp_path, clock):
+    db_path = str(tmp_path / 'cache.db')
+    ResponseCache(ttl=60, db_path=db_path).put('a', 1)
+    ResponseCache(ttl=60, db_path=db_path).put('b', 2)
+    clock[0] += 61
+    cache = ResponseCache(ttl=60, db_path=db_path)
+    # Expired rows are dropped on open
+    assert cache.stats()['disk_size'] == 0
+    assert cache.get('a') is None
+
+def test_replay_does_not_report_throughput():
+    events = parse_events(list(replay_cached_stream(MESSAGE, StreamMetrics())))
+    assert events[0] == (None, {'delta': 'hi'})
+    event, metrics = events[1]
+    assert event == 'done' and metrics['cached'] is True
+    assert metrics['tokens_per_sec'] is None and metrics['tokens'] == 1